@@ -1,10 +1,37 @@
 """
 App configuration for API
 """
+import logging
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _ensure_indexes_in_background():
+    try:
+        from .mongo import get_db
+        from .mongo_indexes import ensure_indexes
+
+        created = [r for r in ensure_indexes(get_db()) if r[2] == 'created']
+        if created:
+            logger.info("Startup index check created %d index(es)", len(created))
+    except Exception as e:
+        logger.warning("Startup index check failed: %s", e)
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
 
+    def ready(self):
+        # Idempotent; runs off the request path so a slow or unreachable
+        # Mongo never delays worker boot. Deploys also run `ensure_indexes`.
+        if settings.MONGODB_ENSURE_INDEXES_ON_STARTUP:
+            threading.Thread(
+                target=_ensure_indexes_in_background,
+                name='ensure-indexes',
+                daemon=True,
+            ).start()
@@ -0,0 +1,124 @@
+"""
+Process-wide registry of SentenceTransformer encoders.
+
+Constructing a SentenceTransformer reads the weights from disk and
+initialises torch, which takes seconds and hundreds of MB, so each model is
+loaded once per process and shared by all requests (encode() is safe to call
+from several threads). On first use in a process the registry also:
+
+- caps torch's intra-op threads at EMBEDDING_TORCH_THREADS, so gunicorn
+  workers (and their threads) do not each spin up one thread per core;
+- runs a warm-up encode, so the first real match does not pay for lazy
+  allocations.
+
+With EMBEDDING_PRELOAD, gunicorn.conf.py loads the model in the gunicorn
+master before forking (preload()), so the workers share the weights'
+memory pages copy-on-write; each worker then only warms up. The master never
+runs inference: torch's thread pool does not survive fork().
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_TEXT = 'Senior software engineer with Python and Django experience.'
+
+_models = {}  # name -> SentenceTransformer
+_load_seconds = {}  # name -> seconds the load took
+_warm = set()  # (pid, name) warmed up in this process
+_configured_pid = None
+_lock = threading.Lock()
+
+
+def default_model():
+    return settings.MATCH_EMBEDDING_MODEL
+
+
+def _configure_torch(threads):
+    """Cap torch's intra-op threads for this process."""
+    import torch
+
+    if threads > 0:
+        torch.set_num_threads(threads)
+
+
+def _load(name):
+    from sentence_transformers import SentenceTransformer
+
+    started = time.perf_counter()
+    model = SentenceTransformer(name)
+    _load_seconds[name] = time.perf_counter() - started
+    logger.info("Loaded embedding model %s in %.1fs (pid %s)", name, _load_seconds[name], os.getpid())
+    return model
+
+
+def _prepare_process():
+    global _configured_pid
+    pid = os.getpid()
+    if _configured_pid != pid:
+        _configure_torch(settings.EMBEDDING_TORCH_THREADS)
+        _configured_pid = pid
+
+
+def get_model(name=None):
+    """The encoder `name` (default MATCH_EMBEDDING_MODEL), loaded and warmed up on first use."""
+    name = name or default_model()
+    key = (os.getpid(), name)
+    model = _models.get(name)
+    if model is not None and key in _warm:
+        return model
+    with _lock:
+        _prepare_process()
+        model = _models.get(name)
+        if model is None:
+            model = _models[name] = _load(name)
+        if key not in _warm:
+            model.encode([WARM_UP_TEXT], show_progress_bar=False)
+            _warm.add(key)
+    return model
+
+
+def encode(texts, name=None):
+    """Embeddings of `texts` as a numpy array, one row per text."""
+    return get_model(name).encode(
+        list(texts), batch_size=settings.EMBEDDING_BATCH_SIZE, show_progress_bar=False, convert_to_numpy=True,
+    )
+
+
+def preload(name=None):
+    """
+    Load the weights without running inference, for a process that forks
+    workers afterwards (the gunicorn master).
+    """
+    name = name or default_model()
+    with _lock:
+        if name not in _models:
+            # Keep torch single-threaded here; workers set their own cap after fork
+            _configure_torch(1)
+            _models[name] = _load(name)
+
+
+def warm_up(name=None):
+    """Load (if needed) and warm up in this process; called by gunicorn after fork."""
+    try:
+        get_model(name)
+    except Exception as e:
+        # Matches load it lazily (and report the error) instead
+        logger.warning("Embedding model warm-up failed: %s", e)
+
+
+def stats():
+    """Loaded models of this process, for /health/."""
+    pid = os.getpid()
+    return {
+        'pid': pid,
+        'models': {
+            name: {'load_seconds': round(_load_seconds.get(name, 0.0), 2), 'warm': (pid, name) in _warm}
+            for name in list(_models)
+        },
+        'torch_threads': settings.EMBEDDING_TORCH_THREADS,
+    }
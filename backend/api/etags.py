@@ -0,0 +1,95 @@
+"""
+Strong ETags for resume payloads.
+
+A resume's representation only changes when its document is written, and
+every write sets `updated_at`, so the ETag is simply `"<_id>-<updated_at
+in epoch milliseconds>"`. Keeping the timestamp readable (instead of
+hashing it) lets If-Match be checked atomically inside the Mongo update
+filter rather than with an extra read.
+"""
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Added by api.middleware.CompressionMiddleware to compressed responses
+_CODING_SUFFIXES = ('-gzip"', '-br"')
+
+
+def _epoch_ms(value):
+    if not isinstance(value, datetime):
+        return 0
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return delta.days * 86_400_000 + delta.seconds * 1000 + delta.microseconds // 1000
+
+
+def resume_etag(resume_doc):
+    """Quoted strong ETag for a resume document (needs _id and updated_at)."""
+    return f'"{resume_doc["_id"]}-{_epoch_ms(resume_doc.get("updated_at"))}"'
+
+
+def parse_etag_list(header_value):
+    """
+    Split an If-Match / If-None-Match header. Returns '*' or a list of
+    (tag, is_weak) with quotes kept on the tag and any content-coding
+    suffix removed.
+    """
+    if not header_value:
+        return []
+    header_value = header_value.strip()
+    if header_value == '*':
+        return '*'
+    tags = []
+    for part in header_value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        weak = part.startswith('W/')
+        tag = part[2:] if weak else part
+        for suffix in _CODING_SUFFIXES:
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)] + '"'
+                break
+        tags.append((tag, weak))
+    return tags
+
+
+def none_match(request, etag):
+    """True if If-None-Match matches `etag` (weak comparison, RFC 7232 3.2)."""
+    tags = parse_etag_list(request.META.get('HTTP_IF_NONE_MATCH'))
+    if tags == '*':
+        return True
+    return any(tag == etag for tag, _ in tags)
+
+
+class PreconditionFailed(Exception):
+    """If-Match names no ETag of this resume (views answer 412)."""
+
+
+def if_match_filter(request, resume_id):
+    """
+    Interpret If-Match for a resume write.
+
+    Returns None when the header is absent or '*', otherwise a Mongo filter
+    on `updated_at` that the stored document must still satisfy for the
+    write to apply. Raises PreconditionFailed if no listed ETag belongs to
+    this resume.
+    """
+    tags = parse_etag_list(request.META.get('HTTP_IF_MATCH'))
+    if not tags or tags == '*':
+        return None
+    prefix = f'"{resume_id}-'
+    values = []
+    for tag, weak in tags:
+        # If-Match uses strong comparison: weak tags never match
+        if weak or not tag.startswith(prefix) or not tag.endswith('"'):
+            continue
+        millis = tag[len(prefix):-1]
+        if not millis.isdigit():
+            continue
+        millis = int(millis)
+        values.append(None if millis == 0 else _EPOCH + timedelta(milliseconds=millis))
+    if not values:
+        raise PreconditionFailed()
+    return {'updated_at': {'$in': values}}
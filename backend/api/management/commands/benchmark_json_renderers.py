@@ -0,0 +1,129 @@
+"""
+Compare JSON renderers (and response compression) on resume payloads.
+
+Usage: python manage.py benchmark_json_renderers [--iterations N] [--resumes N] [--from-db]
+
+Without --from-db a realistic synthetic resume list is used (dozens of
+nested entries, native datetimes and ObjectIds as they come out of Mongo).
+"""
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _synthetic_resume(index):
+    now = datetime(2024, 5, 1, 12, 30, 15, 123000)
+    return {
+        'id': ObjectId(),
+        'personal_info': {
+            'first_name': f'Candidate {index}',
+            'last_name': 'Müller',
+            'email': f'candidate{index}@example.com',
+            'phone': '+49 170 0000000',
+            'city': 'Berlin',
+            'country': 'Germany',
+            'professional_title': 'Senior Software Engineer',
+            'summary': 'Backend engineer focused on APIs, data pipelines and reliability. ' * 4,
+        },
+        'work_experience': [
+            {
+                'position': f'Engineer {job}',
+                'company': f'Company {job}',
+                'location': 'Remote',
+                'start_date': '2019-01',
+                'end_date': '2021-06',
+                'current': False,
+                'description': 'Designed and shipped services handling millions of requests per day. ' * 5,
+            }
+            for job in range(8)
+        ],
+        'education': [
+            {'institution': 'TU Berlin', 'degree': 'MSc', 'field': 'Computer Science',
+             'start_date': '2012-10', 'end_date': '2015-09', 'gpa': '1.3'}
+            for _ in range(3)
+        ],
+        'skills': [{'skill': f'Skill {n}', 'level': 'advanced'} for n in range(30)],
+        'projects': [
+            {'name': f'Project {n}', 'description': 'Open source tooling for document rendering. ' * 3,
+             'technologies': ['Python', 'Django', 'MongoDB', 'React'], 'link': 'https://example.com'}
+            for n in range(6)
+        ],
+        'languages': [{'language': 'English', 'proficiency': 'C2'}, {'language': 'German', 'proficiency': 'C1'}],
+        'certificates': [{'name': f'Certificate {n}', 'issuer': 'Cloud Vendor', 'date': '2022-03'} for n in range(5)],
+        'styling': {'font_family': 'Inter', 'font_size': 11, 'accent_color': '#2563eb'},
+        'template': 'modern',
+        'created_at': now - timedelta(days=index),
+        'updated_at': now,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark DRF JSONRenderer against api.renderers.FastJSONRenderer on resume payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--resumes', type=int, default=20, help='Resumes per payload')
+        parser.add_argument(
+            '--from-db',
+            action='store_true',
+            help='Use the newest resumes from MongoDB (as the detail endpoint returns them)',
+        )
+
+    def _payload(self, options):
+        if not options['from_db']:
+            return [_synthetic_resume(i) for i in range(options['resumes'])]
+        from api import resume_repository
+        from api.views.resume_views import _resume_dict_from_doc
+        cursor = resume_repository.resumes_collection().find({}).sort('updated_at', -1).limit(options['resumes'])
+        return [_resume_dict_from_doc(doc) for doc in cursor]
+
+    def handle(self, *args, **options):
+        payload = self._payload(options)
+        iterations = options['iterations']
+        candidates = [
+            ('rest_framework JSONRenderer', JSONRenderer()),
+            ('api FastJSONRenderer' + ('' if renderers.orjson else ' (orjson missing, fallback)'),
+             renderers.FastJSONRenderer()),
+        ]
+
+        # DRF's stock encoder cannot serialize ObjectId; convert for it like the views do
+        stock_payload = json.loads(renderers.FastJSONRenderer().render(payload))
+
+        body = b''
+        for label, renderer in candidates:
+            data = stock_payload if type(renderer) is JSONRenderer else payload
+            renderer.render(data)  # warm-up
+            start = time.perf_counter()
+            for _ in range(iterations):
+                body = renderer.render(data)
+            per_call = (time.perf_counter() - start) / iterations * 1000
+            self.stdout.write(f'{label}: {per_call:.3f} ms/render, {len(body)} bytes')
+
+        start = time.perf_counter()
+        gzipped = gzip.compress(body, compresslevel=6)
+        self.stdout.write(
+            f'gzip: {len(gzipped)} bytes ({len(gzipped) / len(body):.1%}) in '
+            f'{(time.perf_counter() - start) * 1000:.3f} ms'
+        )
+        if brotli is not None:
+            start = time.perf_counter()
+            compressed = brotli.compress(body, quality=settings.API_BROTLI_QUALITY)
+            self.stdout.write(
+                f'brotli q{settings.API_BROTLI_QUALITY}: {len(compressed)} bytes '
+                f'({len(compressed) / len(body):.1%}) in {(time.perf_counter() - start) * 1000:.3f} ms'
+            )
+        else:
+            self.stdout.write('brotli: not installed')
@@ -0,0 +1,125 @@
+"""
+Compare the threaded (WSGI) and async (ASGI) PDF render paths.
+
+Usage: python manage.py benchmark_pdf_render [--renders N] [--concurrency N] [--pool-size N] [--from-db]
+
+Both paths render on one BrowserPool of the same size, so Chromium memory is
+the same; what differs is how callers wait. The sync path uses one thread
+per concurrent request (as gunicorn's threads would), the async path one
+coroutine each on a single event loop (as an ASGI worker would). Reports
+renders/s, latency percentiles, peak threads and this process's peak RSS.
+"""
+import asyncio
+import concurrent.futures
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import resume_html
+from api.management.commands.benchmark_json_renderers import _synthetic_resume
+from api.pdf_browser_pool import BrowserPool
+
+
+def _rss_mb():
+    """Current resident set size of this process (Linux), or None."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class _Sampler:
+    """Peak thread count and RSS while a benchmark runs."""
+
+    def __init__(self):
+        self.threads = 0
+        self.rss = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(0.05):
+            self.threads = max(self.threads, threading.active_count())
+            self.rss = max(self.rss, _rss_mb() or 0.0)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark threaded vs async PDF rendering on one browser pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=40)
+        parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight')
+        parser.add_argument('--pool-size', type=int, default=settings.PDF_POOL_SIZE, help='Browser pages')
+        parser.add_argument('--template', default='modern', choices=resume_html.TEMPLATES)
+        parser.add_argument('--from-db', action='store_true', help='Render the newest resume from MongoDB')
+
+    def _html(self, options):
+        if options['from_db']:
+            from api import resume_repository
+            resume_doc = resume_repository.resumes_collection().find_one({}, sort=[('updated_at', -1)])
+        else:
+            resume_doc = _synthetic_resume(0)
+        return resume_html.render_resume_html(resume_doc, options['template'])
+
+    def handle(self, *args, **options):
+        html_content = self._html(options)
+        renders = options['renders']
+        concurrency = options['concurrency']
+        # Waiting for a page is part of the measurement, never a failure
+        timeout = 600
+
+        pool = BrowserPool(options['pool_size'], settings.PDF_BROWSER_MAX_RENDERS)
+        try:
+            pool.render(html_content, acquire_timeout=timeout)  # launch Chromium outside the timings
+
+            def timed_sync():
+                start = time.perf_counter()
+                pool.render(html_content, acquire_timeout=timeout, render_timeout=timeout)
+                return time.perf_counter() - start
+
+            def run_sync():
+                with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+                    return list(executor.map(lambda _: timed_sync(), range(renders)))
+
+            async def timed_async(gate):
+                async with gate:
+                    start = time.perf_counter()
+                    await pool.render_async(html_content, acquire_timeout=timeout, render_timeout=timeout)
+                    return time.perf_counter() - start
+
+            async def run_async():
+                gate = asyncio.Semaphore(concurrency)
+                return await asyncio.gather(*(timed_async(gate) for _ in range(renders)))
+
+            self.stdout.write(
+                f'{renders} renders, {concurrency} in flight, {options["pool_size"]} page(s), '
+                f'{len(html_content)} bytes of HTML'
+            )
+            for label, run in (('sync (threads)', run_sync), ('async (event loop)', lambda: asyncio.run(run_async()))):
+                with _Sampler() as sampler:
+                    start = time.perf_counter()
+                    latencies = sorted(run())
+                    elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{label}: {renders / elapsed:.2f} renders/s, '
+                    f'p50 {statistics.median(latencies) * 1000:.0f} ms, '
+                    f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms, '
+                    f'peak {sampler.threads} threads, peak RSS {sampler.rss:.0f} MB (Python process)'
+                )
+        finally:
+            pool.close()
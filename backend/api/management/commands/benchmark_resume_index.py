@@ -0,0 +1,102 @@
+"""
+Measure recall and latency of approximate resume index queries against exact ones.
+
+Usage: python manage.py benchmark_resume_index [--synthetic N] [--dim D]
+           [--queries N] [--k K] [--nprobe 4 8 16 ...]
+
+By default queries the live index with the vectors of indexed resumes.
+--synthetic builds a throwaway index of N clustered random vectors instead,
+to size nlist/nprobe before the corpus is that large.
+"""
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from api import resume_vector_index
+
+
+def _synthetic_rows(count, dim, seed=0):
+    """Unit vectors drawn around a few hundred topics, like embeddings of resumes."""
+    rng = np.random.default_rng(seed)
+    topics = resume_vector_index.normalize(rng.standard_normal((max(count // 200, 8), dim)))
+    for start in range(0, count, 10000):
+        size = min(10000, count - start)
+        vectors = topics[rng.integers(len(topics), size=size)] + 0.08 * rng.standard_normal((size, dim))
+        for offset, vector in enumerate(vectors):
+            yield f'{start + offset:024x}', vector.astype(np.float32)
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark approximate (IVF) against exact queries of the resume vector index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synthetic', type=int, default=0, help='Build a temporary index of N random vectors')
+        parser.add_argument('--dim', type=int, default=384, help='Vector size of --synthetic')
+        parser.add_argument('--nlist', type=int, default=None, help='k-means lists of --synthetic')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+
+    def handle(self, *args, **options):
+        if not options['synthetic']:
+            self._run(options)
+            return
+        with tempfile.TemporaryDirectory() as directory, override_settings(RESUME_VECTOR_INDEX_DIR=directory):
+            started = time.perf_counter()
+            count, dim = options['synthetic'], options['dim']
+            stats = resume_vector_index.build(
+                _synthetic_rows(count, dim), 'synthetic', dim, count, nlist=options['nlist'],
+            )
+            self.stdout.write(
+                f"Built {stats['rows']} rows, {stats['nlist']} lists in {time.perf_counter() - started:.1f}s"
+            )
+            self._run(options)
+
+    def _run(self, options):
+        with resume_vector_index._lock:
+            index = resume_vector_index._open()
+            index = index and index.snapshot()
+        if index is None:
+            raise CommandError('The resume index has not been built. Run manage.py rebuild_resume_index.')
+        count = index.meta['count']
+        rng = np.random.default_rng(1)
+        rows = rng.choice(count, min(options['queries'], count), replace=False)
+        # Query with perturbed indexed vectors, so the answer is not just the row itself
+        queries = np.asarray(index.vectors[np.sort(rows)]) + 0.05 * rng.standard_normal((len(rows), index.meta['dim']))
+        k = options['k']
+
+        exact_ids = []
+        exact_times = []
+        for query in queries:
+            started = time.perf_counter()
+            exact_ids.append({resume_id for resume_id, _ in resume_vector_index.search(query, k, exact=True)})
+            exact_times.append(time.perf_counter() - started)
+        self._report('exact', exact_times, 1.0)
+
+        if not index.meta['clustered']:
+            self.stdout.write('Index is not clustered (too few rows); every query is exact.')
+            return
+        for nprobe in options['nprobe']:
+            times = []
+            recalls = []
+            for query, expected in zip(queries, exact_ids):
+                started = time.perf_counter()
+                found = {resume_id for resume_id, _ in resume_vector_index.search(query, k, nprobe=nprobe)}
+                times.append(time.perf_counter() - started)
+                recalls.append(len(found & expected) / max(len(expected), 1))
+            self._report(f'nprobe={nprobe}/{index.meta["nlist"]}', times, statistics.mean(recalls))
+
+    def _report(self, label, times, recall):
+        self.stdout.write(
+            f'{label:>16}: recall@k {recall:.3f}  p50 {statistics.median(times) * 1000:.2f} ms  '
+            f'p95 {_percentile(times, 0.95) * 1000:.2f} ms'
+        )
@@ -0,0 +1,54 @@
+"""
+Create the MongoDB indexes the raw pymongo views rely on.
+
+Usage: python manage.py ensure_indexes [--dry-run] [--no-explain]
+"""
+from django.core.management.base import BaseCommand
+
+from api.mongo import get_db
+from api.mongo_indexes import ensure_indexes, explain_hot_queries
+
+
+class Command(BaseCommand):
+    help = 'Create indexes for resumes, blog_posts and token collections and report collection scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report which indexes are missing',
+        )
+        parser.add_argument(
+            '--no-explain',
+            action='store_true',
+            help='Skip the explain() check of the hot queries',
+        )
+
+    def handle(self, *args, **options):
+        db = get_db()
+
+        for collection_name, index_name, action in ensure_indexes(db, dry_run=options['dry_run']):
+            line = f'{collection_name}.{index_name}: {action}'
+            if action == 'created':
+                self.stdout.write(self.style.SUCCESS(line))
+            elif action == 'missing':
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
+
+        if options['no_explain']:
+            return
+
+        collscans = 0
+        for label, collection_name, uses_collscan, stages in explain_hot_queries(db):
+            line = f'{label} ({collection_name}): {" > ".join(stages) or "no plan"}'
+            if uses_collscan:
+                collscans += 1
+                self.stdout.write(self.style.ERROR(f'COLLSCAN {line}'))
+            else:
+                self.stdout.write(line)
+
+        if collscans:
+            self.stdout.write(self.style.WARNING(f'{collscans} hot queries still scan the whole collection'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All hot queries use an index'))
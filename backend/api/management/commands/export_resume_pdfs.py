@@ -0,0 +1,73 @@
+"""
+Export many resumes to PDF into one zip archive.
+
+Usage:
+    python manage.py export_resume_pdfs --output /tmp/export.zip --user-id 33 41
+    python manage.py export_resume_pdfs --output /tmp/export.zip --resume-id <id> <id> \\
+        [--template modern] [--lang de] [--concurrency 4]
+
+Streams the resumes from MongoDB and renders them on one shared browser pool
+(api/pdf_bulk_export.py); scripts/export_resume_pdf.py is the single-resume
+tool. Admins can queue the same export over the API (POST /api/admin/pdf-exports/).
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import pdf_bulk_export, resume_html
+from api.pdf_browser_pool import BrowserPool
+
+
+class Command(BaseCommand):
+    help = 'Export the PDFs of many resumes into a zip archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', required=True, help='Path of the zip archive to write')
+        parser.add_argument('--user-id', type=int, nargs='+', default=[],
+                            help='Export every resume of these users')
+        parser.add_argument('--resume-id', nargs='+', default=[],
+                            help='Export these resumes')
+        parser.add_argument('--template', choices=resume_html.TEMPLATES,
+                            help="Template for all resumes (default: each resume's own)")
+        parser.add_argument('--lang', default='en', choices=list(resume_html.LABELS),
+                            help='Language of section headings')
+        parser.add_argument('--concurrency', type=int, default=settings.PDF_POOL_SIZE,
+                            help='Renders in parallel (browser pages)')
+
+    def handle(self, *args, **options):
+        if not options['user_id'] and not options['resume_id']:
+            raise CommandError('Pass --user-id and/or --resume-id')
+        try:
+            resume_ids = pdf_bulk_export.parse_resume_ids(options['resume_id'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        concurrency = max(1, options['concurrency'])
+        pool = BrowserPool(concurrency, settings.PDF_BROWSER_MAX_RENDERS)
+        try:
+            stats = pdf_bulk_export.write_export(
+                Path(options['output']),
+                pool,
+                user_ids=options['user_id'],
+                resume_ids=resume_ids,
+                template=options['template'],
+                language=options['lang'],
+                concurrency=concurrency,
+                progress=self._progress,
+            )
+        finally:
+            pool.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {stats['exported']} of {stats['total']} resume(s) to {options['output']} "
+            f"({stats['bytes'] / 1e6:.1f} MB) in {stats['elapsed']:.1f}s, {stats['per_second']:.2f} resumes/s"
+        ))
+        if stats['failed']:
+            self.stderr.write(f"{stats['failed']} resume(s) failed, see errors.txt in the archive")
+
+    def _progress(self, stats):
+        self.stdout.write(
+            f"  {stats['exported'] + stats['failed']}/{stats['total']} done "
+            f"({stats['failed']} failed), {stats['per_second']:.2f} resumes/s"
+        )
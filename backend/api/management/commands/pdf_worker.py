@@ -0,0 +1,165 @@
+"""
+Render worker for queued PDF jobs (api/pdf_jobs.py).
+
+Usage: python manage.py pdf_worker [--concurrency N] [--poll-interval SECONDS] [--once]
+
+Runs as its own process/container so Chromium never competes with the
+gunicorn workers serving CRUD traffic. Also runs bulk exports queued from
+the admin API (api/pdf_bulk_export.py) and the thumbnails queued when a
+resume is saved (api/pdf_thumbnails.py). Stops after the jobs in flight on
+SIGTERM/SIGINT.
+"""
+import os
+import signal
+import socket
+import threading
+import time
+
+from bson import ObjectId
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import pdf_bulk_export, pdf_cache, pdf_jobs, pdf_metrics, pdf_thumbnails, resume_repository
+from api.pdf_browser_pool import BrowserPool, PdfLimitExceeded
+
+MAINTENANCE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = 'Claim and render queued PDF jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.PDF_POOL_SIZE,
+                            help='Renders in parallel (browser pages)')
+        parser.add_argument('--poll-interval', type=float, default=0.5,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty')
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+        signal.signal(signal.SIGINT, lambda *_: self.stop.set())
+
+        # Exported next to the API's metrics by GET /api/metrics/pdf/ (source="worker")
+        pdf_metrics.set_source('worker')
+        concurrency = max(1, options['concurrency'])
+        self.pool = BrowserPool(concurrency, settings.PDF_BROWSER_MAX_RENDERS)
+        self.worker_name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(f'PDF worker {self.worker_name} started with {concurrency} slot(s)')
+
+        threads = [
+            threading.Thread(target=self._loop, args=(options,), name=f'pdf-worker-{n}', daemon=True)
+            for n in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        next_maintenance = 0
+        while any(thread.is_alive() for thread in threads):
+            if time.monotonic() >= next_maintenance:
+                self._maintenance()
+                next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+            time.sleep(1)
+
+        self.pool.close()
+        pdf_metrics.flush()
+        self.stdout.write('PDF worker stopped')
+
+    def _maintenance(self):
+        try:
+            requeued = pdf_jobs.requeue_stale()
+            removed = pdf_jobs.remove_expired_results()
+            removed_thumbnails = pdf_thumbnails.remove_unused()
+            if requeued or removed or removed_thumbnails:
+                self.stdout.write(
+                    f'Re-queued {requeued} stale job(s), removed {removed} expired result(s) '
+                    f'and {removed_thumbnails} unused thumbnail set(s)'
+                )
+        except Exception as e:
+            self.stderr.write(f'Maintenance failed: {e}')
+
+    def _cached_or_render(self, html_content, cache_key=None):
+        cache_key = cache_key or pdf_cache.cache_key(html_content)
+        cached_file = pdf_cache.open_cached(cache_key)
+        if cached_file is not None:
+            with cached_file:
+                return cached_file.read()
+        # Slots match the threads; a running export can hold slots, hence the long wait
+        pdf_bytes = self.pool.render(html_content, acquire_timeout=settings.PDF_RENDER_TIMEOUT)
+        pdf_cache.store(cache_key, pdf_bytes)
+        return pdf_bytes
+
+    def _export(self, job):
+        params = job['params']
+        pdf_jobs.ensure_results_dir()
+        stats = pdf_bulk_export.write_export(
+            pdf_jobs.export_path(job['_id']),
+            self.pool,
+            user_ids=params['user_ids'],
+            resume_ids=pdf_bulk_export.parse_resume_ids(params['resume_ids']),
+            template=params['template'],
+            language=params['language'],
+            progress=lambda progress: pdf_jobs.report_progress(job['_id'], progress),
+        )
+        pdf_jobs.complete_export(job['_id'], stats)
+        return stats
+
+    def _thumbnails(self, job):
+        resume_doc = resume_repository.find_one_for_user(ObjectId(job['resume_id']), job['user_id'])
+        if resume_doc is None:
+            # Deleted since it was saved
+            pdf_jobs.complete_thumbnails(job['_id'], 0)
+            return 0
+        _, pages = pdf_thumbnails.generate_default(
+            resume_doc,
+            lambda html_content: self.pool.render(html_content, acquire_timeout=settings.PDF_RENDER_TIMEOUT),
+        )
+        pdf_jobs.complete_thumbnails(job['_id'], pages)
+        return pages
+
+    def _loop(self, options):
+        while not self.stop.is_set():
+            try:
+                job = pdf_jobs.claim_next(self.worker_name)
+            except Exception as e:
+                self.stderr.write(f'Could not claim a job: {e}')
+                self.stop.wait(5)
+                continue
+
+            if job is None:
+                if options['once']:
+                    return
+                self.stop.wait(options['poll_interval'])
+                continue
+
+            if job.get('kind') == pdf_jobs.EXPORT:
+                try:
+                    stats = self._export(job)
+                    self.stdout.write(
+                        f"{job['_id']}: exported {stats['exported']}/{stats['total']} resume(s) "
+                        f"in {stats['elapsed']:.1f}s ({stats['per_second']:.2f}/s)"
+                    )
+                except Exception as e:
+                    pdf_jobs.fail(job, e)
+                    self.stderr.write(f"{job['_id']}: export failed ({e})")
+                continue
+
+            if job.get('kind') == pdf_jobs.THUMBNAILS:
+                try:
+                    pages = self._thumbnails(job)
+                    self.stdout.write(f"{job['_id']}: {pages} thumbnail(s) for resume {job['resume_id']}")
+                except Exception as e:
+                    pdf_jobs.fail(job, e, retry=not isinstance(e, PdfLimitExceeded))
+                    self.stderr.write(f"{job['_id']}: thumbnails failed ({e})")
+                continue
+
+            started = time.monotonic()
+            try:
+                pdf_bytes = self._cached_or_render(job['html'], job.get('cache_key'))
+                pdf_jobs.complete(job['_id'], pdf_bytes)
+                self.stdout.write(f"{job['_id']}: done in {time.monotonic() - started:.2f}s")
+            except Exception as e:
+                # An over-long resume fails the same way every time
+                pdf_jobs.fail(job, e, retry=not isinstance(e, PdfLimitExceeded))
+                self.stderr.write(f"{job['_id']}: failed ({e})")
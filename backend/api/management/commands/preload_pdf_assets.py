@@ -0,0 +1,42 @@
+"""
+Fill the PDF asset cache with the stylesheets and fonts resumes use.
+
+Usage: python manage.py preload_pdf_assets [--url URL ...]
+
+Fetches every URL in PDF_PRELOAD_ASSETS (or the given ones) and, for
+stylesheets, the fonts they reference, so PDF renders find them in the
+cache instead of going to the network (api/pdf_assets.py).
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import pdf_assets
+
+
+class Command(BaseCommand):
+    help = 'Fetch the stylesheets and fonts used by PDF exports into the asset cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            action='append',
+            dest='urls',
+            help='Preload this URL instead of PDF_PRELOAD_ASSETS (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or settings.PDF_PRELOAD_ASSETS
+        loaded = 0
+        for url in urls:
+            fetched = pdf_assets.fetch(url)
+            if fetched is None:
+                self.stdout.write(self.style.WARNING(f'{url}: unavailable'))
+                continue
+            body, content_type = fetched
+            if content_type == 'text/css':
+                pdf_assets.inline_stylesheet(body, url)
+            loaded += 1
+            self.stdout.write(f'{url}: {content_type}, {len(body)} bytes')
+        self.stdout.write(self.style.SUCCESS(
+            f'{loaded} of {len(urls)} assets cached in {pdf_assets.cache_dir()}'
+        ))
@@ -0,0 +1,39 @@
+"""
+Rebuild the static JSON snapshots of hosted public profiles.
+
+Usage: python manage.py rebuild_public_profiles [--resume-id ID ...] [--keep-stale]
+"""
+from django.core.management.base import BaseCommand
+
+from api.public_profile_snapshots import rebuild_all, rebuild_snapshot, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = 'Write snapshots for every public profile and remove snapshots of profiles that are no longer public'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resume-id',
+            action='append',
+            dest='resume_ids',
+            help='Only rebuild this resume (repeatable)',
+        )
+        parser.add_argument(
+            '--keep-stale',
+            action='store_true',
+            help='Do not delete snapshots of profiles that are no longer public',
+        )
+
+    def handle(self, *args, **options):
+        if options['resume_ids']:
+            for resume_id in options['resume_ids']:
+                if rebuild_snapshot(resume_id):
+                    self.stdout.write(self.style.SUCCESS(f'{resume_id}: written'))
+                else:
+                    self.stdout.write(self.style.WARNING(f'{resume_id}: not public, snapshot removed'))
+            return
+
+        written, removed = rebuild_all(clean=not options['keep_stale'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} snapshots written, {removed} stale snapshots removed in {snapshot_dir()}'
+        ))
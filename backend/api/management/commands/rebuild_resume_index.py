@@ -0,0 +1,62 @@
+"""
+Rebuild the on-disk resume vector index used by the recruiter search.
+
+Usage: python manage.py rebuild_resume_index [--compute-missing] [--nlist N]
+
+Indexes every embedding stored for MATCH_EMBEDDING_MODEL. With
+--compute-missing, resumes without a current embedding are encoded first.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import embedding_models, resume_embeddings, resume_repository, resume_vector_index
+
+
+class Command(BaseCommand):
+    help = 'Write a new generation of the resume vector index from the stored resume embeddings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--compute-missing',
+            action='store_true',
+            help='Encode resumes that have no embedding for the current model first',
+        )
+        parser.add_argument(
+            '--nlist',
+            type=int,
+            default=None,
+            help='k-means lists (default RESUME_VECTOR_INDEX_NLIST, else the square root of the resume count)',
+        )
+
+    def handle(self, *args, **options):
+        if options['compute_missing']:
+            self._compute_missing()
+
+        started = time.perf_counter()
+        try:
+            stats = resume_vector_index.rebuild(
+                nlist=options['nlist'],
+                progress=lambda rows: self.stdout.write(f'  {rows} rows read'),
+            )
+        except resume_vector_index.IndexNotBuilt as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {stats['rows']} resumes ({stats['nlist'] or 'no'} lists) as generation "
+            f"{stats['generation']} in {resume_vector_index.index_dir()} in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def _compute_missing(self):
+        indexed = set(resume_embeddings.embeddings_collection().distinct(
+            '_id', {'model': embedding_models.default_model()},
+        ))
+        computed = 0
+        for resume_doc in resume_repository.resumes_collection().find({}, {'_id': 1}):
+            if resume_doc['_id'] in indexed:
+                continue
+            try:
+                if resume_embeddings.refresh(resume_doc['_id']) is not None:
+                    computed += 1
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"{resume_doc['_id']}: {e}"))
+        self.stdout.write(f'Encoded {computed} resumes without an embedding')
@@ -0,0 +1,74 @@
+"""
+Response compression for large API bodies.
+
+Negotiates Brotli (when the optional `brotli` package is installed) or gzip
+from Accept-Encoding. Only text-like responses above
+API_COMPRESSION_MIN_BYTES are compressed; small bodies and PDFs/images are
+passed through untouched.
+
+Strong ETags get a content-coding suffix ("<tag>-gzip") instead of being
+weakened as Django's GZipMiddleware does, so autosave If-Match checks keep
+working (api.etags strips the suffix again).
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/xml', 'application/javascript')
+
+
+def _accepts(encoding, accept_encoding):
+    """True if Accept-Encoding lists `encoding` without q=0."""
+    match = re.search(
+        rf'(?:^|,)\s*{encoding}\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*(?:,|$)',
+        accept_encoding,
+        re.IGNORECASE,
+    )
+    if not match:
+        return False
+    try:
+        return match.group(1) is None or float(match.group(1)) > 0
+    except ValueError:
+        return False
+
+
+class CompressionMiddleware(MiddlewareMixin):
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(_COMPRESSIBLE_TYPES):
+            return response
+        if len(response.content) < settings.API_COMPRESSION_MIN_BYTES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and _accepts('br', accept_encoding):
+            encoding = 'br'
+            compressed = brotli.compress(response.content, quality=settings.API_BROTLI_QUALITY)
+        elif _accepts('gzip', accept_encoding):
+            encoding = 'gzip'
+            compressed = compress_string(response.content)
+        else:
+            return response
+
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"') and etag.endswith('"'):
+            response['ETag'] = f'{etag[:-1]}-{encoding}"'
+        return response
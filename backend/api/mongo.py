@@ -0,0 +1,181 @@
+"""
+Shared pymongo client for the raw-collection views.
+
+One MongoClient (and therefore one connection pool) is created lazily per
+process and reused by every request. Gunicorn forks workers after importing
+the app, and pymongo clients are not fork-safe, so the client remembers the
+PID that created it and is rebuilt transparently in a forked child.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from pymongo import MongoClient
+from pymongo.monitoring import ConnectionPoolListener
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+_client_created_at = None
+_pool_listener = None
+
+
+class _PoolStatsListener(ConnectionPoolListener):
+    """Counts connection pool events for this worker (see pool_stats())."""
+
+    def __init__(self):
+        self._counts_lock = threading.Lock()
+        self.counts = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'checkins': 0,
+            'checkout_failures': 0,
+            'pools_cleared': 0,
+        }
+
+    def _incr(self, key):
+        with self._counts_lock:
+            self.counts[key] += 1
+
+    def snapshot(self):
+        with self._counts_lock:
+            data = dict(self.counts)
+        data['connections_open'] = data['connections_created'] - data['connections_closed']
+        data['connections_in_use'] = data['checkouts'] - data['checkins']
+        return data
+
+    def pool_created(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._incr('pools_cleared')
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._incr('connections_created')
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._incr('connections_closed')
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._incr('checkout_failures')
+
+    def connection_checked_out(self, event):
+        self._incr('checkouts')
+
+    def connection_checked_in(self, event):
+        self._incr('checkins')
+
+
+def _client_options(listener):
+    """Pool / timeout / read preference options from settings.MONGODB_*."""
+    return {
+        'maxPoolSize': settings.MONGODB_MAX_POOL_SIZE,
+        'minPoolSize': settings.MONGODB_MIN_POOL_SIZE,
+        'maxIdleTimeMS': settings.MONGODB_MAX_IDLE_TIME_MS,
+        'connectTimeoutMS': settings.MONGODB_CONNECT_TIMEOUT_MS,
+        'socketTimeoutMS': settings.MONGODB_SOCKET_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        'waitQueueTimeoutMS': settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        'readPreference': settings.MONGODB_READ_PREFERENCE,
+        'event_listeners': [listener],
+    }
+
+
+def _build_client(listener):
+    """
+    Same connection logic the views used to run per request: prefer
+    MONGODB_CONNECTION_STRING, fall back to host/port/credentials (more
+    reliable for special characters). The ping now happens once per worker.
+    """
+    options = _client_options(listener)
+
+    connection_string = os.getenv('MONGODB_CONNECTION_STRING')
+    if connection_string:
+        try:
+            client = MongoClient(connection_string, **options)
+            client.admin.command('ping')
+            return client
+        except Exception as e:
+            # Connection string might have encoding issues, use individual vars
+            logger.warning("MONGODB_CONNECTION_STRING failed (%s); using host/port settings", e)
+
+    client_config = settings.DATABASES['default']['CLIENT']
+    mongo_host = client_config.get('host', 'mongodb')
+    mongo_port = client_config.get('port', 27017)
+    credentials = {}
+    if client_config.get('username') and client_config.get('password'):
+        credentials = {
+            'username': client_config['username'],
+            'password': client_config['password'],
+            'authSource': client_config.get('authSource', 'admin'),
+            'authMechanism': client_config.get('authMechanism', 'SCRAM-SHA-1'),
+        }
+    return MongoClient(mongo_host, mongo_port, **credentials, **options)
+
+
+def get_client():
+    """Return this process's MongoClient, creating it on first use (or after fork)."""
+    global _client, _client_pid, _client_created_at, _pool_listener
+
+    pid = os.getpid()
+    client = _client
+    if client is not None and _client_pid == pid:
+        return client
+
+    with _lock:
+        if _client is not None and _client_pid == pid:
+            return _client
+        if _client is not None:
+            # Inherited from the parent across fork(): sockets are shared with
+            # the parent, so never reuse or close them here — just drop it.
+            logger.info("Discarding MongoClient inherited from pid %s in pid %s", _client_pid, pid)
+        _pool_listener = _PoolStatsListener()
+        _client = _build_client(_pool_listener)
+        _client_pid = pid
+        _client_created_at = time.time()
+        return _client
+
+
+def get_db():
+    """Return the pymongo Database handle for MONGODB_NAME."""
+    return get_client()[settings.DATABASES['default']['NAME']]
+
+
+def pool_stats():
+    """Per-worker connection pool statistics (for health checks / debugging)."""
+    if _client is None or _client_pid != os.getpid():
+        return {'pid': os.getpid(), 'initialized': False}
+    return {
+        'pid': _client_pid,
+        'initialized': True,
+        'uptime_seconds': round(time.time() - _client_created_at, 1),
+        'max_pool_size': settings.MONGODB_MAX_POOL_SIZE,
+        'read_preference': settings.MONGODB_READ_PREFERENCE,
+        **_pool_listener.snapshot(),
+    }
+
+
+def close_client():
+    """Close the pooled client (tests, management commands, worker shutdown)."""
+    global _client, _client_pid, _client_created_at, _pool_listener
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+        _client_created_at = None
+        _pool_listener = None
@@ -0,0 +1,147 @@
+"""
+Index definitions for the raw pymongo collections and an explain() check.
+
+The views write `resumes` and `blog_posts` directly through pymongo, so the
+djongo `Meta.indexes` on the models are not a guarantee that the hot
+queries are indexed. Every index below mirrors one access pattern in the
+views; ensure_indexes() is idempotent and safe to run on every deploy.
+"""
+import logging
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+# collection -> [(keys, options)]
+INDEXES = {
+    'resumes': [
+        # resume_list: find({'user_id'}) sorted newest first (keyset pages)
+        # find_one({'_id', 'user_id'}) is served by the built-in _id index.
+        ([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+         {'name': 'user_created'}),
+    ],
+    'blog_posts': [
+        # blog_post_detail / upsert on POST: find_one({'id', 'language'})
+        ([('id', ASCENDING), ('language', ASCENDING)],
+         {'name': 'slug_language'}),
+        # blog_post_list: {'language', 'published'} sorted by created_at
+        ([('language', ASCENDING), ('published', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+         {'name': 'language_published_created'}),
+        # blog_post_list: scheduled posts that are due
+        ([('language', ASCENDING), ('scheduled_publish_at', ASCENDING)],
+         {'name': 'language_scheduled'}),
+        # blog_post_list?include_drafts=true: the author's own posts
+        ([('author_id', ASCENDING), ('language', ASCENDING), ('created_at', DESCENDING)],
+         {'name': 'author_language_created'}),
+        # generate_sitemap: all published posts, newest first
+        ([('published', ASCENDING), ('created_at', DESCENDING)],
+         {'name': 'published_created'}),
+    ],
+    'pdf_jobs': [
+        # claim_next: oldest queued job; queue_depth / requeue_stale by status
+        ([('status', ASCENDING), ('created_at', ASCENDING)], {'name': 'status_created'}),
+        # Finished and abandoned jobs disappear after PDF_JOB_RESULT_TTL
+        ([('expires_at', ASCENDING)], {'name': 'expires', 'expireAfterSeconds': 0}),
+    ],
+    'email_verifications': [
+        ([('token', ASCENDING)], {'name': 'token'}),
+        ([('user_id', ASCENDING)], {'name': 'user'}),
+    ],
+    'password_resets': [
+        ([('token', ASCENDING)], {'name': 'token'}),
+        ([('user_id', ASCENDING), ('created_at', DESCENDING)], {'name': 'user_created'}),
+    ],
+}
+
+
+def _hot_queries():
+    """(label, collection, filter, sort) for the queries the views run most."""
+    now = datetime.utcnow()
+    some_id = ObjectId()
+    return [
+        ('resume_list', 'resumes', {'user_id': 0}, [('created_at', DESCENDING), ('_id', DESCENDING)]),
+        ('resume_detail', 'resumes', {'_id': some_id, 'user_id': 0}, None),
+        ('blog_post_list', 'blog_posts', {
+            'language': 'en',
+            '$or': [
+                {'published': True},
+                {'published': False, 'scheduled_publish_at': {'$lte': now}},
+            ],
+        }, [('created_at', DESCENDING)]),
+        ('blog_post_detail', 'blog_posts', {'id': 'slug', 'language': 'en'}, None),
+        ('sitemap', 'blog_posts', {
+            'published': True,
+            '$or': [
+                {'scheduled_publish_at': {'$exists': False}},
+                {'scheduled_publish_at': {'$lte': now}},
+            ],
+        }, [('created_at', DESCENDING)]),
+        ('verify_email', 'email_verifications', {'token': 'x'}, None),
+        ('reset_password', 'password_resets', {'token': 'x'}, None),
+        ('pdf_job_claim', 'pdf_jobs', {'status': 'queued'}, [('created_at', ASCENDING)]),
+    ]
+
+
+def _key_pattern(keys):
+    """Comparable key spec; index_information() reports directions as floats."""
+    return tuple((k, v if isinstance(v, str) else int(v)) for k, v in keys)
+
+
+def ensure_indexes(db, dry_run=False):
+    """
+    Create any missing index from INDEXES.
+
+    An existing index with the same key pattern (e.g. one djongo created
+    under its own name) counts as present. Returns a list of
+    (collection, name, action) with action 'created', 'exists' or 'missing'
+    (dry run).
+    """
+    report = []
+    for collection_name, specs in INDEXES.items():
+        collection = db[collection_name]
+        existing = {
+            _key_pattern(info['key']): name
+            for name, info in collection.index_information().items()
+        }
+        for keys, options in specs:
+            key_pattern = _key_pattern(keys)
+            if key_pattern in existing:
+                report.append((collection_name, existing[key_pattern], 'exists'))
+                continue
+            if dry_run:
+                report.append((collection_name, options['name'], 'missing'))
+                continue
+            name = collection.create_index(keys, background=True, **options)
+            logger.info("Created index %s.%s", collection_name, name)
+            report.append((collection_name, name, 'created'))
+    return report
+
+
+def _plan_stages(plan):
+    """Yield every 'stage' name in a (possibly nested) explain plan."""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def explain_hot_queries(db):
+    """
+    Run explain() on each hot query. Returns a list of
+    (label, collection, uses_collscan, stages).
+    """
+    results = []
+    for label, collection_name, query, sort in _hot_queries():
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        stages = list(_plan_stages(plan))
+        results.append((label, collection_name, 'COLLSCAN' in stages, stages))
+    return results
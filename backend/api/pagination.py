@@ -0,0 +1,118 @@
+"""
+Keyset (cursor) pagination for raw pymongo list views.
+
+DRF's DEFAULT_PAGINATION_CLASS only applies to generic views, so the
+resume and blog list endpoints page themselves here. Pages are ordered
+newest first on (created_at, _id) and the cursor is an opaque token that
+encodes the last row of the previous page, so every page is an index range
+scan instead of a skip over all earlier rows.
+
+Pagination is opt-in: a request without `limit` or `cursor` keeps the
+legacy plain-list response.
+"""
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from django.conf import settings
+from rest_framework.utils.urls import replace_query_param
+
+MAX_PAGE_SIZE = 100
+
+SORT = [('created_at', -1), ('_id', -1)]
+
+
+class InvalidPageParams(ValueError):
+    """Bad `limit` or `cursor` query parameter (views answer 400)."""
+
+
+def encode_cursor(doc):
+    """Opaque token pointing just past `doc` in (created_at, _id) desc order."""
+    created_at = doc.get('created_at')
+    payload = {
+        'c': created_at.isoformat() if isinstance(created_at, datetime) else None,
+        'i': str(doc['_id']),
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (created_at or None, ObjectId); InvalidPageParams if malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        created_at = payload.get('c')
+        created_at = datetime.fromisoformat(created_at) if created_at else None
+        return created_at, ObjectId(payload['i'])
+    except Exception:
+        raise InvalidPageParams('Invalid cursor')
+
+
+def keyset_filter(created_at, last_id):
+    """Mongo filter for rows strictly after (created_at, last_id) in SORT order."""
+    if created_at is None:
+        # Missing/null created_at sorts last in descending order
+        return {'created_at': None, '_id': {'$lt': last_id}}
+    return {
+        '$or': [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, '_id': {'$lt': last_id}},
+            {'created_at': None},
+        ]
+    }
+
+
+def get_page_params(request):
+    """
+    Parse `limit` / `cursor` from the query string.
+
+    Returns None when the client did not ask for pagination, else
+    (limit, after) where `after` is None for the first page.
+    """
+    params = request.query_params
+    if 'limit' not in params and 'cursor' not in params:
+        return None
+
+    limit = settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+    if params.get('limit'):
+        try:
+            limit = int(params['limit'])
+        except ValueError:
+            raise InvalidPageParams('limit must be an integer')
+        if limit < 1:
+            raise InvalidPageParams('limit must be at least 1')
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    after = decode_cursor(params['cursor']) if params.get('cursor') else None
+    return limit, after
+
+
+def fetch_page(collection, query, limit, after=None, projection=None):
+    """
+    Run `query` for one page. Returns (docs, next_cursor or None).
+
+    Fetches limit + 1 rows so the last page is detected without a count().
+    """
+    if after is not None:
+        query = {'$and': [query, keyset_filter(*after)]}
+    docs = list(collection.find(query, projection).sort(SORT).limit(limit + 1))
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    return docs, None
+
+
+def next_link(request, next_cursor):
+    """Absolute URL of the next page (same query string with cursor replaced)."""
+    if not next_cursor:
+        return None
+    return replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+
+
+def paginated_payload(request, results, next_cursor):
+    return {
+        'results': results,
+        'next': next_link(request, next_cursor),
+    }
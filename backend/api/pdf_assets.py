@@ -0,0 +1,365 @@
+"""
+Pre-render stage that makes PDF HTML self-contained.
+
+Client HTML references Google Fonts stylesheets, the app's CSS and profile
+images by URL, so `set_content(wait_until='networkidle')` used to wait on
+the network for every render. Instead:
+
+- inline_assets() replaces external stylesheets with <style> blocks and
+  external <img> sources with data URIs, taken from an on-disk asset cache
+  (PDF_ASSET_CACHE_DIR, fetched once on a miss). Font files referenced by
+  those stylesheets are fetched into the same cache;
+- the browser pool intercepts every request the page still makes:
+  local_response() serves bundled fonts from PDF_FONT_DIR (by file name) and
+  anything else from the asset cache, and everything unknown is aborted;
+- pages then wait for 'load' (PDF_WAIT_UNTIL), which with no network
+  involved is deterministic.
+
+`manage.py preload_pdf_assets` fills the cache ahead of time (the fonts the
+frontend uses), so renders need no network at all. Fetches only go to
+public hosts over http(s), connecting to the address that was checked (so
+DNS cannot be re-pointed in between), with a size limit and a short
+timeout. The HTML is posted by clients, so one render may only fetch
+PDF_ASSET_MAX_FETCHES URLs, PDF_ASSET_MAX_BYTES_PER_RENDER bytes within
+PDF_ASSET_FETCH_SECONDS (a FetchBudget); the cache is evicted least
+recently used first above PDF_ASSET_CACHE_MAX_BYTES, like api/pdf_cache.py.
+"""
+import base64
+import hashlib
+import html
+import ipaddress
+import logging
+import mimetypes
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FETCH_TIMEOUT = 5
+MAX_ASSET_BYTES = 5 * 1024 * 1024
+MAX_REDIRECTS = 3
+# Do not retry a failing URL on every render
+FAILURE_TTL = 300
+# Failed URLs remembered at most (the oldest are forgotten first)
+MAX_FAILURES = 1000
+# Evict down to this fraction of the limit so eviction does not run on every write
+_EVICT_TARGET = 0.9
+# Google Fonts serves woff2 only to browsers it recognises
+USER_AGENT = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0 Safari/537.36'
+)
+
+_LINK_RE = re.compile(r'<link\b[^>]*>', re.I)
+_STYLESHEET_RE = re.compile(r'\brel\s*=\s*["\']?stylesheet\b', re.I)
+_HREF_RE = re.compile(r'\bhref\s*=\s*(["\'])(https?://[^"\']+)\1', re.I)
+_IMG_RE = re.compile(r'(<img\b[^>]*?\bsrc\s*=\s*)(["\'])(https?://[^"\']+)\2', re.I)
+_CSS_IMPORT_RE = re.compile(r'@import\s+(?:url\(\s*)?(["\']?)([^"\')\s;]+)\1\s*\)?[^;]*;', re.I)
+_CSS_URL_RE = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)', re.I)
+_FONT_EXTENSIONS = ('.woff2', '.woff', '.ttf', '.otf')
+
+_failures = {}  # url -> monotonic time of the last failed fetch, oldest first
+_failures_lock = threading.Lock()
+_cache_lock = threading.Lock()
+_approx_bytes = None  # this process's view of the cache size; None until scanned
+
+
+class FetchBudget:
+    """Network fetches one render may still make; cache hits cost nothing."""
+
+    def __init__(self, fetches=None, max_bytes=None, seconds=None):
+        self.fetches = settings.PDF_ASSET_MAX_FETCHES if fetches is None else fetches
+        self.bytes = settings.PDF_ASSET_MAX_BYTES_PER_RENDER if max_bytes is None else max_bytes
+        seconds = settings.PDF_ASSET_FETCH_SECONDS if seconds is None else seconds
+        self.deadline = time.monotonic() + seconds
+
+    def take(self):
+        """Use up one fetch; False once fetches, bytes or time are exhausted."""
+        if self.fetches <= 0 or self.bytes <= 0 or time.monotonic() >= self.deadline:
+            return False
+        self.fetches -= 1
+        return True
+
+    def spend(self, size):
+        self.bytes -= size
+
+
+def cache_dir():
+    return Path(settings.PDF_ASSET_CACHE_DIR)
+
+
+def _cache_paths(url):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    path = cache_dir() / key[:2] / key
+    return path, path.with_name(f'{key}.type')
+
+
+def _read_cached(url):
+    path, type_path = _cache_paths(url)
+    try:
+        cached = path.read_bytes(), type_path.read_text().strip()
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return cached
+
+
+def _write_cached(url, body, content_type):
+    path, type_path = _cache_paths(url)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        type_path.write_text(content_type)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not cache PDF asset %s: %s", url, e)
+        return
+
+    global _approx_bytes
+    with _cache_lock:
+        if _approx_bytes is not None:
+            _approx_bytes += len(body)
+        over = _approx_bytes is None or _approx_bytes > settings.PDF_ASSET_CACHE_MAX_BYTES
+    if over:
+        evict()
+
+
+def evict():
+    """Delete least recently used assets until the cache is under its target size."""
+    global _approx_bytes
+    entries = []
+    total = 0
+    for shard in cache_dir().glob('??'):
+        for entry in os.scandir(shard):
+            if entry.name.endswith('.type') or entry.name.startswith('.'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    removed = 0
+    if total > settings.PDF_ASSET_CACHE_MAX_BYTES:
+        target = settings.PDF_ASSET_CACHE_MAX_BYTES * _EVICT_TARGET
+        for _, size, file_path in sorted(entries):
+            if total <= target:
+                break
+            for path in (file_path, f'{file_path}.type'):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+
+    with _cache_lock:
+        _approx_bytes = total
+    return removed
+
+
+def _public_address(host):
+    """
+    An address of `host` to connect to; ValueError unless every address is
+    public (no SSRF into the internal network).
+    """
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        infos = []
+    addresses = [info[4][0].split('%')[0] for info in infos]
+    if not addresses or not all(ipaddress.ip_address(address).is_global for address in addresses):
+        raise ValueError(f'{host} is not a public host')
+    return addresses[0]
+
+
+def _pinned_session(hostname):
+    """
+    requests session for URLs whose host was replaced by a checked address:
+    TLS still uses `hostname` for SNI and certificate verification.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    class PinnedAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs['server_hostname'] = hostname
+            kwargs['assert_hostname'] = hostname
+            super().init_poolmanager(*args, **kwargs)
+
+    session = requests.Session()
+    session.trust_env = False  # a proxy would resolve the name again
+    session.mount('https://', PinnedAdapter())
+    return session
+
+
+def _download(url, max_bytes=MAX_ASSET_BYTES, deadline=None):
+    timeout = FETCH_TIMEOUT
+    for _ in range(MAX_REDIRECTS + 1):
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            raise ValueError(f'refusing to fetch {url}')
+        address = _public_address(parsed.hostname)
+        host = f'[{address}]' if ':' in address else address
+        port = f':{parsed.port}' if parsed.port else ''
+        pinned_url = parsed._replace(netloc=f'{host}{port}').geturl()
+        if deadline is not None:
+            timeout = min(FETCH_TIMEOUT, max(deadline - time.monotonic(), 0.1))
+        with _pinned_session(parsed.hostname) as session, session.get(
+            pinned_url, stream=True, timeout=timeout, allow_redirects=False,
+            headers={'User-Agent': USER_AGENT, 'Host': f'{parsed.hostname}{port}'},
+        ) as response:
+            if response.is_redirect:
+                url = urljoin(url, response.headers['Location'])
+                continue
+            response.raise_for_status()
+            body = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                body += chunk
+                if len(body) > max_bytes:
+                    raise ValueError(f'{url} is larger than {max_bytes} bytes')
+                if deadline is not None and time.monotonic() > deadline:
+                    raise ValueError(f'{url} took too long')
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+            return bytes(body), content_type or mimetypes.guess_type(parsed.path)[0] or 'application/octet-stream'
+    raise ValueError(f'too many redirects for {url}')
+
+
+def _failed_recently(url):
+    with _failures_lock:
+        failed_at = _failures.get(url)
+    return failed_at is not None and time.monotonic() - failed_at < FAILURE_TTL
+
+
+def _record_failure(url):
+    now = time.monotonic()
+    with _failures_lock:
+        _failures.pop(url, None)
+        _failures[url] = now
+        # Insertion order is failure order: expired and excess entries are at the front
+        for old_url, failed_at in list(_failures.items()):
+            if now - failed_at < FAILURE_TTL and len(_failures) <= MAX_FAILURES:
+                break
+            del _failures[old_url]
+
+
+def fetch(url, budget=None):
+    """
+    (body, content_type) for `url` from the asset cache, fetching it on a
+    miss while `budget` (a FetchBudget, None = unlimited) allows; None if
+    unavailable.
+    """
+    cached = _read_cached(url)
+    if cached is not None or not settings.PDF_ASSET_FETCH or _failed_recently(url):
+        return cached
+    if budget is not None and not budget.take():
+        logger.info("PDF asset %s not fetched: fetch budget of this render used up", url)
+        return None
+    try:
+        if budget is None:
+            body, content_type = _download(url)
+        else:
+            body, content_type = _download(url, min(MAX_ASSET_BYTES, budget.bytes), budget.deadline)
+    except Exception as e:
+        logger.info("PDF asset %s unavailable: %s", url, e)
+        _record_failure(url)
+        return None
+    if budget is not None:
+        budget.spend(len(body))
+    _write_cached(url, body, content_type)
+    return body, content_type
+
+
+def _bundled_font_path(url):
+    name = os.path.basename(urlparse(url).path)
+    if not name.lower().endswith(_FONT_EXTENSIONS) or not settings.PDF_FONT_DIR:
+        return None
+    path = Path(settings.PDF_FONT_DIR) / name
+    return path if path.is_file() else None
+
+
+def local_response(url):
+    """(body, content_type) for a request made by a rendering page, without touching the network."""
+    if not url.startswith(('http://', 'https://')):
+        return None
+    font_path = _bundled_font_path(url)
+    if font_path is not None:
+        return font_path.read_bytes(), mimetypes.guess_type(font_path.name)[0] or f'font/{font_path.suffix[1:]}'
+    return _read_cached(url)
+
+
+def _data_uri(body, content_type):
+    return f'data:{content_type};base64,{base64.b64encode(body).decode("ascii")}'
+
+
+def _resolve_css(css, base_url, budget, depth=0):
+    """Inline @imports and absolutize url()s; fonts are fetched into the cache for routing."""
+    def replace_import(match):
+        url = urljoin(base_url, match.group(2))
+        fetched = fetch(url, budget) if depth < 2 else None
+        if fetched is None:
+            return ''
+        return _resolve_css(fetched[0].decode('utf-8', 'replace'), url, budget, depth + 1)
+
+    def replace_url(match):
+        reference = match.group(2).strip()
+        if reference.startswith(('data:', '#')):
+            return match.group(0)
+        url = urljoin(base_url, reference)
+        # Make sure the page's request for it can be answered locally
+        if _bundled_font_path(url) is None and not _cache_paths(url)[0].exists():
+            fetch(url, budget)
+        return f'url("{url}")'
+
+    return _CSS_URL_RE.sub(replace_url, _CSS_IMPORT_RE.sub(replace_import, css))
+
+
+def inline_stylesheet(body, url, budget=None):
+    """Stylesheet `body` fetched from `url` with its imports inlined and its fonts cached."""
+    return _resolve_css(body.decode('utf-8', 'replace'), url, budget)
+
+
+def inline_assets(html_content, budget=None):
+    """
+    HTML with external stylesheets and images inlined from the asset cache.
+    Stylesheets that cannot be resolved are dropped; images are left for the
+    page's request interception (which aborts them if they are not cached).
+    Misses are fetched within `budget` (default: a new FetchBudget).
+    """
+    if budget is None:
+        budget = FetchBudget()
+
+    def replace_link(match):
+        tag = match.group(0)
+        href = _HREF_RE.search(tag)
+        if not href or not _STYLESHEET_RE.search(tag):
+            return tag
+        url = html.unescape(href.group(2))
+        fetched = fetch(url, budget)
+        if fetched is None:
+            return ''
+        css = inline_stylesheet(fetched[0], url, budget)
+        # A stylesheet cannot close the <style> element it is inlined into
+        return '<style>' + css.replace('</style', '<\\/style') + '</style>'
+
+    def replace_img(match):
+        fetched = fetch(html.unescape(match.group(3)), budget)
+        if fetched is None or not fetched[1].startswith('image/'):
+            return match.group(0)
+        return f'{match.group(1)}{match.group(2)}{_data_uri(*fetched)}{match.group(2)}'
+
+    return _IMG_RE.sub(replace_img, _LINK_RE.sub(replace_link, html_content))
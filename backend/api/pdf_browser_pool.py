@@ -0,0 +1,387 @@
+"""
+Long-lived headless Chromium for PDF rendering.
+
+Launching Chromium per request dominated PDF latency, so each gunicorn
+worker keeps one browser alive on a background asyncio thread and renders
+on a small set of reusable pages:
+
+- at most PDF_POOL_SIZE renders run at once per worker; callers wait up to
+  PDF_POOL_ACQUIRE_TIMEOUT seconds for a slot, then get BrowserPoolBusy
+  (views answer 503 + Retry-After instead of piling up requests);
+- the browser is replaced after PDF_BROWSER_MAX_RENDERS renders (memory
+  creep) or as soon as it disconnects/crashes; a page that failed a render
+  is closed rather than reused;
+- with PDF_OFFLINE_RENDER, HTML is made self-contained first and pages
+  never touch the network (api/pdf_assets.py), so they wait for 'load'
+  (PDF_WAIT_UNTIL) instead of 'networkidle';
+- a PDF over PDF_MAX_PAGES pages or PDF_MAX_BYTES bytes is rejected with
+  PdfLimitExceeded (Chromium prints at most one page past the limit, so a
+  runaway document costs no more than a legitimate one);
+- stats() reports launches, recycles, crashes and slot usage for /health/.
+
+Playwright objects belong to the event loop that created them, so request
+threads submit renders to the pool's loop and wait on the result; async
+views (render_async_pdf) await it without holding a thread.
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import os
+import re
+import threading
+import time
+
+from django.conf import settings
+
+from . import pdf_assets, pdf_metrics
+
+logger = logging.getLogger(__name__)
+
+PDF_OPTIONS = {
+    'format': 'A4',
+    # Zero margins: padding is handled in CSS (@page rules and margin boxes)
+    'margin': {'top': '0mm', 'right': '0mm', 'bottom': '0mm', 'left': '0mm'},
+    'print_background': True,
+    'prefer_css_page_size': True,
+}
+
+
+# Seconds between slot checks in render_async()
+_ASYNC_SLOT_POLL = 0.02
+
+# Page objects of a Chromium PDF (its page tree is never in compressed object streams)
+_PAGE_RE = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+
+
+class BrowserPoolBusy(Exception):
+    """All render slots stayed busy for PDF_POOL_ACQUIRE_TIMEOUT seconds."""
+
+
+class PdfLimitExceeded(Exception):
+    """The rendered PDF has more than PDF_MAX_PAGES pages or PDF_MAX_BYTES bytes."""
+
+
+def count_pages(pdf_bytes):
+    return len(_PAGE_RE.findall(pdf_bytes))
+
+
+def check_limits(pdf_bytes, max_pages=None, max_bytes=None):
+    """Raise PdfLimitExceeded if pdf_bytes breaks a limit (0/None = unlimited)."""
+    if max_bytes and len(pdf_bytes) > max_bytes:
+        raise PdfLimitExceeded(f'PDF is larger than {max_bytes} bytes')
+    if max_pages and count_pages(pdf_bytes) > max_pages:
+        raise PdfLimitExceeded(f'PDF has more than {max_pages} pages')
+
+
+class BrowserPool:
+
+    def __init__(self, size, max_renders):
+        self.size = size
+        self.max_renders = max_renders
+        self._slots = threading.BoundedSemaphore(size)
+        self._counter_lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='pdf-browser-pool', daemon=True)
+        self._thread.start()
+
+        # Only touched on the pool's event loop
+        self._playwright = None
+        self._browser = None
+        self._browser_renders = 0
+        self._launch_lock = None
+        self._idle_pages = []
+        self._in_flight = {}  # id(browser) -> renders using it
+
+        self._stats = {
+            'launches': 0,
+            'recycles': 0,
+            'crashes': 0,
+            'renders': 0,
+            'failures': 0,
+            'busy_rejections': 0,
+            'limit_rejections': 0,
+        }
+        self._active = 0
+
+    # -- request threads -------------------------------------------------
+
+    def render(self, html_content, acquire_timeout=None, render_timeout=None, timings=None):
+        """
+        Render HTML to PDF bytes; raises BrowserPoolBusy when saturated and
+        PdfLimitExceeded when the PDF breaks PDF_MAX_PAGES / PDF_MAX_BYTES.
+        Stage durations go to `timings` (api/pdf_metrics.py), which the
+        caller finishes; without one the pool records its own.
+        """
+        if acquire_timeout is None:
+            acquire_timeout = settings.PDF_POOL_ACQUIRE_TIMEOUT
+        if render_timeout is None:
+            render_timeout = settings.PDF_RENDER_TIMEOUT
+        own_timings = timings is None
+        if own_timings:
+            timings = pdf_metrics.RenderTimings()
+        try:
+            if settings.PDF_OFFLINE_RENDER:
+                with timings.stage('assets'):
+                    html_content = pdf_assets.inline_assets(html_content)
+            with timings.stage('acquire'):
+                acquired = self._slots.acquire(timeout=acquire_timeout)
+            if not acquired:
+                self._reject_busy()
+            self._enter()
+            try:
+                future = self._submit(html_content, timings)
+                try:
+                    pdf_bytes = future.result(timeout=render_timeout)
+                except concurrent.futures.TimeoutError:
+                    future.cancel()
+                    self._timed_out(render_timeout)
+                return self._checked(pdf_bytes, timings)
+            finally:
+                self._exit()
+        finally:
+            if own_timings:
+                timings.finish()
+
+    async def render_async(self, html_content, acquire_timeout=None, render_timeout=None, timings=None):
+        """
+        render() for coroutines (async views under ASGI): waiting for a slot
+        and for Chromium suspends the caller instead of blocking a thread, so
+        one event loop can carry many concurrent exports.
+        """
+        if acquire_timeout is None:
+            acquire_timeout = settings.PDF_POOL_ACQUIRE_TIMEOUT
+        if render_timeout is None:
+            render_timeout = settings.PDF_RENDER_TIMEOUT
+        own_timings = timings is None
+        if own_timings:
+            timings = pdf_metrics.RenderTimings()
+        try:
+            if settings.PDF_OFFLINE_RENDER:
+                with timings.stage('assets'):
+                    # Cache reads and the odd fetch are blocking I/O
+                    html_content = await asyncio.get_running_loop().run_in_executor(
+                        None, pdf_assets.inline_assets, html_content)
+            # The slots are a threading semaphore shared with render(); poll it without blocking
+            with timings.stage('acquire'):
+                deadline = time.monotonic() + acquire_timeout
+                while not self._slots.acquire(blocking=False):
+                    if time.monotonic() >= deadline:
+                        self._reject_busy()
+                    await asyncio.sleep(_ASYNC_SLOT_POLL)
+            self._enter()
+            try:
+                future = self._submit(html_content, timings)
+                try:
+                    pdf_bytes = await asyncio.wait_for(asyncio.wrap_future(future), render_timeout)
+                except asyncio.TimeoutError:
+                    self._timed_out(render_timeout)
+                return self._checked(pdf_bytes, timings)
+            finally:
+                self._exit()
+        finally:
+            if own_timings:
+                timings.finish()
+
+    def _submit(self, html_content, timings):
+        return asyncio.run_coroutine_threadsafe(
+            self._render(html_content, settings.PDF_MAX_PAGES, timings), self._loop)
+
+    @staticmethod
+    def _timed_out(render_timeout):
+        pdf_metrics.count('timeouts')
+        raise TimeoutError(f'PDF render exceeded {render_timeout}s')
+
+    def _reject_busy(self):
+        with self._counter_lock:
+            self._stats['busy_rejections'] += 1
+        pdf_metrics.count('busy')
+        raise BrowserPoolBusy()
+
+    def _enter(self):
+        with self._counter_lock:
+            self._active += 1
+
+    def _exit(self):
+        with self._counter_lock:
+            self._active -= 1
+        self._slots.release()
+
+    def _checked(self, pdf_bytes, timings):
+        try:
+            with timings.stage('limits'):
+                check_limits(pdf_bytes, settings.PDF_MAX_PAGES, settings.PDF_MAX_BYTES)
+        except PdfLimitExceeded:
+            with self._counter_lock:
+                self._stats['limit_rejections'] += 1
+            pdf_metrics.count('limit_exceeded')
+            raise
+        return pdf_bytes
+
+    def stats(self):
+        with self._counter_lock:
+            data = dict(self._stats)
+        data.update({
+            'size': self.size,
+            'active': self._active,
+            'idle_pages': len(self._idle_pages),
+            'browser_connected': bool(self._browser and self._browser.is_connected()),
+            'browser_renders': self._browser_renders,
+        })
+        return data
+
+    def close(self, timeout=5):
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout)
+        except Exception as e:
+            logger.debug("PDF browser pool shutdown: %s", e)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # -- event loop ------------------------------------------------------
+
+    async def _render(self, html_content, max_pages=None, timings=None):
+        timings = timings or pdf_metrics.RenderTimings()
+        with timings.stage('page'):
+            page, browser = await self._checkout(timings)
+        ok = False
+        try:
+            with timings.stage('set_content'):
+                await page.set_content(html_content, wait_until=settings.PDF_WAIT_UNTIL)
+            options = dict(PDF_OPTIONS)
+            if max_pages:
+                # Enough to tell "too long" apart without printing all of it
+                options['page_ranges'] = f'1-{max_pages + 1}'
+            with timings.stage('pdf'):
+                pdf_bytes = await page.pdf(**options)
+            ok = True
+            return pdf_bytes
+        finally:
+            with self._counter_lock:
+                self._stats['renders' if ok else 'failures'] += 1
+            pdf_metrics.count('renders' if ok else 'failures')
+            await self._checkin(page, browser, ok)
+
+    async def _ensure_browser(self, timings=None):
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._browser is not None:
+                self._stats['crashes'] += 1
+                logger.warning("PDF browser disconnected; relaunching")
+                self._retire(self._browser)
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+            started = time.perf_counter()
+            self._browser = await self._playwright.chromium.launch()
+            if timings is not None:
+                timings.add('launch', time.perf_counter() - started)
+            self._browser_renders = 0
+            self._idle_pages = []
+            self._stats['launches'] += 1
+            return self._browser
+
+    async def _checkout(self, timings=None):
+        browser = await self._ensure_browser(timings)
+        page = None
+        while self._idle_pages and page is None:
+            candidate = self._idle_pages.pop()
+            if not candidate.is_closed():
+                page = candidate
+        if page is None:
+            page = await browser.new_page()
+            # Match browser PDF output: layout uses print CSS
+            await page.emulate_media(media='print')
+            if settings.PDF_OFFLINE_RENDER:
+                await page.route('**/*', self._route)
+        self._in_flight[id(browser)] = self._in_flight.get(id(browser), 0) + 1
+        return page, browser
+
+    async def _checkin(self, page, browser, ok):
+        self._in_flight[id(browser)] -= 1
+        current = browser is self._browser
+        if ok and current and not page.is_closed() and browser.is_connected():
+            self._idle_pages.append(page)
+        else:
+            await self._close_quietly(page)
+
+        if current:
+            self._browser_renders += 1
+            if self._browser_renders >= self.max_renders:
+                self._stats['recycles'] += 1
+                self._browser = None
+                self._idle_pages = []
+                self._retire(browser)
+        elif self._in_flight.get(id(browser)) == 0:
+            await self._close_browser(browser)
+
+    @staticmethod
+    async def _route(route):
+        """Serve page requests from bundled fonts / the asset cache; never the network."""
+        local = pdf_assets.local_response(route.request.url)
+        if local is None:
+            await route.abort()
+            return
+        body, content_type = local
+        # The page's origin is about:blank; fonts need CORS to load
+        await route.fulfill(status=200, body=body, content_type=content_type,
+                            headers={'Access-Control-Allow-Origin': '*'})
+
+    def _retire(self, browser):
+        """Close a replaced browser once no render still uses it."""
+        if not self._in_flight.get(id(browser)):
+            self._loop.create_task(self._close_browser(browser))
+
+    async def _close_browser(self, browser):
+        self._in_flight.pop(id(browser), None)
+        await self._close_quietly(browser)
+
+    @staticmethod
+    async def _close_quietly(target):
+        try:
+            await target.close()
+        except Exception:
+            pass
+
+    async def _shutdown(self):
+        if self._browser is not None:
+            await self._close_quietly(self._browser)
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """This process's pool (a fresh one after fork)."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = BrowserPool(settings.PDF_POOL_SIZE, settings.PDF_BROWSER_MAX_RENDERS)
+            _pool_pid = pid
+            atexit.register(_pool.close)
+    return _pool
+
+
+def render_pdf(html_content, acquire_timeout=None, timings=None):
+    return get_pool().render(html_content, acquire_timeout=acquire_timeout, timings=timings)
+
+
+async def render_async_pdf(html_content, acquire_timeout=None, timings=None):
+    return await get_pool().render_async(html_content, acquire_timeout=acquire_timeout, timings=timings)
+
+
+def pool_stats():
+    if _pool is None or _pool_pid != os.getpid():
+        return {'started': False}
+    return dict(_pool.stats(), started=True)
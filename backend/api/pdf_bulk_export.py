@@ -0,0 +1,138 @@
+"""
+Bulk PDF export: many resumes into one zip archive.
+
+Used by `manage.py export_resume_pdfs` and by the admin export jobs that the
+render worker runs (api/pdf_jobs.py). Resumes stream from a Mongo cursor,
+render concurrently on one shared BrowserPool (server-side HTML from
+api/resume_html.py, reusing api/pdf_cache.py) and each PDF is appended to
+the zip as soon as it is done, so memory stays bounded by the number of
+renders in flight rather than the size of the export.
+"""
+import concurrent.futures
+import logging
+import os
+import re
+import time
+import zipfile
+
+from bson import ObjectId
+from django.conf import settings
+
+from . import pdf_cache, resume_html, resume_repository
+
+logger = logging.getLogger(__name__)
+
+# Documents per cursor batch
+BATCH_SIZE = 50
+# Seconds between progress callbacks
+PROGRESS_INTERVAL = 2.0
+
+
+def parse_resume_ids(values):
+    """ObjectIds from strings; ValueError naming the first invalid id."""
+    resume_ids = []
+    for value in values or ():
+        try:
+            resume_ids.append(ObjectId(value))
+        except Exception:
+            raise ValueError(f"Invalid resume ID '{value}'")
+    return resume_ids
+
+
+def _entry_name(resume_doc):
+    name = re.sub(r'[^A-Za-z0-9._-]+', '-', str(resume_doc.get('name') or 'resume')).strip('-.')
+    return f"{resume_doc.get('user_id')}/{resume_doc['_id']}-{name[:60] or 'resume'}.pdf"
+
+
+def _render(pool, resume_doc, template, language):
+    template = resume_html.resolve_template(resume_doc, template)
+    key = pdf_cache.resume_cache_key(resume_doc, template, language)
+    cached_file = pdf_cache.open_cached(key)
+    if cached_file is not None:
+        with cached_file:
+            return cached_file.read()
+    html_content = resume_html.render_resume_html(resume_doc, template, language)
+    # Wait for a slot rather than failing the resume when the pool is shared
+    pdf_bytes = pool.render(html_content, acquire_timeout=settings.PDF_RENDER_TIMEOUT)
+    pdf_cache.store(key, pdf_bytes)
+    return pdf_bytes
+
+
+def export_zip(fileobj, pool, user_ids=(), resume_ids=(), template=None, language='en',
+               concurrency=None, progress=None):
+    """
+    Write the PDFs of all resumes of `user_ids` plus `resume_ids` into a zip
+    written to `fileobj`. `template` overrides each resume's own template.
+    `progress(stats)` is called every few seconds and once at the end.
+    Resumes that fail to render are listed in errors.txt inside the archive.
+    Returns the final stats dict.
+    """
+    concurrency = concurrency or pool.size
+    query = resume_repository.export_query(user_ids, resume_ids)
+    stats = {
+        'total': resume_repository.resumes_collection().count_documents(query),
+        'exported': 0,
+        'failed': 0,
+        'bytes': 0,
+        'elapsed': 0.0,
+        'per_second': 0.0,
+    }
+    errors = []
+    started = time.monotonic()
+    last_report = [started]
+
+    def report():
+        last_report[0] = time.monotonic()
+        stats['elapsed'] = round(time.monotonic() - started, 2)
+        stats['per_second'] = round(stats['exported'] / stats['elapsed'], 2) if stats['elapsed'] else 0.0
+        if progress is not None:
+            progress(dict(stats))
+
+    def collect(done, archive):
+        for future in done:
+            resume_doc = pending.pop(future)
+            try:
+                pdf_bytes = future.result()
+            except Exception as e:
+                stats['failed'] += 1
+                errors.append(f"{resume_doc['_id']}: {e}")
+                logger.warning("Bulk export of resume %s failed: %s", resume_doc['_id'], e)
+                continue
+            # PDFs are already compressed; storing them avoids burning CPU for nothing
+            archive.writestr(_entry_name(resume_doc), pdf_bytes)
+            stats['exported'] += 1
+            stats['bytes'] += len(pdf_bytes)
+        if time.monotonic() - last_report[0] >= PROGRESS_INTERVAL:
+            report()
+
+    pending = {}
+    cursor = resume_repository.find_for_export(query, batch_size=BATCH_SIZE)
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_STORED) as archive, \
+            concurrent.futures.ThreadPoolExecutor(concurrency, thread_name_prefix='pdf-export') as executor:
+        for resume_doc in cursor:
+            # Keep at most two renders per slot queued so the cursor, not memory, is the buffer
+            while len(pending) >= concurrency * 2:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                collect(done, archive)
+            pending[executor.submit(_render, pool, resume_doc, template, language)] = resume_doc
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            collect(done, archive)
+        if errors:
+            archive.writestr('errors.txt', '\n'.join(errors) + '\n')
+
+    report()
+    return stats
+
+
+def write_export(path, pool, **kwargs):
+    """export_zip() into `path`, which only appears once the archive is complete."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            stats = export_zip(f, pool, **kwargs)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return stats
@@ -0,0 +1,151 @@
+"""
+Content-addressed on-disk cache of rendered resume PDFs.
+
+Users export the same unchanged resume over and over. The PDF depends only
+on the decoded HTML and the render options, so its SHA-256 is the cache
+key: a repeat export costs a hash and a file read instead of a Chromium
+render. Files live under PDF_CACHE_DIR (on the shared media volume, so all
+gunicorn workers and the render worker share them) and are evicted least
+recently used first once the directory exceeds PDF_CACHE_MAX_BYTES; a hit
+refreshes the file's mtime.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+from . import pdf_metrics
+from .etags import resume_etag
+from .pdf_browser_pool import PDF_OPTIONS
+from .resume_html import TEMPLATE_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Bump when rendering changes in a way the options don't capture (e.g. Chromium upgrade)
+CACHE_VERSION = 1
+# Evict down to this fraction of the limit so eviction does not run on every write
+_EVICT_TARGET = 0.9
+
+_RENDER_SETTINGS = json.dumps(
+    {'version': CACHE_VERSION, 'media': 'print', 'pdf': PDF_OPTIONS},
+    sort_keys=True,
+).encode()
+
+_lock = threading.Lock()
+_approx_bytes = None  # this process's view of the cache size; None until scanned
+
+
+def cache_dir():
+    return Path(settings.PDF_CACHE_DIR)
+
+
+def cache_key(html_content):
+    digest = hashlib.sha256(_RENDER_SETTINGS)
+    digest.update(b'\0')
+    digest.update(html_content.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def resume_cache_key(resume_doc, template, language):
+    """
+    Key for a server-side rendered export (api/resume_html.py). The stored
+    resume only changes with its ETag (_id + updated_at), so the HTML does not
+    have to be rendered to find a cached PDF.
+    """
+    digest = hashlib.sha256(_RENDER_SETTINGS)
+    digest.update(f'\0resume:{resume_etag(resume_doc)}:{template}:{language}:{TEMPLATE_VERSION}'.encode())
+    return digest.hexdigest()
+
+
+def _path(key):
+    return cache_dir() / key[:2] / f'{key}.pdf'
+
+
+def open_cached(key):
+    """Open the cached PDF for `key` for reading, or return None on a miss."""
+    if not settings.PDF_CACHE_ENABLED:
+        return None
+    path = _path(key)
+    try:
+        pdf_file = open(path, 'rb')
+    except FileNotFoundError:
+        pdf_metrics.count('cache_misses')
+        return None
+    pdf_metrics.count('cache_hits')
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return pdf_file
+
+
+def store(key, pdf_bytes):
+    """Write a rendered PDF into the cache (atomically) and evict if needed."""
+    global _approx_bytes
+    if not settings.PDF_CACHE_ENABLED:
+        return
+    path = _path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not cache PDF %s: %s", key, e)
+        return
+
+    with _lock:
+        if _approx_bytes is not None:
+            _approx_bytes += len(pdf_bytes)
+        over = _approx_bytes is None or _approx_bytes > settings.PDF_CACHE_MAX_BYTES
+    if over:
+        evict()
+
+
+def evict():
+    """Delete least recently used PDFs until the cache is under its target size."""
+    global _approx_bytes
+    entries = []
+    total = 0
+    for shard in cache_dir().glob('??'):
+        for entry in os.scandir(shard):
+            if not entry.name.endswith('.pdf'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    removed = 0
+    if total > settings.PDF_CACHE_MAX_BYTES:
+        target = settings.PDF_CACHE_MAX_BYTES * _EVICT_TARGET
+        for _, size, file_path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(file_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+    with _lock:
+        _approx_bytes = total
+    return removed
+
+
+def stats():
+    with _lock:
+        return {
+            'enabled': settings.PDF_CACHE_ENABLED,
+            'approx_bytes': _approx_bytes,
+            'max_bytes': settings.PDF_CACHE_MAX_BYTES,
+        }
@@ -0,0 +1,302 @@
+"""
+PDF render jobs, queued in MongoDB and executed by `manage.py pdf_worker`.
+
+Rendering inline ties up a gunicorn worker for as long as Chromium takes.
+With PDF_JOBS_ENABLED the API only enqueues a job in the `pdf_jobs`
+collection (shared by all API workers) and returns its id. A separate
+render-worker process claims jobs atomically, writes the PDF to the media
+volume and marks the job done; clients poll the status and download the
+result. When the queue is idle the API still renders inline (fast path).
+
+Job lifecycle: queued -> running -> done | failed. Running jobs whose worker
+stopped updating them are re-queued after PDF_JOB_STALE_SECONDS; job
+documents expire via a TTL index on `expires_at` and the worker deletes
+their files.
+
+Bulk exports (kind 'export', api/pdf_bulk_export.py) share the queue: the
+worker writes a zip instead of a PDF and reports progress on the job.
+Thumbnail jobs (kind 'thumbnails', api/pdf_thumbnails.py) are queued when a
+resume is saved; a burst of saves collapses into one queued job.
+"""
+import logging
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from bson import ObjectId
+from django.conf import settings
+from django.urls import reverse
+from pymongo import ASCENDING, ReturnDocument
+
+from .mongo import get_db
+from .views.utils import utcnow_ms
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Job kinds; plain render jobs have no 'kind' field
+EXPORT = 'export'
+THUMBNAILS = 'thumbnails'
+
+MAX_ATTEMPTS = 3
+
+# Everything except the (potentially large) HTML input
+STATUS_PROJECTION = {'html': 0}
+
+
+def jobs_collection():
+    return get_db()['pdf_jobs']
+
+
+def results_dir():
+    return Path(settings.PDF_JOB_RESULTS_DIR)
+
+
+def ensure_results_dir():
+    """
+    Create the results directory readable by this user only: it sits on the
+    media volume, and nginx must never serve other users' PDFs from there
+    (it also 404s /media/pdf-*; results are only served by the job views).
+    """
+    directory = results_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    os.chmod(directory, 0o700)
+    return directory
+
+
+def result_path(job_id):
+    return results_dir() / f'{job_id}.pdf'
+
+
+def export_path(job_id):
+    return results_dir() / f'{job_id}.zip'
+
+
+def queue_depth():
+    """Render jobs waiting or rendering, across all workers (background kinds excluded)."""
+    return jobs_collection().count_documents({'status': {'$in': [QUEUED, RUNNING]}, 'kind': {'$exists': False}})
+
+
+def submit(user_id, resume_id, html_content, cache_key=None):
+    """
+    Queue a render; returns the job document (without html). `cache_key`
+    is where the worker stores the PDF in api.pdf_cache (default: HTML hash).
+    """
+    now = utcnow_ms()
+    job = {
+        'user_id': user_id,
+        'resume_id': str(resume_id),
+        'status': QUEUED,
+        'html': html_content,
+        'cache_key': cache_key,
+        'attempts': 0,
+        'created_at': now,
+        'updated_at': now,
+        'expires_at': now + timedelta(seconds=settings.PDF_JOB_RESULT_TTL),
+    }
+    jobs_collection().insert_one(job)
+    job.pop('html')
+    return job
+
+
+def submit_export(user_id, user_ids, resume_ids, template=None, language='en'):
+    """Queue a bulk export (requested by admin user_id); returns the job document."""
+    now = utcnow_ms()
+    job = {
+        'kind': EXPORT,
+        'user_id': user_id,
+        'resume_id': None,
+        'status': QUEUED,
+        'params': {
+            'user_ids': list(user_ids),
+            'resume_ids': [str(resume_id) for resume_id in resume_ids],
+            'template': template,
+            'language': language,
+        },
+        'progress': None,
+        'attempts': 0,
+        'created_at': now,
+        'updated_at': now,
+        'expires_at': now + timedelta(seconds=settings.PDF_JOB_RESULT_TTL),
+    }
+    jobs_collection().insert_one(job)
+    return job
+
+
+def submit_thumbnails(user_id, resume_id):
+    """Queue thumbnail generation for a resume unless one is already queued."""
+    now = utcnow_ms()
+    jobs_collection().update_one(
+        {'kind': THUMBNAILS, 'resume_id': str(resume_id), 'status': QUEUED},
+        {'$setOnInsert': {
+            'user_id': user_id,
+            'attempts': 0,
+            'created_at': now,
+            'updated_at': now,
+            'expires_at': now + timedelta(seconds=settings.PDF_JOB_RESULT_TTL),
+        }},
+        upsert=True,
+    )
+
+
+def complete_thumbnails(job_id, pages):
+    now = utcnow_ms()
+    jobs_collection().update_one(
+        {'_id': job_id},
+        {'$set': {'status': DONE, 'pages': pages, 'finished_at': now, 'updated_at': now}},
+    )
+
+
+def find_export(job_id):
+    try:
+        job_object_id = ObjectId(job_id)
+    except Exception:
+        return None
+    return jobs_collection().find_one({'_id': job_object_id, 'kind': EXPORT})
+
+
+def report_progress(job_id, progress):
+    """Store export progress; also the heartbeat that keeps a long job from looking stale."""
+    jobs_collection().update_one(
+        {'_id': job_id, 'status': RUNNING},
+        {'$set': {'progress': progress, 'updated_at': utcnow_ms()}},
+    )
+
+
+def complete_export(job_id, progress):
+    now = utcnow_ms()
+    jobs_collection().update_one(
+        {'_id': job_id},
+        {'$set': {'status': DONE, 'progress': progress, 'size': progress['bytes'],
+                  'finished_at': now, 'updated_at': now}},
+    )
+
+
+def find_for_user(job_id, user_id, resume_id):
+    try:
+        job_object_id = ObjectId(job_id)
+    except Exception:
+        return None
+    return jobs_collection().find_one(
+        {'_id': job_object_id, 'user_id': user_id, 'resume_id': str(resume_id), 'kind': {'$exists': False}},
+        STATUS_PROJECTION,
+    )
+
+
+def claim_next(worker_name):
+    """Atomically move the oldest queued job to running; None if the queue is empty."""
+    now = utcnow_ms()
+    return jobs_collection().find_one_and_update(
+        {'status': QUEUED},
+        {
+            '$set': {'status': RUNNING, 'worker': worker_name, 'started_at': now, 'updated_at': now},
+            '$inc': {'attempts': 1},
+        },
+        sort=[('created_at', ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def complete(job_id, pdf_bytes):
+    """Write the result file atomically, then mark the job done."""
+    directory = ensure_results_dir()
+    tmp_path = directory / f'.{job_id}.tmp'
+    tmp_path.write_bytes(pdf_bytes)
+    os.replace(tmp_path, result_path(job_id))
+    now = utcnow_ms()
+    jobs_collection().update_one(
+        {'_id': job_id},
+        {
+            '$set': {'status': DONE, 'size': len(pdf_bytes), 'finished_at': now, 'updated_at': now},
+            '$unset': {'html': ''},
+        },
+    )
+
+
+def fail(job, error, retry=True):
+    """Re-queue a job that has attempts left (and may succeed), otherwise mark it failed."""
+    now = utcnow_ms()
+    if retry and job.get('attempts', 0) < MAX_ATTEMPTS:
+        update = {'$set': {'status': QUEUED, 'error': str(error), 'updated_at': now}}
+    else:
+        update = {
+            '$set': {'status': FAILED, 'error': str(error), 'finished_at': now, 'updated_at': now},
+            '$unset': {'html': ''},
+        }
+    jobs_collection().update_one({'_id': job['_id'], 'status': RUNNING}, update)
+
+
+def requeue_stale():
+    """Put back jobs whose worker stopped without finishing them."""
+    cutoff = utcnow_ms() - timedelta(seconds=settings.PDF_JOB_STALE_SECONDS)
+    result = jobs_collection().update_many(
+        {'status': RUNNING, 'updated_at': {'$lt': cutoff}, 'attempts': {'$lt': MAX_ATTEMPTS}},
+        {'$set': {'status': QUEUED, 'updated_at': utcnow_ms()}},
+    )
+    jobs_collection().update_many(
+        {'status': RUNNING, 'updated_at': {'$lt': cutoff}},
+        {'$set': {'status': FAILED, 'error': 'Render worker stopped', 'updated_at': utcnow_ms()},
+         '$unset': {'html': ''}},
+    )
+    return result.modified_count
+
+
+def remove_expired_results():
+    """Delete result files older than PDF_JOB_RESULT_TTL (their jobs are gone)."""
+    if not results_dir().exists():
+        return 0
+    cutoff = time.time() - settings.PDF_JOB_RESULT_TTL
+    removed = 0
+    for path in results_dir().iterdir():
+        if path.suffix in ('.pdf', '.zip') and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def job_payload(job, request=None):
+    """API representation of a job."""
+    job_id = str(job['_id'])
+    payload = {
+        'job_id': job_id,
+        'resume_id': job['resume_id'],
+        'status': job['status'],
+        'created_at': job['created_at'].isoformat(),
+        'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None,
+        'error': job.get('error') if job['status'] == FAILED else None,
+    }
+    if request is not None:
+        kwargs = {'resume_id': job['resume_id'], 'job_id': job_id}
+        payload['status_url'] = request.build_absolute_uri(reverse('api:resume-pdf-job', kwargs=kwargs))
+        payload['result_url'] = (
+            request.build_absolute_uri(reverse('api:resume-pdf-job-result', kwargs=kwargs))
+            if job['status'] == DONE else None
+        )
+    return payload
+
+
+def export_payload(job, request=None):
+    """API representation of a bulk export job."""
+    job_id = str(job['_id'])
+    payload = {
+        'job_id': job_id,
+        'status': job['status'],
+        'params': job['params'],
+        'progress': job.get('progress'),
+        'created_at': job['created_at'].isoformat(),
+        'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None,
+        'error': job.get('error') if job['status'] == FAILED else None,
+    }
+    if request is not None:
+        kwargs = {'job_id': job_id}
+        payload['status_url'] = request.build_absolute_uri(reverse('api:pdf-export', kwargs=kwargs))
+        payload['result_url'] = (
+            request.build_absolute_uri(reverse('api:pdf-export-result', kwargs=kwargs))
+            if job['status'] == DONE else None
+        )
+    return payload
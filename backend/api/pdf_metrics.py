@@ -0,0 +1,258 @@
+"""
+Per-stage timings of the PDF pipeline.
+
+A RenderTimings follows one export through its stages (request decoding,
+cache lookup, HTML rendering, asset inlining, waiting for a slot, page
+checkout - which includes the browser launch when one happens, also
+reported on its own - set_content, page.pdf, limit checks, cache store and,
+for thumbnails, rasterization). finish() adds the durations to this
+process's histograms and the views echo them in a Server-Timing header, so
+a single slow export can be read in the browser's network panel while the
+histograms show where time goes overall.
+
+Each process keeps its own registry (summarised in /health/) and a
+background thread adds what it recorded since the last flush to a shared
+`pdf_metrics` document in Mongo every PDF_METRICS_FLUSH_SECONDS, one
+document per source: `api` (all gunicorn workers) and `worker` (the render
+worker, see set_source(); it also flushes when it stops, gunicorn workers
+lose at most one interval on restart). GET /api/metrics/pdf/ exports those totals as
+Prometheus text with a `source` label, so counters keep growing across
+workers, scrapes and restarts whichever worker answers.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from pymongo.errors import PyMongoError
+
+from .mongo import get_db
+from .views.utils import utcnow_ms
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Stages in pipeline order (Server-Timing lists them in this order)
+STAGES = (
+    'decode', 'cache_lookup', 'html', 'assets', 'acquire', 'launch', 'page',
+    'set_content', 'pdf', 'limits', 'cache_store', 'rasterize',
+)
+
+# Counted outcomes
+EVENTS = ('renders', 'failures', 'timeouts', 'busy', 'limit_exceeded', 'cache_hits', 'cache_misses')
+
+_lock = threading.Lock()
+_histograms = {}  # stage -> [bucket counts..., +Inf count, sum]
+_events = dict.fromkeys(EVENTS, 0)
+# Recorded since the last flush to Mongo
+_unflushed_histograms = {}
+_unflushed_events = {}
+_source = 'api'
+_flusher_pid = None
+
+
+def metrics_collection():
+    return get_db()['pdf_metrics']
+
+
+def set_source(name):
+    """Name the shared totals this process adds to ('api' unless changed)."""
+    global _source
+    _source = name
+
+
+def _bucket_index(seconds):
+    for index, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            return index
+    return len(BUCKETS)
+
+
+def _add(histograms, stage, index, seconds):
+    histogram = histograms.get(stage)
+    if histogram is None:
+        histogram = histograms[stage] = [0] * (len(BUCKETS) + 1) + [0.0]
+    histogram[index] += 1
+    histogram[-1] += seconds
+
+
+def observe(stage, seconds):
+    index = _bucket_index(seconds)
+    with _lock:
+        _add(_histograms, stage, index, seconds)
+        _add(_unflushed_histograms, stage, index, seconds)
+    _ensure_flusher()
+
+
+def count(event, amount=1):
+    with _lock:
+        _events[event] = _events.get(event, 0) + amount
+        _unflushed_events[event] = _unflushed_events.get(event, 0) + amount
+    _ensure_flusher()
+
+
+def reset():
+    """Forget this process's metrics (flushed totals in Mongo stay)."""
+    with _lock:
+        _histograms.clear()
+        _unflushed_histograms.clear()
+        _unflushed_events.clear()
+        for event in _events:
+            _events[event] = 0
+
+
+def flush():
+    """Add what this process recorded since the last flush to the shared totals."""
+    with _lock:
+        histograms = {stage: list(histogram) for stage, histogram in _unflushed_histograms.items()}
+        events = dict(_unflushed_events)
+        _unflushed_histograms.clear()
+        _unflushed_events.clear()
+    increments = {f'events.{event}': value for event, value in events.items() if value}
+    for stage, histogram in histograms.items():
+        for index, value in enumerate(histogram[:-1]):
+            if value:
+                increments[f'stages.{stage}.buckets.{index}'] = value
+        increments[f'stages.{stage}.sum'] = histogram[-1]
+    if not increments:
+        return True
+    try:
+        metrics_collection().update_one(
+            {'_id': _source},
+            {'$inc': increments, '$set': {'updated_at': utcnow_ms()}},
+            upsert=True,
+        )
+        return True
+    except PyMongoError as e:
+        logger.warning("Could not flush PDF metrics: %s", e)
+        # Keep them for the next flush
+        with _lock:
+            for stage, histogram in histograms.items():
+                merged = _unflushed_histograms.setdefault(stage, [0] * (len(BUCKETS) + 1) + [0.0])
+                for index, value in enumerate(histogram):
+                    merged[index] += value
+            for event, value in events.items():
+                _unflushed_events[event] = _unflushed_events.get(event, 0) + value
+        return False
+
+
+def _run_flusher():
+    while True:
+        time.sleep(settings.PDF_METRICS_FLUSH_SECONDS)
+        flush()
+
+
+def _ensure_flusher():
+    """Start the flush thread for this process (again after a fork)."""
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid == pid:
+        return
+    with _lock:
+        if _flusher_pid == pid:
+            return
+        _flusher_pid = pid
+    threading.Thread(target=_run_flusher, name='pdf-metrics', daemon=True).start()
+
+
+class RenderTimings:
+    """Stage durations of one export; not shared between requests."""
+
+    def __init__(self):
+        self.stages = {}
+        self._started = time.perf_counter()
+        self._finished = False
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def finish(self):
+        """Record the stages (and the total) in the histograms; idempotent."""
+        if not self._finished:
+            self._finished = True
+            self.stages['total'] = time.perf_counter() - self._started
+            # list(): a render that timed out may still be adding stages on the pool's loop
+            for name, seconds in list(self.stages.items()):
+                observe(name, seconds)
+        return self
+
+    def server_timing(self):
+        """Server-Timing header value, durations in milliseconds."""
+        order = [name for name in STAGES if name in self.stages]
+        order += [name for name in self.stages if name not in STAGES]
+        return ', '.join(f'{name};dur={self.stages[name] * 1000:.1f}' for name in order)
+
+    def apply(self, response):
+        """finish() and set the Server-Timing header on `response`."""
+        self.finish()
+        response['Server-Timing'] = self.server_timing()
+        return response
+
+
+def summary():
+    """Counts and mean durations per stage, for /health/."""
+    with _lock:
+        stages = {
+            stage: {
+                'count': sum(histogram[:-1]),
+                'avg_ms': round(histogram[-1] / max(sum(histogram[:-1]), 1) * 1000, 1),
+            }
+            for stage, histogram in _histograms.items()
+        }
+        return {'stages': stages, 'events': dict(_events)}
+
+
+def _prometheus_lines(source, document):
+    """(stage lines, event lines) of one source's totals."""
+    label = f'source="{source}"'
+    stage_lines = []
+    for stage, histogram in sorted((document.get('stages') or {}).items()):
+        buckets = histogram.get('buckets') or {}
+        cumulative = 0
+        for index, bound in enumerate(BUCKETS):
+            cumulative += buckets.get(str(index), 0)
+            stage_lines.append(f'pdf_stage_seconds_bucket{{{label},stage="{stage}",le="{bound}"}} {cumulative}')
+        cumulative += buckets.get(str(len(BUCKETS)), 0)
+        stage_lines.append(f'pdf_stage_seconds_bucket{{{label},stage="{stage}",le="+Inf"}} {cumulative}')
+        stage_lines.append(f'pdf_stage_seconds_sum{{{label},stage="{stage}"}} {histogram.get("sum", 0.0):.6f}')
+        stage_lines.append(f'pdf_stage_seconds_count{{{label},stage="{stage}"}} {cumulative}')
+    event_lines = [
+        f'pdf_events_total{{{label},event="{event}"}} {value}'
+        for event, value in sorted((document.get('events') or {}).items())
+    ]
+    return stage_lines, event_lines
+
+
+def prometheus_text():
+    """
+    Totals of all processes in the Prometheus text exposition format (this
+    process's pending metrics are flushed first). Raises PyMongoError.
+    """
+    flush()
+    stage_lines = []
+    event_lines = []
+    for document in metrics_collection().find().sort('_id', 1):
+        stages, events = _prometheus_lines(document['_id'], document)
+        stage_lines += stages
+        event_lines += events
+    lines = [
+        '# HELP pdf_stage_seconds Time spent per PDF pipeline stage.',
+        '# TYPE pdf_stage_seconds histogram',
+        *stage_lines,
+        '# HELP pdf_events_total PDF renders by outcome.',
+        '# TYPE pdf_events_total counter',
+        *event_lines,
+    ]
+    return '\n'.join(lines) + '\n'
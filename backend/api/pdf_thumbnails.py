@@ -0,0 +1,220 @@
+"""
+Low-resolution page thumbnails of resumes, for dashboard previews.
+
+Thumbnails are rasterized from the same PDF a server-side export produces
+(api/resume_html.py + the browser pool), so a preview looks exactly like
+the download. They are cached on disk under PDF_THUMBNAIL_DIR, one directory
+per set of pages:
+
+    <key[:2]>/<key>/1.webp, 2.webp, ...
+
+where the key hashes the PDF cache key (resume ETag, template, language,
+render settings) with the image format and width. A set is never modified,
+so its page URLs (which contain the key) can be cached by clients forever.
+The PDF is looked up in (and stored into) api/pdf_cache first, so
+thumbnails after an export - or the other way round - cost a
+rasterization only.
+
+With PDF_JOBS_ENABLED, saving a resume queues a thumbnails job (coalesced
+per resume) and the render worker generates the default size in the
+background. Sets not read for PDF_THUMBNAIL_TTL seconds are removed by the
+worker's maintenance.
+"""
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from . import pdf_cache, pdf_metrics, resume_html
+
+logger = logging.getLogger(__name__)
+
+# Bump when rasterization changes in a way the key does not capture
+# (2: sets record the resume they belong to)
+THUMBNAIL_VERSION = 2
+# In each set: the _id of the resume it was generated from
+OWNER_FILE = '.resume'
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'png': ('PNG', 'image/png'),
+}
+
+# PDFium is not thread-safe
+_pdfium_lock = threading.Lock()
+
+
+class InvalidThumbnailOptions(ValueError):
+    pass
+
+
+def thumbnail_dir():
+    return Path(settings.PDF_THUMBNAIL_DIR)
+
+
+def options(params):
+    """(image_format, width) from query params; raises InvalidThumbnailOptions."""
+    image_format = params.get('format') or settings.PDF_THUMBNAIL_FORMAT
+    if image_format not in FORMATS:
+        raise InvalidThumbnailOptions(f"Unknown format '{image_format}', use one of: {', '.join(FORMATS)}")
+    try:
+        width = int(params.get('width') or settings.PDF_THUMBNAIL_WIDTHS[0])
+    except ValueError:
+        width = None
+    if width not in settings.PDF_THUMBNAIL_WIDTHS:
+        raise InvalidThumbnailOptions(
+            f"Width must be one of: {', '.join(str(w) for w in settings.PDF_THUMBNAIL_WIDTHS)}"
+        )
+    return image_format, width
+
+
+def thumbnail_key(resume_doc, template, language, image_format, width):
+    pdf_key = pdf_cache.resume_cache_key(resume_doc, template, language)
+    return hashlib.sha256(
+        f'{pdf_key}:{image_format}:{width}:{THUMBNAIL_VERSION}'.encode()
+    ).hexdigest()
+
+
+def _set_path(key):
+    return thumbnail_dir() / key[:2] / key
+
+
+def page_path(key, page, image_format):
+    return _set_path(key) / f'{page}.{image_format}'
+
+
+def page_count(key):
+    """Number of cached pages for `key` (refreshing its last use), or None on a miss."""
+    path = _set_path(key)
+    try:
+        pages = sum(1 for entry in os.scandir(path) if not entry.name.startswith('.'))
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return pages or None
+
+
+def rasterize(pdf_bytes, image_format, width):
+    """Encoded images of every page of `pdf_bytes`, `width` pixels wide."""
+    import pypdfium2
+
+    pil_format = FORMATS[image_format][0]
+    images = []
+    with _pdfium_lock:
+        document = pypdfium2.PdfDocument(pdf_bytes)
+        try:
+            for index in range(len(document)):
+                page = document[index]
+                bitmap = page.render(scale=width / page.get_width())
+                buffer = io.BytesIO()
+                bitmap.to_pil().save(buffer, format=pil_format, quality=settings.PDF_THUMBNAIL_QUALITY)
+                images.append(buffer.getvalue())
+                page.close()
+        finally:
+            document.close()
+    return images
+
+
+def set_owner(key):
+    """_id (str) of the resume whose thumbnails `key` are, or None."""
+    try:
+        return (_set_path(key) / OWNER_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+
+
+def store(key, images, image_format, resume_id):
+    """Write a set of pages atomically (a reader sees all pages or none)."""
+    path = _set_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(tempfile.mkdtemp(dir=path.parent, prefix='.tmp-'))
+        for page, image in enumerate(images, start=1):
+            (tmp_path / f'{page}.{image_format}').write_bytes(image)
+        (tmp_path / OWNER_FILE).write_text(str(resume_id))
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another process stored the same set first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    except OSError as e:
+        logger.warning("Could not cache thumbnails %s: %s", key, e)
+
+
+def _pdf_for(resume_doc, template, language, render, timings):
+    cache_key = pdf_cache.resume_cache_key(resume_doc, template, language)
+    with timings.stage('cache_lookup'):
+        cached_file = pdf_cache.open_cached(cache_key)
+    if cached_file is not None:
+        with cached_file:
+            return cached_file.read()
+    with timings.stage('html'):
+        html_content = resume_html.render_resume_html(resume_doc, template, language)
+    pdf_bytes = render(html_content)
+    with timings.stage('cache_store'):
+        pdf_cache.store(cache_key, pdf_bytes)
+    return pdf_bytes
+
+
+def ensure(resume_doc, template, language, image_format, width, render, timings=None):
+    """
+    (key, pages) for the thumbnails of `resume_doc`, generating them if they
+    are not cached. `render(html)` returns PDF bytes and may raise
+    BrowserPoolBusy / PdfLimitExceeded.
+    """
+    timings = timings or pdf_metrics.RenderTimings()
+    key = thumbnail_key(resume_doc, template, language, image_format, width)
+    pages = page_count(key)
+    if pages is not None:
+        return key, pages
+    pdf_bytes = _pdf_for(resume_doc, template, language, render, timings)
+    with timings.stage('rasterize'):
+        images = rasterize(pdf_bytes, image_format, width)
+    store(key, images, image_format, resume_doc['_id'])
+    return key, len(images)
+
+
+def resume_changed(user_id, resume_id):
+    """Called after a resume is created or updated: pre-generate its default thumbnails."""
+    if not (settings.PDF_THUMBNAILS_ON_SAVE and settings.PDF_JOBS_ENABLED):
+        return
+    from . import pdf_jobs
+
+    try:
+        pdf_jobs.submit_thumbnails(user_id, resume_id)
+    except Exception as e:
+        logger.warning("Could not queue thumbnails for resume %s: %s", resume_id, e)
+
+
+def generate_default(resume_doc, render):
+    """The thumbnails a save pre-generates: the resume's own template, default format and width."""
+    template = resume_html.resolve_template(resume_doc)
+    return ensure(
+        resume_doc, template, 'en', settings.PDF_THUMBNAIL_FORMAT, settings.PDF_THUMBNAIL_WIDTHS[0], render,
+    )
+
+
+def remove_unused(max_age=None):
+    """Delete thumbnail sets not read for `max_age` seconds (default PDF_THUMBNAIL_TTL)."""
+    cutoff = time.time() - (settings.PDF_THUMBNAIL_TTL if max_age is None else max_age)
+    removed = 0
+    for shard in thumbnail_dir().glob('??'):
+        for entry in os.scandir(shard):
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
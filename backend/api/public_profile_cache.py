@@ -0,0 +1,137 @@
+"""
+Read-through cache for hosted public profiles (/api/public/resume/<id>/).
+
+Two tiers:
+- a per-process LRU (bounded, short TTL) so a viral link is served from
+  worker memory;
+- an optional shared Django cache (CACHES['shared'], e.g. memcached or a
+  file cache on the app volume) with a longer TTL, so a profile rendered by
+  one worker is reused by the others.
+
+Entries hold (etag, payload) or a "not public" marker. Writes to a resume
+call invalidate(), which clears this worker's LRU and the shared tier; other
+workers' LRU entries expire after PUBLIC_PROFILE_CACHE_LOCAL_TTL seconds.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+_NOT_PUBLIC = 'not-public'
+_KEY_PREFIX = 'public-profile:'
+
+_lock = threading.Lock()
+_local = OrderedDict()  # resume_id -> (expires_at, value)
+_stats = {
+    'local_hits': 0,
+    'shared_hits': 0,
+    'misses': 0,
+    'invalidations': 0,
+    'evictions': 0,
+}
+
+
+def _shared_cache():
+    if 'shared' not in settings.CACHES:
+        return None
+    return caches['shared']
+
+
+def _count(key):
+    with _lock:
+        _stats[key] += 1
+
+
+def _local_get(resume_id):
+    with _lock:
+        item = _local.get(resume_id)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del _local[resume_id]
+            return None
+        _local.move_to_end(resume_id)
+        _stats['local_hits'] += 1
+        return value
+
+
+def _local_set(resume_id, value):
+    with _lock:
+        _local[resume_id] = (time.monotonic() + settings.PUBLIC_PROFILE_CACHE_LOCAL_TTL, value)
+        _local.move_to_end(resume_id)
+        while len(_local) > settings.PUBLIC_PROFILE_CACHE_SIZE:
+            _local.popitem(last=False)
+            _stats['evictions'] += 1
+
+
+def get_or_load(resume_id, loader):
+    """
+    Return (etag, payload) for a public profile, or None if it is missing or
+    not public. `loader(resume_id)` is called on a miss and must return the
+    same shape.
+    """
+    resume_id = str(resume_id)
+
+    value = _local_get(resume_id)
+    if value is None:
+        shared = _shared_cache()
+        if shared is not None:
+            try:
+                value = shared.get(_KEY_PREFIX + resume_id)
+            except Exception as e:
+                logger.warning("Shared public profile cache read failed: %s", e)
+            if value is not None:
+                _count('shared_hits')
+                _local_set(resume_id, value)
+
+    if value is None:
+        _count('misses')
+        loaded = loader(resume_id)
+        value = _NOT_PUBLIC if loaded is None else loaded
+        _local_set(resume_id, value)
+        shared = _shared_cache()
+        if shared is not None:
+            try:
+                shared.set(_KEY_PREFIX + resume_id, value, settings.PUBLIC_PROFILE_CACHE_SHARED_TTL)
+            except Exception as e:
+                logger.warning("Shared public profile cache write failed: %s", e)
+
+    return None if value == _NOT_PUBLIC else value
+
+
+def invalidate(resume_id):
+    """Drop a profile from this worker's LRU and the shared tier."""
+    resume_id = str(resume_id)
+    with _lock:
+        _local.pop(resume_id, None)
+        _stats['invalidations'] += 1
+    shared = _shared_cache()
+    if shared is not None:
+        try:
+            shared.delete(_KEY_PREFIX + resume_id)
+        except Exception as e:
+            logger.warning("Shared public profile cache delete failed: %s", e)
+
+
+def clear():
+    with _lock:
+        _local.clear()
+        for key in _stats:
+            _stats[key] = 0
+
+
+def stats():
+    """Hit/miss counters for this worker."""
+    with _lock:
+        data = dict(_stats)
+        data['local_entries'] = len(_local)
+    lookups = data['local_hits'] + data['shared_hits'] + data['misses']
+    data['hit_ratio'] = round((data['local_hits'] + data['shared_hits']) / lookups, 3) if lookups else None
+    data['shared_tier'] = _shared_cache() is not None
+    return data
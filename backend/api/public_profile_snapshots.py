@@ -0,0 +1,177 @@
+"""
+Static JSON snapshots of hosted public profiles.
+
+The hosted page (/p/:id) is rendered client-side from the payload of
+GET /api/public/resume/<id>/. Public profiles are read far more often than
+they change, so that exact payload is written to
+MEDIA_ROOT/public-profiles/<id>.json, and nginx serves it from the shared
+media volume before falling back to Django (see nginx/conf.d/app.conf).
+
+- A write to a resume removes its snapshot synchronously (a disabled or
+  deleted profile must disappear immediately), then queues a rebuild on a
+  per-process background thread.
+- Rebuilds in other processes may have read the resume before that write,
+  so a snapshot is only put in place while the stored revision is still
+  public and unchanged, and is checked again (and removed) afterwards: a
+  write that lands in between has already committed to Mongo before its
+  own removal, so one of the two always deletes last.
+- `python manage.py rebuild_public_profiles` rebuilds everything in bulk.
+"""
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+from pathlib import Path
+
+from bson import ObjectId
+from django.conf import settings
+
+from . import resume_repository
+from .etags import resume_etag
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_queue = None
+_worker_pid = None
+_pending = set()
+
+
+def snapshot_dir():
+    return Path(settings.PUBLIC_PROFILE_SNAPSHOT_DIR)
+
+
+def snapshot_path(resume_id):
+    return snapshot_dir() / f'{resume_id}.json'
+
+
+def _payload_from_doc(resume_doc):
+    # Lazy import: views import this module to schedule rebuilds
+    from .views.resume_views import _resume_dict_from_doc
+    return _resume_dict_from_doc(resume_doc)
+
+
+def _is_current(resume_doc):
+    """True while `resume_doc` is the stored revision and its profile is public."""
+    current = resume_repository.find_public(resume_doc['_id'], fields='etag')
+    return current is not None and current.get('updated_at') == resume_doc.get('updated_at')
+
+
+def write_snapshot_from_doc(resume_doc):
+    """
+    Atomically (re)write the snapshot of a public resume document. Returns
+    its ETag, or None if the resume changed or went private meanwhile (the
+    write that changed it queued its own rebuild).
+    """
+    directory = snapshot_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    body = json.dumps(_payload_from_doc(resume_doc), ensure_ascii=False, default=str)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(body)
+        # nginx serves files as-is; make them world-readable like collectstatic output
+        os.chmod(tmp_path, 0o644)
+        if not _is_current(resume_doc):
+            os.unlink(tmp_path)
+            return None
+        os.replace(tmp_path, snapshot_path(resume_doc['_id']))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    if not _is_current(resume_doc):
+        # Disabled or edited between the check and the replace
+        remove_snapshot(resume_doc['_id'])
+        return None
+    return resume_etag(resume_doc)
+
+
+def remove_snapshot(resume_id):
+    try:
+        snapshot_path(resume_id).unlink()
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def rebuild_snapshot(resume_id):
+    """Write the snapshot if the profile is public, else make sure none exists."""
+    resume_doc = resume_repository.find_public(ObjectId(str(resume_id)))
+    if resume_doc is None:
+        remove_snapshot(resume_id)
+        return False
+    return write_snapshot_from_doc(resume_doc) is not None
+
+
+def rebuild_all(clean=True):
+    """
+    Rebuild snapshots for every public resume. With clean=True, snapshots of
+    profiles that are no longer public are removed. Returns (written, removed).
+    """
+    written_ids = set()
+    for resume_doc in resume_repository.find_all_public():
+        if write_snapshot_from_doc(resume_doc) is not None:
+            written_ids.add(f"{resume_doc['_id']}.json")
+
+    removed = 0
+    if clean and snapshot_dir().exists():
+        for path in snapshot_dir().glob('*.json'):
+            if path.name not in written_ids:
+                path.unlink(missing_ok=True)
+                removed += 1
+    return len(written_ids), removed
+
+
+def _run_worker(work_queue):
+    while True:
+        resume_id = work_queue.get()
+        with _lock:
+            # Cleared before the rebuild so a write during it queues another pass
+            _pending.discard(resume_id)
+        try:
+            rebuild_snapshot(resume_id)
+        except Exception as e:
+            logger.warning("Public profile snapshot rebuild failed for %s: %s", resume_id, e)
+        finally:
+            work_queue.task_done()
+
+
+def _ensure_worker():
+    """Start the rebuild thread for this process (again after a fork)."""
+    global _queue, _worker_pid
+    pid = os.getpid()
+    if _queue is not None and _worker_pid == pid:
+        return _queue
+    _queue = queue.Queue()
+    _worker_pid = pid
+    _pending.clear()
+    threading.Thread(
+        target=_run_worker,
+        args=(_queue,),
+        name='public-profile-snapshots',
+        daemon=True,
+    ).start()
+    return _queue
+
+
+def resume_changed(resume_id):
+    """
+    Called after any write to a resume: drop the stale snapshot now, rebuild
+    it in the background (a no-op if the profile is not public).
+    """
+    if not settings.PUBLIC_PROFILE_SNAPSHOTS_ENABLED:
+        return
+    resume_id = str(resume_id)
+    try:
+        remove_snapshot(resume_id)
+    except OSError as e:
+        logger.warning("Could not remove public profile snapshot %s: %s", resume_id, e)
+    with _lock:
+        work_queue = _ensure_worker()
+        if resume_id in _pending:
+            return
+        _pending.add(resume_id)
+    work_queue.put(resume_id)
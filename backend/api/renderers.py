@@ -0,0 +1,71 @@
+"""
+JSON renderers for API responses.
+
+FastJSONRenderer is a drop-in replacement for DRF's JSONRenderer that
+serializes with orjson when it is installed. datetime, ObjectId and
+Decimal values are handled natively, so views can return Mongo documents
+without converting every field first. Without orjson it falls back to DRF's
+renderer with an encoder that knows the same types, so the output shape
+does not depend on which library is present.
+
+Selected with API_JSON_RENDERER in settings; see
+`python manage.py benchmark_json_renderers` for a comparison.
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(obj):
+    """Types neither orjson nor json serialize natively."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        obj = obj.to_decimal()
+    if isinstance(obj, Decimal):
+        # Same as DRF's JSONEncoder
+        return float(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class MongoJSONEncoder(JSONEncoder):
+    """
+    DRF's encoder plus ObjectId / Decimal128. Datetimes use plain
+    isoformat() (like views.utils.format_mongo_date and orjson) instead of
+    DRF's millisecond/"Z" rewrite.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, (datetime, date, time)):
+            return obj.isoformat()
+        try:
+            return _default(obj)
+        except TypeError:
+            return super().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    encoder_class = MongoJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            # orjson only knows 2-space indentation; keep DRF's exact behaviour
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        # Match DRF: escape the JS line terminators that are valid in JSON
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,210 @@
+"""
+Stored resume embeddings for job matching, keyed by resume revision.
+
+Matching a resume against a job posting only needs the posting encoded if
+the resume's embedding is already known. Embeddings live in the
+`resume_embeddings` collection, one document per resume:
+
+    {_id: <resume _id>, updated_at: <resume updated_at>, model, dim,
+     text_hash, vector: <float32 little-endian bytes>, created_at}
+
+A stored vector is used only while its `updated_at` and `model` match the
+resume, so any write to the resume invalidates it. When only formatting
+changed, the text hash still matches and the vector is re-keyed to the new
+revision without encoding.
+
+After a save the embedding is recomputed on a per-process background thread
+(RESUME_EMBEDDINGS_ON_SAVE), otherwise lazily by the first match. Deleting a
+resume deletes its embedding. Stored embeddings are mirrored into the
+recruiter search index (api/resume_vector_index.py).
+"""
+import hashlib
+import logging
+import os
+import queue
+import threading
+
+import numpy as np
+from bson import Binary, ObjectId
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from django.conf import settings
+
+from . import embedding_models, resume_repository, resume_vector_index
+from .mongo import get_db
+from .views.utils import utcnow_ms
+
+logger = logging.getLogger(__name__)
+
+DTYPE = np.dtype('<f4')
+
+_lock = threading.Lock()
+_queue = None
+_worker_pid = None
+_pending = set()
+
+
+def embeddings_collection():
+    return get_db()['resume_embeddings']
+
+
+def to_binary(vector):
+    return Binary(np.asarray(vector, dtype=DTYPE).tobytes())
+
+
+def from_binary(data):
+    return np.frombuffer(data, dtype=DTYPE)
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _store(resume_id, updated_at, model, vector, digest):
+    document = {
+        'updated_at': updated_at,
+        'model': model,
+        'dim': int(vector.shape[0]),
+        'text_hash': digest,
+        'vector': to_binary(vector),
+        'created_at': utcnow_ms(),
+    }
+    query = {'_id': resume_id}
+    if updated_at is not None:
+        # Never replace the embedding of a newer revision (a concurrent save)
+        query['$or'] = [{'updated_at': {'$lte': updated_at}}, {'updated_at': None}]
+    try:
+        result = embeddings_collection().replace_one(query, document, upsert=True)
+    except DuplicateKeyError:
+        return
+    if result.matched_count or result.upserted_id is not None:
+        _update_index(resume_id, vector, model)
+
+
+def _update_index(resume_id, vector, model):
+    try:
+        resume_vector_index.upsert(resume_id, vector, model)
+    except Exception as e:
+        # The next rebuild_resume_index picks it up
+        logger.warning("Could not update resume vector index for %s: %s", resume_id, e)
+
+
+def get_or_compute(resume_doc, text):
+    """
+    float32 embedding of `text`, the match text of `resume_doc` (which needs
+    _id and updated_at): stored if it matches this revision, else encoded
+    and stored.
+    """
+    return get_or_compute_many([resume_doc], [text])[0]
+
+
+def get_or_compute_many(resume_docs, texts):
+    """
+    float32 matrix with one row per resume (as get_or_compute), reading the
+    stored embeddings in one query and encoding the stale ones in one batch.
+    """
+    model = embedding_models.default_model()
+    stored_by_id = {
+        document['_id']: document
+        for document in embeddings_collection().find({'_id': {'$in': [doc['_id'] for doc in resume_docs]}})
+    }
+    rows = [None] * len(resume_docs)
+    stale = []
+    for index, (resume_doc, text) in enumerate(zip(resume_docs, texts)):
+        stored = stored_by_id.get(resume_doc['_id'])
+        if stored is not None and stored.get('model') == model and (
+            stored.get('updated_at') == resume_doc.get('updated_at') or stored.get('text_hash') == text_hash(text)
+        ):
+            rows[index] = from_binary(stored['vector'])
+            if stored.get('updated_at') != resume_doc.get('updated_at') and resume_doc.get('updated_at') is not None:
+                # Same text under a new revision (e.g. a styling change); never
+                # move a newer stored revision back (a stale concurrent reader)
+                embeddings_collection().update_one(
+                    {
+                        '_id': resume_doc['_id'],
+                        'text_hash': stored['text_hash'],
+                        '$or': [{'updated_at': {'$lte': resume_doc['updated_at']}}, {'updated_at': None}],
+                    },
+                    {'$set': {'updated_at': resume_doc['updated_at']}},
+                )
+        else:
+            stale.append(index)
+    if stale:
+        vectors = np.asarray(embedding_models.encode([texts[index] for index in stale]), dtype=DTYPE)
+        for index, vector in zip(stale, vectors):
+            resume_doc = resume_docs[index]
+            _store(resume_doc['_id'], resume_doc.get('updated_at'), model, vector, text_hash(texts[index]))
+            rows[index] = vector
+    return np.vstack(rows) if rows else np.empty((0, 0), dtype=DTYPE)
+
+
+def remove(resume_id):
+    try:
+        embeddings_collection().delete_one({'_id': ObjectId(resume_id)})
+    except PyMongoError as e:
+        # Harmless: an orphaned embedding is never matched to a revision again
+        logger.warning("Could not remove resume embedding %s: %s", resume_id, e)
+    try:
+        resume_vector_index.delete(resume_id)
+    except Exception as e:
+        logger.warning("Could not remove resume %s from the vector index: %s", resume_id, e)
+
+
+def refresh(resume_id):
+    """Bring the stored embedding of a resume up to date (no-op if it is current or the resume is gone)."""
+    from .views.match_views import get_resume_text
+
+    resume_doc = resume_repository.resumes_collection().find_one(
+        {'_id': ObjectId(resume_id)}, resume_repository.get_projection('matching'),
+    )
+    if resume_doc is None:
+        return None
+    text = get_resume_text(resume_doc)
+    if not text.strip():
+        return None
+    return get_or_compute(resume_doc, text)
+
+
+def _run_worker(work_queue):
+    while True:
+        resume_id = work_queue.get()
+        with _lock:
+            # Cleared before the refresh so a write during it queues another pass
+            _pending.discard(resume_id)
+        try:
+            refresh(resume_id)
+        except Exception as e:
+            logger.warning("Resume embedding refresh failed for %s: %s", resume_id, e)
+        finally:
+            work_queue.task_done()
+
+
+def _ensure_worker():
+    """Start the refresh thread for this process (again after a fork)."""
+    global _queue, _worker_pid
+    pid = os.getpid()
+    if _queue is not None and _worker_pid == pid:
+        return _queue
+    _queue = queue.Queue()
+    _worker_pid = pid
+    _pending.clear()
+    threading.Thread(
+        target=_run_worker,
+        args=(_queue,),
+        name='resume-embeddings',
+        daemon=True,
+    ).start()
+    return _queue
+
+
+def resume_changed(resume_id):
+    """Called after a resume is created or updated: recompute its embedding in the background."""
+    if not settings.RESUME_EMBEDDINGS_ON_SAVE:
+        return
+    resume_id = str(resume_id)
+    with _lock:
+        work_queue = _ensure_worker()
+        if resume_id in _pending:
+            return
+        _pending.add(resume_id)
+    work_queue.put(resume_id)
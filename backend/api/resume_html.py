@@ -0,0 +1,297 @@
+"""
+Server-side HTML for PDF export (GET /api/resumes/<id>/pdf/?template=...).
+
+Renders a stored resume document with the Django template of one of the
+frontend's resume templates (api/templates/resume_pdf/), so export needs no
+client-rendered HTML in the request body. The templates follow the layout,
+palette and typography of the React templates in
+frontend/skill-step-form/src/components/cv-form/templates/ and honour the
+resume's `styling` (fonts, sizes, colors, per-section overrides) and
+`section_order`.
+"""
+import re
+
+from django.template.loader import render_to_string
+
+TEMPLATES = ('modern', 'classic', 'minimal', 'creative', 'latex', 'starRover')
+DEFAULT_TEMPLATE = 'modern'
+
+# Bump when the HTML templates change so cached PDFs are not reused
+TEMPLATE_VERSION = 1
+
+DEFAULT_SECTION_ORDER = [
+    'summary', 'workExperience', 'education', 'projects',
+    'certificates', 'skills', 'languages', 'interests',
+]
+
+# resumeTemplatePalette.ts
+ACCENT_BLUE = '#2563eb'
+TITLE_GRAY = '#111827'
+BODY_GRAY = '#374151'
+
+# Per-template defaults where they differ from the shared palette
+_TEMPLATE_DEFAULTS = {
+    'modern': {'font_family': 'Inter, "Helvetica Neue", Arial, sans-serif'},
+    'classic': {'font_family': 'Georgia, "Times New Roman", serif'},
+    'minimal': {'font_family': '"Helvetica Neue", Arial, sans-serif'},
+    'creative': {'font_family': 'Inter, "Helvetica Neue", Arial, sans-serif'},
+    'latex': {'font_family': '"DM Sans", "Segoe UI", sans-serif', 'heading_color': TITLE_GRAY},
+    'starRover': {'font_family': '"IBM Plex Mono", "Fira Mono", "Cascadia Code", monospace'},
+}
+
+# ModernTemplate.tsx fontSizeMap (rem at 16px)
+FONT_SIZES = {
+    'small': {'xs': '10px', 'sm': '12px', 'base': '14px', 'text': '11px', 'heading': '13px', 'name': '28px'},
+    'medium': {'xs': '12px', 'sm': '14px', 'base': '16px', 'text': '13px', 'heading': '15px', 'name': '32px'},
+    'large': {'xs': '14px', 'sm': '16px', 'base': '18px', 'text': '15px', 'heading': '17px', 'name': '38px'},
+}
+
+# i18n/locales/{en,de}.json (resume.sections / resume.fields / resume.labels)
+LABELS = {
+    'en': {
+        'summary': 'Professional Summary', 'workExperience': 'Experience', 'education': 'Education',
+        'projects': 'Projects', 'certificates': 'Certifications', 'skills': 'Skills',
+        'languages': 'Languages', 'interests': 'Interests', 'technologies': 'Technologies',
+        'competencies': 'Power Skills', 'courses': 'Key Courses', 'present': 'Present',
+    },
+    'de': {
+        'summary': 'Professionelle Zusammenfassung', 'workExperience': 'Erfahrung', 'education': 'Bildung',
+        'projects': 'Projekte', 'certificates': 'Zertifizierungen', 'skills': 'Fähigkeiten',
+        'languages': 'Sprachen', 'interests': 'Interessen', 'technologies': 'Technologien',
+        'competencies': 'Soft Skills', 'courses': 'Wichtige Kurse', 'present': 'Aktuell',
+    },
+}
+
+_MONTHS = {
+    'en': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
+    'de': ['Jan.', 'Feb.', 'März', 'Apr.', 'Mai', 'Juni', 'Juli', 'Aug.', 'Sept.', 'Okt.', 'Nov.', 'Dez.'],
+}
+
+# Styling values end up inside <style>; only accept plain colors and font lists
+# so a stored value cannot inject CSS (e.g. url() fetches during rendering)
+_COLOR_RE = re.compile(r'^(#[0-9a-fA-F]{3,8}|rgba?\([0-9.,%\s]+\)|hsla?\([0-9.,%\s]+\)|[a-zA-Z]{3,20})$')
+_FONT_RE = re.compile(r'^[\w\s,\'"-]{1,200}$')
+_DATE_RE = re.compile(r'^(\d{4})-(\d{2})$')
+_SAFE_URL_SCHEMES = ('http://', 'https://', 'mailto:', 'tel:')
+
+
+class UnknownTemplate(ValueError):
+    """?template= names no server-side template."""
+
+
+def _camel(key):
+    head, *rest = key.split('_')
+    return head + ''.join(part.title() for part in rest)
+
+
+def _get(mapping, key):
+    """Styling keys are stored snake_case, but older documents kept camelCase."""
+    if not isinstance(mapping, dict):
+        return None
+    value = mapping.get(key)
+    return mapping.get(_camel(key)) if value is None else value
+
+
+def _color(value, default):
+    return value if isinstance(value, str) and _COLOR_RE.match(value.strip()) else default
+
+
+def _size(value, default):
+    return value if value in FONT_SIZES else default
+
+
+def _external_url(raw):
+    url = (raw or '').strip()
+    if not url:
+        return ''
+    if url.lower().startswith(_SAFE_URL_SCHEMES):
+        return url
+    if ':' in url.split('/')[0]:
+        # Some other scheme (javascript:, file:, ...)
+        return ''
+    return 'https://' + url
+
+
+def _month_year(value, language):
+    match = _DATE_RE.match(value or '')
+    if not match:
+        return value or ''
+    month = int(match.group(2))
+    if not 1 <= month <= 12:
+        return value
+    return f'{_MONTHS[language][month - 1]} {match.group(1)}'
+
+
+def _date_range(start, end, language):
+    """dateFormatter.ts formatDateRange."""
+    present = LABELS[language]['present']
+    start = _month_year(start, language)
+    end = _month_year(end, language) if end else present
+    if not start:
+        return end
+    return f'{start} - {end}'
+
+
+def _texts(items, key):
+    return [str(item.get(key)).strip() for item in items or [] if isinstance(item, dict) and (item.get(key) or '').strip()]
+
+
+def _section_order(resume_doc):
+    order = resume_doc.get('section_order') or DEFAULT_SECTION_ORDER
+    # section_order may have been stored snake_cased along with the rest of the body
+    return [_camel(section) for section in order if isinstance(section, str)]
+
+
+def _style(styling, template):
+    defaults = _TEMPLATE_DEFAULTS[template]
+    font_family = _get(styling, 'font_family')
+    base_size = _size(_get(styling, 'font_size'), 'medium')
+    heading_color = _color(_get(styling, 'heading_color'), defaults.get('heading_color', ACCENT_BLUE))
+    text_color = _color(_get(styling, 'text_color'), BODY_GRAY)
+    title_bold = _get(styling, 'title_bold')
+    heading_bold = _get(styling, 'heading_bold')
+    return {
+        'font_family': font_family if isinstance(font_family, str) and _FONT_RE.match(font_family) else defaults['font_family'],
+        'sizes': FONT_SIZES[base_size],
+        'base_size': base_size,
+        'title_color': _color(_get(styling, 'title_color'), TITLE_GRAY),
+        'title_weight': 700 if title_bold is None or title_bold else 400,
+        'heading_color': heading_color,
+        'heading_weight': 700 if heading_bold is None or heading_bold else 400,
+        'text_color': text_color,
+        'link_color': _color(_get(styling, 'link_color'), ACCENT_BLUE),
+    }
+
+
+def _section_style(styling, section, style):
+    """getSectionStyling() of the React templates."""
+    overrides = _get(_get(styling, 'section_styling') or {}, section) or {}
+    return {
+        'title_color': _color(_get(overrides, 'title_color'), style['heading_color']),
+        'title_sizes': FONT_SIZES[_size(_get(overrides, 'title_size'), style['base_size'])],
+        'body_color': _color(_get(overrides, 'body_color'), style['text_color']),
+        'body_sizes': FONT_SIZES[_size(_get(overrides, 'body_size'), style['base_size'])],
+    }
+
+
+def _section_items(section, resume_doc, personal_info, language):
+    if section == 'summary':
+        summary = (personal_info.get('summary') or '').strip()
+        return [summary] if summary else []
+    if section == 'workExperience':
+        return [{
+            'title': job.get('position', ''),
+            'subtitle': job.get('company', ''),
+            'location': job.get('location', ''),
+            'link': _external_url(job.get('link')),
+            'dates': _date_range(job.get('start_date'), job.get('end_date'), language),
+            'description': job.get('description', ''),
+            'bullets': _texts(job.get('responsibilities'), 'responsibility'),
+            'technologies': _texts(job.get('technologies'), 'technology'),
+            'competencies': _texts(job.get('competencies'), 'competency'),
+        } for job in resume_doc.get('work_experience') or [] if job.get('position') or job.get('company')]
+    if section == 'education':
+        return [{
+            'title': ' '.join(part for part in (edu.get('degree'), edu.get('field') and f"– {edu['field']}") if part),
+            'subtitle': edu.get('institution', ''),
+            'location': edu.get('location', ''),
+            'link': _external_url(edu.get('link')),
+            'dates': _date_range(edu.get('start_date'), edu.get('end_date'), language),
+            'bullets': _texts(edu.get('descriptions'), 'description'),
+            'courses': _texts(edu.get('key_courses'), 'course'),
+        } for edu in resume_doc.get('education') or [] if edu.get('degree') or edu.get('institution')]
+    if section == 'projects':
+        return [{
+            'title': project.get('name', ''),
+            'link': _external_url(project.get('link')),
+            'dates': _date_range(project.get('start_date'), project.get('end_date'), language)
+            if project.get('start_date') else '',
+            'description': project.get('description', ''),
+            'bullets': _texts(project.get('highlights'), 'highlight'),
+            'technologies': _texts(project.get('technologies'), 'technology'),
+        } for project in resume_doc.get('projects') or [] if project.get('name') or project.get('description')]
+    if section == 'certificates':
+        return [{
+            'title': cert.get('name', ''),
+            'subtitle': cert.get('organization', ''),
+            'link': _external_url(cert.get('url')),
+            'dates': ' - '.join(
+                _month_year(d, language) for d in (cert.get('issue_date'), cert.get('expiration_date')) if d
+            ),
+        } for cert in resume_doc.get('certificates') or [] if (cert.get('name') or '').strip()]
+    if section == 'skills':
+        return _texts(resume_doc.get('skills'), 'skill')
+    if section == 'languages':
+        return [
+            ' '.join(part for part in (lang.get('language'), lang.get('proficiency') and f"({lang['proficiency']})") if part)
+            for lang in resume_doc.get('languages') or [] if (lang.get('language') or '').strip()
+        ]
+    if section == 'interests':
+        return _texts(personal_info.get('interests'), 'interest')
+    return []
+
+
+def build_context(resume_doc, template, language='en'):
+    if language not in LABELS:
+        language = 'en'
+    personal_info = resume_doc.get('personal_info') or {}
+    styling = resume_doc.get('styling') or {}
+    style = _style(styling, template)
+
+    sections = []
+    for section in _section_order(resume_doc):
+        items = _section_items(section, resume_doc, personal_info, language)
+        if items:
+            sections.append({
+                'key': section,
+                'title': LABELS[language].get(section, section),
+                'items': items,
+                'style': _section_style(styling, section, style),
+            })
+
+    contacts = []
+    for key in ('email', 'phone', 'location', 'linkedin', 'github', 'website'):
+        value = (personal_info.get(key) or '').strip()
+        if not value:
+            continue
+        href = ''
+        if key == 'email':
+            href = f'mailto:{value}'
+        elif key == 'phone':
+            href = f'tel:{value}'
+        elif key != 'location':
+            href = _external_url(value)
+        contacts.append({'key': key, 'text': value, 'href': href})
+
+    photo = (personal_info.get('profile_image') or '').strip()
+    if not photo.startswith(('data:image/', 'https://')):
+        photo = ''
+
+    return {
+        'template': template,
+        'language': language,
+        'labels': LABELS[language],
+        'name': f"{personal_info.get('first_name', '')} {personal_info.get('last_name', '')}".strip() or 'Resume',
+        'professional_title': personal_info.get('professional_title', ''),
+        'photo': photo,
+        'contacts': contacts,
+        'sections': sections,
+        'style': style,
+        'header_style': _section_style(styling, 'personalInfo', style),
+    }
+
+
+def resolve_template(resume_doc, requested=None):
+    """`requested` or the resume's own template; raises UnknownTemplate."""
+    template = requested or resume_doc.get('template') or DEFAULT_TEMPLATE
+    if template not in TEMPLATES:
+        if requested:
+            raise UnknownTemplate(template)
+        template = DEFAULT_TEMPLATE
+    return template
+
+
+def render_resume_html(resume_doc, template, language='en'):
+    """Complete HTML document for `resume_doc` in one of TEMPLATES."""
+    template_file = re.sub(r'([A-Z])', lambda m: '_' + m.group(1).lower(), template)
+    return render_to_string(f'resume_pdf/{template_file}.html', build_context(resume_doc, template, language))
@@ -0,0 +1,97 @@
+"""
+Field-level partial updates for resumes (PATCH /api/resumes/<id>/).
+
+The editor autosaves one field at a time. Instead of re-sending and
+re-validating the whole ResumeSerializer payload, the client sends a list
+of changes addressed by dotted section paths:
+
+    [
+        {"path": "work_experience.2.description", "value": "Led a team of 5"},
+        {"path": "personal_info.professional_title", "value": "Engineer"},
+        {"path": "skills", "value": [{"skill": "Python"}]}
+    ]
+
+Each path is resolved against ResumeSerializer to the sub-serializer or
+field that owns it, only that value is validated, and the path is used
+verbatim as the Mongo `$set` key (document field names match the
+serializer's snake_case names).
+"""
+import re
+
+from rest_framework import serializers
+
+from .serializers import ResumeSerializer
+
+MAX_PATCH_OPERATIONS = 100
+
+_SEGMENT_RE = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def _resolve_field(path):
+    """
+    Walk ResumeSerializer along `path`. Returns (field, array_paths) where
+    field validates the value at `path` (None for free-form styling keys) and
+    array_paths are the `<list>.<index>` prefixes that must already exist.
+    """
+    segments = path.split('.')
+    if any(not _SEGMENT_RE.match(segment) for segment in segments):
+        raise serializers.ValidationError(f"Invalid path '{path}'")
+
+    field = ResumeSerializer().fields.get(segments[0])
+    if field is None or field.read_only:
+        raise serializers.ValidationError(f"'{segments[0]}' cannot be patched")
+
+    array_paths = []
+    for position, segment in enumerate(segments[1:], start=1):
+        if isinstance(field, serializers.DictField):
+            # styling: free-form keys; only a direct child value can be checked
+            return (field.child if position == len(segments) - 1 else None), array_paths
+        if isinstance(field, (serializers.ListSerializer, serializers.ListField)):
+            if not segment.isdigit():
+                raise serializers.ValidationError(f"'{segment}' in '{path}' must be a list index")
+            array_paths.append('.'.join(segments[:position + 1]))
+            field = field.child
+        elif isinstance(field, serializers.Serializer):
+            if segment not in field.fields:
+                raise serializers.ValidationError(f"Unknown field '{segment}' in '{path}'")
+            field = field.fields[segment]
+        else:
+            raise serializers.ValidationError(f"'{path}' goes below a scalar field")
+    return field, array_paths
+
+
+def parse_patch_operations(data):
+    """
+    Validate a PATCH body. Returns (set_fields, array_paths) ready for
+    resume_repository.patch_for_user; raises serializers.ValidationError.
+    """
+    if isinstance(data, dict) and 'changes' in data:
+        data = data['changes']
+    if not isinstance(data, list) or not data:
+        raise serializers.ValidationError('Body must be a non-empty list of {"path", "value"} changes')
+    if len(data) > MAX_PATCH_OPERATIONS:
+        raise serializers.ValidationError(f'At most {MAX_PATCH_OPERATIONS} changes per request')
+
+    set_fields = {}
+    array_paths = set()
+    for change in data:
+        if not isinstance(change, dict) or 'path' not in change or 'value' not in change:
+            raise serializers.ValidationError('Each change needs "path" and "value"')
+        path = str(change['path'])
+        field, required_arrays = _resolve_field(path)
+        value = change['value']
+        if field is not None:
+            try:
+                value = field.run_validation(value)
+            except serializers.ValidationError as e:
+                raise serializers.ValidationError({path: e.detail})
+        set_fields[path] = value
+        array_paths.update(required_arrays)
+
+    # Mongo rejects $set on both a path and one of its prefixes
+    for path in set_fields:
+        for other in set_fields:
+            if other.startswith(path + '.'):
+                raise serializers.ValidationError(f"'{path}' and '{other}' overlap")
+
+    return set_fields, sorted(array_paths)
@@ -0,0 +1,192 @@
+"""
+Access to the raw `resumes` collection with named field projections.
+
+Views ask for only the fields they render, so Mongo does not ship (and
+pymongo does not decode) full work experience / education / styling blobs
+for screens that never show them.
+"""
+from pymongo import ReturnDocument
+
+from .mongo import get_db
+from .pagination import fetch_page
+
+# Fields shown on the "My Resumes" screen.
+SUMMARY_PROJECTION = {
+    'name': 1,
+    'template': 1,
+    'completeness_score': 1,
+    'clarity_score': 1,
+    'formatting_score': 1,
+    'impact_score': 1,
+    'overall_score': 1,
+    'public_profile_enabled': 1,
+    'public_profile_sections': 1,
+    'public_profile_theme': 1,
+    'created_at': 1,
+    'updated_at': 1,
+}
+
+# Hosted profile (/p/:id): everything the owner sees, minus ownership info.
+PUBLIC_PROJECTION = {
+    'user_id': 0,
+}
+
+# Fields read by match_views.get_resume_text, plus the revision its stored embedding is keyed by.
+MATCHING_PROJECTION = {
+    'personal_info': 1,
+    'work_experience': 1,
+    'education': 1,
+    'skills': 1,
+    'updated_at': 1,
+}
+
+# Matching fields plus the name, for ranking a user's resumes against a job.
+RANKING_PROJECTION = dict(MATCHING_PROJECTION, name=1)
+
+# Shown for each hit of the recruiter resume search.
+SEARCH_PROJECTION = {
+    'name': 1,
+    'user_id': 1,
+    'personal_info.first_name': 1,
+    'personal_info.last_name': 1,
+    'updated_at': 1,
+}
+
+# Fields returned by resume_public_profile_toggle.
+PUBLIC_PROFILE_PROJECTION = {
+    'public_profile_enabled': 1,
+    'public_profile_sections': 1,
+    'public_profile_theme': 1,
+}
+
+# Enough to compute the ETag (api/etags.py) without loading the resume.
+ETAG_PROJECTION = {
+    'updated_at': 1,
+}
+
+# name -> pymongo projection (None = full document)
+PROJECTIONS = {
+    'summary': SUMMARY_PROJECTION,
+    'detail': None,
+    'public': PUBLIC_PROJECTION,
+    'matching': MATCHING_PROJECTION,
+    'ranking': RANKING_PROJECTION,
+    'search': SEARCH_PROJECTION,
+    'public_profile': PUBLIC_PROFILE_PROJECTION,
+    'etag': ETAG_PROJECTION,
+}
+
+
+def get_projection(fields):
+    """Return the pymongo projection for a named field set; ValueError if unknown."""
+    if fields not in PROJECTIONS:
+        raise ValueError(
+            f"Unknown resume field set '{fields}' (expected one of: {', '.join(PROJECTIONS)})"
+        )
+    return PROJECTIONS[fields]
+
+
+def resumes_collection():
+    return get_db().resumes
+
+
+def find_for_user(user_id, fields='detail'):
+    """Cursor over all resumes owned by user_id."""
+    return resumes_collection().find({'user_id': user_id}, get_projection(fields))
+
+
+def find_page_for_user(user_id, limit, after=None, fields='detail'):
+    """One keyset page (newest first) of user_id's resumes: (docs, next_cursor)."""
+    return fetch_page(
+        resumes_collection(),
+        {'user_id': user_id},
+        limit,
+        after=after,
+        projection=get_projection(fields),
+    )
+
+
+def find_one_for_user(resume_id, user_id, fields='detail'):
+    """Single resume owned by user_id, or None."""
+    return resumes_collection().find_one(
+        {'_id': resume_id, 'user_id': user_id},
+        get_projection(fields),
+    )
+
+
+def find_public(resume_id, fields='public'):
+    """Resume with hosted profile enabled, or None."""
+    return resumes_collection().find_one(
+        {'_id': resume_id, 'public_profile_enabled': True},
+        get_projection(fields),
+    )
+
+
+def find_all_public(fields='public'):
+    """Cursor over every resume with hosted profile enabled."""
+    return resumes_collection().find({'public_profile_enabled': True}, get_projection(fields))
+
+
+def export_query(user_ids=(), resume_ids=()):
+    """Filter for a bulk export: every resume of user_ids plus the given resume _ids."""
+    clauses = []
+    if user_ids:
+        clauses.append({'user_id': {'$in': list(user_ids)}})
+    if resume_ids:
+        clauses.append({'_id': {'$in': list(resume_ids)}})
+    if not clauses:
+        raise ValueError('A bulk export needs user ids or resume ids')
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+
+def find_for_export(query, batch_size=50):
+    """Cursor over full resumes matching export_query(), in _id order."""
+    return resumes_collection().find(query).sort('_id', 1).batch_size(batch_size)
+
+
+def insert(resume_doc):
+    """Insert a new resume; pymongo sets resume_doc['_id'] in place."""
+    return resumes_collection().insert_one(resume_doc).inserted_id
+
+
+def update_for_user(resume_id, user_id, set_fields, fields='detail', extra_filter=None):
+    """
+    $set fields on a resume owned by user_id and return the updated document
+    (one round trip via find_one_and_update), or None if it does not exist
+    or does not match extra_filter (e.g. an If-Match precondition).
+    """
+    return resumes_collection().find_one_and_update(
+        {'_id': resume_id, 'user_id': user_id, **(extra_filter or {})},
+        {'$set': set_fields},
+        projection=get_projection(fields),
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def patch_for_user(resume_id, user_id, set_fields, array_paths=(), extra_filter=None):
+    """
+    Targeted $set of dotted paths (see api/resume_patch.py). Every entry in
+    array_paths (e.g. 'work_experience.2') must already exist, so an index
+    past the end never pads the array with nulls. Returns the document's
+    _id / updated_at, or None if nothing matched.
+    """
+    query = {'_id': resume_id, 'user_id': user_id, **(extra_filter or {})}
+    for path in array_paths:
+        query[path] = {'$exists': True}
+    return resumes_collection().find_one_and_update(
+        query,
+        {'$set': set_fields},
+        projection={'updated_at': 1},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def exists_for_user(resume_id, user_id):
+    return resumes_collection().find_one(
+        {'_id': resume_id, 'user_id': user_id}, {'_id': 1},
+    ) is not None
+
+
+def delete_for_user(resume_id, user_id):
+    """Delete a resume owned by user_id; True if one was removed."""
+    return resumes_collection().delete_one({'_id': resume_id, 'user_id': user_id}).deleted_count > 0
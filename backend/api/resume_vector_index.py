@@ -0,0 +1,445 @@
+"""
+On-disk vector index of resume embeddings, for recruiter-side search.
+
+"Find resumes similar to this job posting" over the whole corpus cannot
+re-encode resumes per query, so the embeddings stored by
+api/resume_embeddings.py are mirrored into memory-mapped files under
+RESUME_VECTOR_INDEX_DIR:
+
+    CURRENT                    number of the live generation
+    <generation>/meta.json     {model, dim, count, capacity, clustered, nlist}
+    <generation>/vectors.f32   float32 [capacity, dim], L2-normalised rows
+    <generation>/ids.s24       resume _id (hex) of each row
+    <generation>/alive.u8      1 = live row, 0 = tombstone
+    <generation>/centroids.npy, offsets.npy   (IVF lists, when clustered)
+
+`manage.py rebuild_resume_index` writes a new generation from the
+`resume_embeddings` collection and switches CURRENT to it. Rows are grouped
+by their nearest k-means centroid, so an approximate query scores only the
+rows of the `nprobe` closest lists (plus everything appended since the
+rebuild); an exact query scores every row. Both use the page cache through
+the memory map instead of loading the matrix.
+
+Between rebuilds, storing a resume embedding upserts it (the old row gets a
+tombstone, the new one is appended) and deleting a resume tombstones it.
+Writers from all processes serialise on a file lock; a write that cannot
+get it within RESUME_VECTOR_INDEX_LOCK_TIMEOUT (a rebuild is running) is
+skipped and the next rebuild picks the resume up. Readers see a row once
+meta.json counts it, which is written last.
+"""
+import copy
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+ID_DTYPE = np.dtype('S24')
+INITIAL_CAPACITY = 1024
+# Rows scored per matrix product (bounds memory for exact queries)
+CHUNK_ROWS = 16384
+# Rows k-means is trained on
+KMEANS_SAMPLE = 50000
+KMEANS_ITERATIONS = 10
+# Smaller corpora are always searched exactly
+MIN_CLUSTERED_ROWS = 2000
+
+_FILES = (
+    ('vectors.f32', np.float32, True),
+    ('ids.s24', ID_DTYPE, False),
+    ('alive.u8', np.uint8, False),
+)
+
+
+class IndexNotBuilt(Exception):
+    pass
+
+
+def index_dir():
+    return Path(settings.RESUME_VECTOR_INDEX_DIR)
+
+
+def normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+@contextmanager
+def _write_lock(timeout):
+    """Exclusive lock on the index across processes; TimeoutError after `timeout` seconds (None = wait)."""
+    index_dir().mkdir(parents=True, exist_ok=True)
+    with open(index_dir() / 'index.lock', 'a+') as lock_file:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError('resume vector index is locked (rebuild running?)')
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _current_generation():
+    try:
+        return int((index_dir() / 'CURRENT').read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_atomic(path, text):
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
+
+
+def _allocate(path, name, dtype, dim, capacity):
+    row_bytes = np.dtype(dtype).itemsize * (dim if name == 'vectors.f32' else 1)
+    with open(path / name, 'ab') as f:
+        f.truncate(capacity * row_bytes)
+
+
+class _Index:
+    """One generation of the index, memory-mapped in this process."""
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.path = index_dir() / str(generation)
+        self.meta_signature = None
+        self.id_rows = None  # resume id -> row, built on first write
+        self.synced = 0
+        self._load_meta()
+        self._map()
+        centroids_path = self.path / 'centroids.npy'
+        if centroids_path.exists():
+            self.centroids = np.load(centroids_path)
+            self.offsets = np.load(self.path / 'offsets.npy')
+        else:
+            self.centroids = self.offsets = None
+
+    def _load_meta(self):
+        stat = os.stat(self.path / 'meta.json')
+        self.meta = json.loads((self.path / 'meta.json').read_text())
+        self.meta_signature = (stat.st_ino, stat.st_mtime_ns)
+
+    def _map(self):
+        capacity, dim = self.meta['capacity'], self.meta['dim']
+        self.vectors = np.memmap(self.path / 'vectors.f32', dtype=np.float32, mode='r+', shape=(capacity, dim))
+        self.ids = np.memmap(self.path / 'ids.s24', dtype=ID_DTYPE, mode='r+', shape=(capacity,))
+        self.alive = np.memmap(self.path / 'alive.u8', dtype=np.uint8, mode='r+', shape=(capacity,))
+
+    def snapshot(self):
+        """
+        This view of the index for one query: writers in this process replace
+        meta and the maps (never mutate them in place), so a query keeps a
+        consistent set while another thread grows the files.
+        """
+        return copy.copy(self)
+
+    def refresh(self):
+        """Pick up rows appended (and files grown) by other processes."""
+        stat = os.stat(self.path / 'meta.json')
+        if (stat.st_ino, stat.st_mtime_ns) == self.meta_signature:
+            return
+        capacity = self.meta['capacity']
+        self._load_meta()
+        if self.meta['capacity'] != capacity:
+            self._map()
+
+    def _write_meta(self, **changes):
+        self.meta = dict(self.meta, **changes)
+        _write_atomic(self.path / 'meta.json', json.dumps(self.meta))
+        stat = os.stat(self.path / 'meta.json')
+        self.meta_signature = (stat.st_ino, stat.st_mtime_ns)
+
+    def _sync_ids(self):
+        if self.id_rows is None:
+            self.id_rows = {}
+            self.synced = 0
+        count = self.meta['count']
+        for row, resume_id in enumerate(self.ids[self.synced:count].tolist(), start=self.synced):
+            # A later row of the same resume replaces the earlier one
+            self.id_rows[resume_id.decode()] = row
+        self.synced = count
+        return self.id_rows
+
+    def _grow(self):
+        capacity = self.meta['capacity'] * 2
+        for name, dtype, _ in _FILES:
+            _allocate(self.path, name, dtype, self.meta['dim'], capacity)
+        self._write_meta(capacity=capacity)
+        self._map()
+
+    def upsert(self, resume_id, vector):
+        id_rows = self._sync_ids()
+        old_row = id_rows.get(resume_id)
+        if old_row is not None:
+            self.alive[old_row] = 0
+        row = self.meta['count']
+        if row == self.meta['capacity']:
+            self._grow()
+        self.vectors[row] = vector
+        self.ids[row] = resume_id.encode()
+        self.alive[row] = 1
+        self._write_meta(count=row + 1)
+        id_rows[resume_id] = row
+        self.synced = row + 1
+
+    def delete(self, resume_id):
+        row = self._sync_ids().pop(resume_id, None)
+        if row is not None:
+            self.alive[row] = 0
+        return row is not None
+
+    def _ranges(self, query, nprobe, exact):
+        count, clustered = self.meta['count'], self.meta['clustered']
+        if exact or self.centroids is None or nprobe >= len(self.centroids):
+            return [(0, count)]
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        ranges = [(int(self.offsets[i]), int(self.offsets[i + 1])) for i in lists]
+        # Rows appended since the rebuild are not in any list
+        ranges.append((clustered, count))
+        return ranges
+
+    def search(self, query, k, nprobe, exact):
+        best_scores = []
+        best_rows = []
+        for start, end in self._ranges(query, nprobe, exact):
+            for chunk_start in range(start, end, CHUNK_ROWS):
+                chunk_end = min(chunk_start + CHUNK_ROWS, end)
+                scores = self.vectors[chunk_start:chunk_end] @ query
+                scores[self.alive[chunk_start:chunk_end] == 0] = -np.inf
+                if len(scores) > k:
+                    top = np.argpartition(-scores, k - 1)[:k]
+                else:
+                    top = np.arange(len(scores))
+                best_scores.append(scores[top])
+                best_rows.append(top + chunk_start)
+        if not best_scores:
+            return []
+        scores = np.concatenate(best_scores)
+        rows = np.concatenate(best_rows)
+        order = np.argsort(-scores)[:k]
+        return [
+            (self.ids[rows[i]].decode(), float(scores[i]))
+            for i in order if np.isfinite(scores[i])
+        ]
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def _open():
+    """This process's view of the live generation, or None if no index was built."""
+    global _index
+    for _ in range(3):
+        generation = _current_generation()
+        if generation is None:
+            return None
+        try:
+            if _index is None or _index.path != index_dir() / str(generation):
+                _index = _Index(generation)
+            else:
+                _index.refresh()
+            return _index
+        except FileNotFoundError:
+            # A rebuild replaced (and removed) this generation meanwhile: reopen CURRENT
+            _index = None
+    return None
+
+
+def upsert(resume_id, vector, model):
+    """Add or replace the row of a resume; False if skipped (no index, other model, locked)."""
+    if not settings.RESUME_VECTOR_INDEX_ENABLED or _current_generation() is None:
+        return False
+    try:
+        with _lock, _write_lock(settings.RESUME_VECTOR_INDEX_LOCK_TIMEOUT):
+            index = _open()
+            if index is None or index.meta['model'] != model or index.meta['dim'] != len(vector):
+                return False
+            index.upsert(str(resume_id), normalize(vector))
+            return True
+    except TimeoutError as e:
+        logger.info("Resume index upsert of %s skipped: %s", resume_id, e)
+        return False
+
+
+def delete(resume_id):
+    """Tombstone the row of a resume; False if it was not indexed (or the index is locked)."""
+    if not settings.RESUME_VECTOR_INDEX_ENABLED or _current_generation() is None:
+        return False
+    try:
+        with _lock, _write_lock(settings.RESUME_VECTOR_INDEX_LOCK_TIMEOUT):
+            index = _open()
+            return index is not None and index.delete(str(resume_id))
+    except TimeoutError as e:
+        logger.info("Resume index delete of %s skipped: %s", resume_id, e)
+        return False
+
+
+def search(vector, k=10, nprobe=None, exact=False):
+    """
+    [(resume_id, cosine similarity)] of the k rows closest to `vector`, best
+    first. Approximate (the nprobe closest lists, default
+    RESUME_VECTOR_INDEX_NPROBE) unless `exact` or the index is not clustered.
+    """
+    with _lock:
+        index = _open()
+        index = index and index.snapshot()
+    if index is None:
+        raise IndexNotBuilt('Resume vector index has not been built')
+    nprobe = max(1, nprobe or settings.RESUME_VECTOR_INDEX_NPROBE)
+    return index.search(normalize(vector), max(1, k), nprobe, exact)
+
+
+def stats():
+    with _lock:
+        index = _open()
+        index = index and index.snapshot()
+    if index is None:
+        return {'built': False}
+    return {
+        'built': True,
+        'generation': index.generation,
+        'model': index.meta['model'],
+        'rows': index.meta['count'],
+        'live': int(np.count_nonzero(index.alive[:index.meta['count']])),
+        'clustered': index.meta['clustered'],
+        'nlist': index.meta['nlist'],
+    }
+
+
+def _kmeans(sample, nlist, seed=0):
+    """Spherical k-means centroids (unit length) of the unit-length rows of `sample`; at most one per row."""
+    nlist = min(nlist, len(sample))
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = ~sums.any(axis=1)
+        # Restart empty lists from random rows
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+def _assign(vectors, count, centroids):
+    labels = np.empty(count, dtype=np.int32)
+    for start in range(0, count, CHUNK_ROWS):
+        end = min(start + CHUNK_ROWS, count)
+        labels[start:end] = np.argmax(vectors[start:end] @ centroids.T, axis=1)
+    return labels
+
+
+def build(rows, model, dim, total, nlist=None, progress=None):
+    """
+    Write a new generation from `rows` [(resume_id, vector)] (`total` rows at
+    most) and make it the live index; returns its stats. Holds the write lock
+    throughout, so concurrent upserts are skipped rather than lost in a
+    generation that is about to be replaced.
+    """
+    with _lock, _write_lock(None):
+        generation = (_current_generation() or 0) + 1
+        path = index_dir() / str(generation)
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True)
+        capacity = max(INITIAL_CAPACITY, total + total // 4)
+
+        # Unsorted rows first, in a staging file
+        staging = np.memmap(path / 'staging.f32', dtype=np.float32, mode='w+', shape=(max(total, 1), dim))
+        staged_ids = []
+        for resume_id, vector in rows:
+            if len(staged_ids) == total:
+                break
+            staging[len(staged_ids)] = normalize(vector)
+            staged_ids.append(str(resume_id))
+            if progress and len(staged_ids) % 10000 == 0:
+                progress(len(staged_ids))
+        count = len(staged_ids)
+
+        nlist = nlist or int(np.sqrt(count))
+        clustered = count >= MIN_CLUSTERED_ROWS and nlist > 1
+        if clustered:
+            rng = np.random.default_rng(0)
+            sample_rows = np.sort(rng.choice(count, min(count, KMEANS_SAMPLE), replace=False))
+            centroids = _kmeans(np.asarray(staging[sample_rows]), nlist)
+            nlist = len(centroids)
+            labels = _assign(staging, count, centroids)
+            order = np.argsort(labels, kind='stable')
+            offsets = np.searchsorted(labels[order], np.arange(nlist + 1)).astype(np.int64)
+            np.save(path / 'centroids.npy', centroids)
+            np.save(path / 'offsets.npy', offsets)
+        else:
+            order = np.arange(count)
+
+        for name, dtype, _ in _FILES:
+            _allocate(path, name, dtype, dim, capacity)
+        vectors = np.memmap(path / 'vectors.f32', dtype=np.float32, mode='r+', shape=(capacity, dim))
+        ids = np.memmap(path / 'ids.s24', dtype=ID_DTYPE, mode='r+', shape=(capacity,))
+        alive = np.memmap(path / 'alive.u8', dtype=np.uint8, mode='r+', shape=(capacity,))
+        for start in range(0, count, CHUNK_ROWS):
+            chunk = order[start:start + CHUNK_ROWS]
+            vectors[start:start + len(chunk)] = staging[chunk]
+            ids[start:start + len(chunk)] = [staged_ids[row].encode() for row in chunk]
+        alive[:count] = 1
+        for mapped in (vectors, ids, alive):
+            mapped.flush()
+        del staging
+        os.unlink(path / 'staging.f32')
+
+        meta = {
+            'version': VERSION,
+            'model': model,
+            'dim': dim,
+            'count': count,
+            'capacity': capacity,
+            'clustered': count if clustered else 0,
+            'nlist': nlist if clustered else 0,
+        }
+        _write_atomic(path / 'meta.json', json.dumps(meta))
+        _write_atomic(index_dir() / 'CURRENT', str(generation))
+
+        # Processes still mapping an old generation keep it until their next query
+        for old in index_dir().iterdir():
+            if old.is_dir() and old.name.isdigit() and int(old.name) < generation:
+                shutil.rmtree(old, ignore_errors=True)
+    return stats()
+
+
+def rebuild(nlist=None, progress=None):
+    """Rebuild the index from every stored embedding of the current model."""
+    from . import embedding_models, resume_embeddings
+
+    model = embedding_models.default_model()
+    collection = resume_embeddings.embeddings_collection()
+    query = {'model': model}
+    first = collection.find_one(query, {'dim': 1})
+    if first is None:
+        raise IndexNotBuilt(f'No stored resume embeddings for {model}')
+    total = collection.count_documents(query)
+    rows = (
+        (document['_id'], resume_embeddings.from_binary(document['vector']))
+        for document in collection.find(query, {'vector': 1}, batch_size=1000)
+    )
+    return build(
+        rows, model, first['dim'], total,
+        nlist=nlist or settings.RESUME_VECTOR_INDEX_NLIST or None, progress=progress,
+    )
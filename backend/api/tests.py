@@ -1,9 +1,33 @@
 """
 Test cases for Resume API
 """
-from django.test import TestCase
-from rest_framework.test import APIClient
-from rest_framework import status
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from bson import ObjectId
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from pymongo import ReturnDocument
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework import serializers, status
+
+from . import (
+    embedding_models, etags, mongo, mongo_indexes, pagination, pdf_assets, pdf_bulk_export, pdf_cache, pdf_jobs,
+    pdf_metrics, pdf_thumbnails, public_profile_cache, resume_embeddings,
+    public_profile_snapshots, renderers, resume_html, resume_repository, resume_vector_index,
+)
+from .middleware import CompressionMiddleware
+from .pdf_browser_pool import BrowserPool, BrowserPoolBusy, PdfLimitExceeded, count_pages
+from .resume_patch import parse_patch_operations
+from .views.utils import utcnow_ms
 
 
 class ResumeAPITestCase(TestCase):
@@ -50,3 +74,1386 @@ class ResumeAPITestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIsInstance(response.data, list)
 
+
+
+class MongoClientPoolTestCase(SimpleTestCase):
+    """Tests for the shared per-process MongoClient in api.mongo"""
+
+    def tearDown(self):
+        mongo.close_client()
+
+    @patch('api.mongo.MongoClient')
+    def test_client_is_reused_within_process(self, mock_client):
+        first = mongo.get_client()
+        second = mongo.get_client()
+        self.assertIs(first, second)
+        self.assertEqual(mock_client.call_count, 1)
+
+    @patch('api.mongo.MongoClient')
+    def test_client_is_rebuilt_after_fork(self, mock_client):
+        mock_client.side_effect = [MagicMock(), MagicMock()]
+        parent_client = mongo.get_client()
+        with patch('api.mongo.os.getpid', return_value=os.getpid() + 1):
+            child_client = mongo.get_client()
+        self.assertIsNot(parent_client, child_client)
+        parent_client.close.assert_not_called()
+
+    def test_pool_stats_before_first_use(self):
+        stats = mongo.pool_stats()
+        self.assertFalse(stats['initialized'])
+
+
+class ResumeRepositoryTestCase(SimpleTestCase):
+    """Tests for named projections in api.resume_repository"""
+
+    def test_summary_projection_excludes_heavy_sections(self):
+        projection = resume_repository.get_projection('summary')
+        for heavy in ('work_experience', 'education', 'projects', 'styling'):
+            self.assertNotIn(heavy, projection)
+        self.assertIn('overall_score', projection)
+
+    def test_detail_projection_is_full_document(self):
+        self.assertIsNone(resume_repository.get_projection('detail'))
+
+    def test_unknown_projection_raises(self):
+        with self.assertRaises(ValueError):
+            resume_repository.get_projection('everything')
+
+    @patch('api.resume_repository.resumes_collection')
+    def test_update_for_user_is_a_single_round_trip(self, mock_collection):
+        resume_id = ObjectId()
+        resume_repository.update_for_user(resume_id, 7, {'name': 'CV'})
+        collection = mock_collection.return_value
+        collection.find_one_and_update.assert_called_once()
+        self.assertEqual(
+            collection.find_one_and_update.call_args.kwargs['return_document'],
+            ReturnDocument.AFTER,
+        )
+        collection.find_one.assert_not_called()
+        collection.update_one.assert_not_called()
+
+    def test_utcnow_ms_matches_bson_precision(self):
+        self.assertEqual(utcnow_ms().microsecond % 1000, 0)
+
+
+class KeysetPaginationTestCase(SimpleTestCase):
+    """Tests for cursor encoding in api.pagination"""
+
+    def test_cursor_round_trip(self):
+        doc = {'_id': ObjectId(), 'created_at': datetime(2024, 5, 1, 12, 30, 0, 123000)}
+        created_at, last_id = pagination.decode_cursor(pagination.encode_cursor(doc))
+        self.assertEqual(created_at, doc['created_at'])
+        self.assertEqual(last_id, doc['_id'])
+
+    def test_cursor_without_created_at(self):
+        doc = {'_id': ObjectId()}
+        created_at, last_id = pagination.decode_cursor(pagination.encode_cursor(doc))
+        self.assertIsNone(created_at)
+        self.assertEqual(pagination.keyset_filter(created_at, last_id), {
+            'created_at': None,
+            '_id': {'$lt': last_id},
+        })
+
+    def test_malformed_cursor_is_rejected(self):
+        with self.assertRaises(pagination.InvalidPageParams):
+            pagination.decode_cursor('not-a-cursor')
+
+    def test_fetch_page_detects_next_page(self):
+        docs = [{'_id': ObjectId(), 'created_at': datetime(2024, 1, day)} for day in (3, 2, 1)]
+        collection = MagicMock()
+        collection.find.return_value.sort.return_value.limit.return_value = docs
+        page, next_cursor = pagination.fetch_page(collection, {'user_id': 1}, 2)
+        self.assertEqual(page, docs[:2])
+        self.assertEqual(pagination.decode_cursor(next_cursor)[1], docs[1]['_id'])
+
+
+class EnsureIndexesTestCase(SimpleTestCase):
+    """Tests for api.mongo_indexes"""
+
+    def _db_with_indexes(self, index_information):
+        collection = MagicMock()
+        collection.index_information.return_value = index_information
+        db = MagicMock()
+        db.__getitem__.return_value = collection
+        return db, collection
+
+    def test_existing_key_pattern_is_not_recreated(self):
+        db, collection = self._db_with_indexes({
+            '_id_': {'key': [('_id', 1)]},
+            'djongo_name': {'key': [('id', 1.0), ('language', 1.0)]},
+        })
+        report = mongo_indexes.ensure_indexes(db)
+        self.assertIn(('blog_posts', 'djongo_name', 'exists'), report)
+        created_keys = [c.args[0] for c in collection.create_index.call_args_list]
+        self.assertNotIn([('id', 1), ('language', 1)], created_keys)
+
+    def test_dry_run_creates_nothing(self):
+        db, collection = self._db_with_indexes({'_id_': {'key': [('_id', 1)]}})
+        report = mongo_indexes.ensure_indexes(db, dry_run=True)
+        collection.create_index.assert_not_called()
+        self.assertTrue(all(action == 'missing' for _, _, action in report))
+
+    def test_collscan_detected_in_nested_plan(self):
+        plan = {'stage': 'SORT', 'inputStage': {'stage': 'SUBPLAN', 'inputStages': [{'stage': 'COLLSCAN'}]}}
+        self.assertIn('COLLSCAN', list(mongo_indexes._plan_stages(plan)))
+
+
+class ResumePatchTestCase(SimpleTestCase):
+    """Tests for PATCH path validation in api.resume_patch"""
+
+    def test_nested_path_validates_only_touched_field(self):
+        set_fields, array_paths = parse_patch_operations([
+            {'path': 'work_experience.2.description', 'value': 'Led a team'},
+            {'path': 'personal_info.professional_title', 'value': 'Engineer'},
+        ])
+        self.assertEqual(set_fields['work_experience.2.description'], 'Led a team')
+        self.assertEqual(array_paths, ['work_experience.2'])
+
+    def test_invalid_value_is_rejected(self):
+        with self.assertRaises(serializers.ValidationError):
+            parse_patch_operations([{'path': 'personal_info.email', 'value': 'not-an-email'}])
+
+    def test_unknown_and_read_only_paths_are_rejected(self):
+        for path in ('work_experience.2.salary', 'created_at', 'work_experience.first', 'user_id'):
+            with self.assertRaises(serializers.ValidationError):
+                parse_patch_operations([{'path': path, 'value': 'x'}])
+
+    def test_overlapping_paths_are_rejected(self):
+        with self.assertRaises(serializers.ValidationError):
+            parse_patch_operations([
+                {'path': 'skills', 'value': []},
+                {'path': 'skills.0.skill', 'value': 'Python'},
+            ])
+
+    def test_styling_keys_are_free_form(self):
+        set_fields, _ = parse_patch_operations([{'path': 'styling.font_size', 'value': 'large'}])
+        self.assertEqual(set_fields, {'styling.font_size': 'large'})
+
+
+class ResumeETagTestCase(SimpleTestCase):
+    """Tests for conditional request helpers in api.etags"""
+
+    def setUp(self):
+        self.resume_id = ObjectId()
+        self.doc = {'_id': self.resume_id, 'updated_at': datetime(2024, 3, 2, 10, 0, 0, 250000)}
+
+    def _request(self, **headers):
+        request = MagicMock()
+        request.META = headers
+        return request
+
+    def test_if_none_match_accepts_weak_form(self):
+        etag = etags.resume_etag(self.doc)
+        self.assertTrue(etags.none_match(self._request(HTTP_IF_NONE_MATCH=f'W/{etag}'), etag))
+        self.assertFalse(etags.none_match(self._request(HTTP_IF_NONE_MATCH='"other"'), etag))
+
+    def test_if_match_round_trips_updated_at(self):
+        request = self._request(HTTP_IF_MATCH=etags.resume_etag(self.doc))
+        self.assertEqual(
+            etags.if_match_filter(request, self.resume_id),
+            {'updated_at': {'$in': [self.doc['updated_at']]}},
+        )
+
+    def test_if_match_for_another_resume_fails(self):
+        other = etags.resume_etag({'_id': ObjectId(), 'updated_at': self.doc['updated_at']})
+        with self.assertRaises(etags.PreconditionFailed):
+            etags.if_match_filter(self._request(HTTP_IF_MATCH=other), self.resume_id)
+
+    def test_missing_if_match_has_no_precondition(self):
+        self.assertIsNone(etags.if_match_filter(self._request(), self.resume_id))
+
+
+@override_settings(PUBLIC_PROFILE_CACHE_SIZE=2, PUBLIC_PROFILE_CACHE_LOCAL_TTL=60)
+class PublicProfileCacheTestCase(SimpleTestCase):
+    """Tests for the per-process tier of api.public_profile_cache"""
+
+    def setUp(self):
+        public_profile_cache.clear()
+        self.loader = MagicMock(side_effect=lambda resume_id: ('"etag"', {'id': resume_id}))
+
+    def test_second_read_is_a_local_hit(self):
+        public_profile_cache.get_or_load('a', self.loader)
+        self.assertEqual(public_profile_cache.get_or_load('a', self.loader), ('"etag"', {'id': 'a'}))
+        self.assertEqual(self.loader.call_count, 1)
+        self.assertEqual(public_profile_cache.stats()['local_hits'], 1)
+
+    def test_invalidate_forces_reload(self):
+        public_profile_cache.get_or_load('a', self.loader)
+        public_profile_cache.invalidate('a')
+        public_profile_cache.get_or_load('a', self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for resume_id in ('a', 'b', 'a', 'c'):
+            public_profile_cache.get_or_load(resume_id, self.loader)
+        public_profile_cache.get_or_load('b', self.loader)
+        self.assertEqual([c.args[0] for c in self.loader.call_args_list], ['a', 'b', 'c', 'b'])
+
+    def test_not_public_is_cached_as_none(self):
+        loader = MagicMock(return_value=None)
+        self.assertIsNone(public_profile_cache.get_or_load('x', loader))
+        self.assertIsNone(public_profile_cache.get_or_load('x', loader))
+        self.assertEqual(loader.call_count, 1)
+
+
+class PublicProfileSnapshotTestCase(SimpleTestCase):
+    """Tests for api.public_profile_snapshots file handling"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(PUBLIC_PROFILE_SNAPSHOT_DIR=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.doc = {
+            '_id': ObjectId(),
+            'personal_info': {'first_name': 'Ada'},
+            'public_profile_enabled': True,
+            'created_at': datetime(2024, 1, 1),
+            'updated_at': datetime(2024, 1, 2),
+        }
+        self.stored = {'_id': self.doc['_id'], 'updated_at': self.doc['updated_at']}
+        patcher = patch.object(resume_repository, 'find_public', side_effect=lambda *args, **kwargs: self.stored)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_snapshot_is_the_public_api_payload(self):
+        public_profile_snapshots.write_snapshot_from_doc(self.doc)
+        path = public_profile_snapshots.snapshot_path(self.doc['_id'])
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual(data['id'], str(self.doc['_id']))
+        self.assertEqual(data['personal_info']['first_name'], 'Ada')
+        self.assertEqual(os.listdir(self.tmp.name), [path.name])
+
+    def test_rebuild_removes_snapshot_of_private_profile(self):
+        public_profile_snapshots.write_snapshot_from_doc(self.doc)
+        with patch.object(resume_repository, 'find_public', return_value=None):
+            self.assertFalse(public_profile_snapshots.rebuild_snapshot(str(self.doc['_id'])))
+        self.assertFalse(public_profile_snapshots.snapshot_path(self.doc['_id']).exists())
+
+    def test_stale_read_does_not_restore_a_disabled_profile(self):
+        # Profile disabled after the rebuild read the document
+        self.stored = None
+        self.assertIsNone(public_profile_snapshots.write_snapshot_from_doc(self.doc))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_snapshot_disabled_during_the_write_is_removed(self):
+        checks = iter([self.stored, None])
+        with patch.object(resume_repository, 'find_public', side_effect=lambda *args, **kwargs: next(checks)):
+            self.assertIsNone(public_profile_snapshots.write_snapshot_from_doc(self.doc))
+        self.assertFalse(public_profile_snapshots.snapshot_path(self.doc['_id']).exists())
+
+    def test_older_revision_is_not_written(self):
+        self.stored = dict(self.stored, updated_at=datetime(2024, 1, 3))
+        self.assertIsNone(public_profile_snapshots.write_snapshot_from_doc(self.doc))
+        self.assertFalse(public_profile_snapshots.snapshot_path(self.doc['_id']).exists())
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    """Tests for api.renderers.FastJSONRenderer"""
+
+    def test_native_mongo_types(self):
+        oid = ObjectId()
+        body = renderers.FastJSONRenderer().render({
+            'id': oid,
+            'updated_at': datetime(2024, 1, 2, 3, 4, 5, 678000),
+            'score': Decimal('0.5'),
+            'name': 'Zoë',
+        })
+        self.assertEqual(json.loads(body), {
+            'id': str(oid),
+            'updated_at': '2024-01-02T03:04:05.678000',
+            'score': 0.5,
+            'name': 'Zoë',
+        })
+
+    def test_matches_stock_renderer_for_plain_data(self):
+        data = {'a': [1, 2.5, None, True], 'b': {'c': 'line\u2028sep'}}
+        self.assertEqual(
+            json.loads(renderers.FastJSONRenderer().render(data)),
+            json.loads(renderers.JSONRenderer().render(data)),
+        )
+
+
+@override_settings(API_COMPRESSION_MIN_BYTES=100)
+class CompressionMiddlewareTestCase(SimpleTestCase):
+    """Tests for api.middleware.CompressionMiddleware"""
+
+    def _response(self, body=b'{"k": "' + b'x' * 500 + b'"}'):
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = '"abc-1"'
+        return response
+
+    def _process(self, accept_encoding, response=None):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        middleware = CompressionMiddleware(lambda r: response or self._response())
+        return middleware(request)
+
+    def test_gzip_keeps_strong_etag_with_suffix(self):
+        with patch('api.middleware.brotli', None):
+            response = self._process('gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], '"abc-1-gzip"')
+        self.assertEqual(etags.parse_etag_list(response['ETag']), [('"abc-1"', False)])
+
+    def test_small_or_unaccepted_bodies_are_untouched(self):
+        self.assertFalse(self._process('gzip', self._response(b'{}')).has_header('Content-Encoding'))
+        self.assertFalse(self._process('identity, gzip;q=0').has_header('Content-Encoding'))
+
+
+class _FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def emulate_media(self, media):
+        pass
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def set_content(self, html, wait_until):
+        if 'fail' in html:
+            raise RuntimeError('render failed')
+        self.html = html
+
+    async def pdf(self, **options):
+        self.options = options
+        return b'%PDF' + b'<< /Type /Page >>' * self.html.count('<section>')
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.closed = False
+        self.pages = []
+
+    def is_connected(self):
+        return not self.closed
+
+    async def new_page(self):
+        self.pages.append(_FakePage())
+        return self.pages[-1]
+
+    async def close(self):
+        self.closed = True
+
+
+class BrowserPoolTestCase(SimpleTestCase):
+    """Tests for api.pdf_browser_pool.BrowserPool with a fake Chromium"""
+
+    def setUp(self):
+        self.pool = BrowserPool(size=1, max_renders=3)
+        self.addCleanup(self.pool._loop.call_soon_threadsafe, self.pool._loop.stop)
+        self.browsers = []
+
+        async def launch():
+            self.browsers.append(_FakeBrowser())
+            return self.browsers[-1]
+
+        self.pool._playwright = MagicMock()
+        self.pool._playwright.chromium.launch = launch
+
+    def test_pages_are_reused_and_browser_recycled(self):
+        for _ in range(4):
+            self.assertEqual(self.pool.render('<p>hi</p>', 1, 5), b'%PDF')
+        self.assertEqual(len(self.browsers), 2)
+        self.assertEqual(len(self.browsers[0].pages), 1)
+        self.assertEqual(self.pool.stats()['recycles'], 1)
+
+    def test_failed_page_is_not_reused(self):
+        with self.assertRaises(RuntimeError):
+            self.pool.render('fail', 1, 5)
+        self.pool.render('<p>ok</p>', 1, 5)
+        self.assertEqual(len(self.browsers[0].pages), 2)
+        self.assertTrue(self.browsers[0].pages[0].closed)
+
+    def test_crashed_browser_is_relaunched(self):
+        self.pool.render('<p>ok</p>', 1, 5)
+        self.browsers[0].closed = True
+        self.pool.render('<p>ok</p>', 1, 5)
+        self.assertEqual(len(self.browsers), 2)
+        self.assertEqual(self.pool.stats()['crashes'], 1)
+
+    def test_render_stages_are_timed(self):
+        timings = pdf_metrics.RenderTimings()
+        self.pool.render('<p>hi</p>', 1, 5, timings=timings)
+        self.assertTrue({'acquire', 'launch', 'page', 'set_content', 'pdf', 'limits'} <= set(timings.stages))
+        self.pool.render('<p>hi</p>', 1, 5, timings=timings)
+        self.assertEqual(len(self.browsers), 1)
+
+    @override_settings(PDF_MAX_PAGES=2, PDF_MAX_BYTES=0)
+    def test_pdf_over_page_limit_is_rejected(self):
+        self.assertEqual(count_pages(self.pool.render('<section>' * 2, 1, 5)), 2)
+        self.assertEqual(self.browsers[0].pages[0].options['page_ranges'], '1-3')
+        with self.assertRaisesMessage(PdfLimitExceeded, 'more than 2 pages'):
+            self.pool.render('<section>' * 5, 1, 5)
+        self.assertEqual(self.pool.stats()['limit_rejections'], 1)
+
+    @override_settings(PDF_MAX_PAGES=0, PDF_MAX_BYTES=10)
+    def test_pdf_over_byte_limit_is_rejected(self):
+        with self.assertRaises(PdfLimitExceeded):
+            self.pool.render('<section>', 1, 5)
+
+    def test_busy_when_no_slot_frees_up(self):
+        self.pool._slots.acquire()
+        with self.assertRaises(BrowserPoolBusy):
+            self.pool.render('<p>hi</p>', acquire_timeout=0.01)
+        with self.assertRaises(BrowserPoolBusy):
+            asyncio.run(self.pool.render_async('<p>hi</p>', acquire_timeout=0.05))
+        self.pool._slots.release()
+
+    def test_async_renders_share_the_pool(self):
+        async def render_all():
+            return await asyncio.gather(*(self.pool.render_async('<p>hi</p>', 1, 5) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(render_all()), [b'%PDF'] * 3)
+        self.assertEqual(self.pool.stats()['renders'], 3)
+        self.assertEqual(self.pool.stats()['active'], 0)
+
+
+class PdfResponseTestCase(SimpleTestCase):
+    """Tests for the PDF download responses in api.views.pdf_views"""
+
+    def test_rendered_pdf_is_sent_without_copying(self):
+        from .views.pdf_views import _pdf_bytes_response
+        pdf_bytes = b'%PDF-1.4 ' + b'x' * 100
+        response = _pdf_bytes_response(pdf_bytes, 'abc')
+        self.assertIn('attachment; filename="resume_abc.pdf"', response['Content-Disposition'])
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIs(response._container[0], pdf_bytes)
+
+
+class PdfAsyncViewTestCase(SimpleTestCase):
+    """Tests for the async export view (api.views.pdf_views.generate_resume_pdf_async)"""
+
+    def setUp(self):
+        from .views import pdf_views
+        self.resume_id = ObjectId()
+        self.user = MagicMock(id=5)
+
+        async def authenticated_user(request):
+            return self.user if 'HTTP_AUTHORIZATION' in request.META else None
+
+        self.renders = []
+
+        async def render(html_content, acquire_timeout=None, timings=None):
+            self.renders.append(html_content)
+            return b'%PDF-1.4 async'
+
+        for name, value in (
+            ('_authenticated_user', authenticated_user),
+            ('render_async_pdf', render),
+        ):
+            patcher = patch.object(pdf_views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(resume_repository, 'find_one_for_user', return_value={
+            '_id': self.resume_id, 'user_id': 5, 'personal_info': {'first_name': 'Ada'},
+        })
+        self.find = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.url = f'/api/resumes/{self.resume_id}/pdf/async/'
+
+    @override_settings(PDF_CACHE_ENABLED=False)
+    def test_renders_stored_resume(self):
+        response = self.client.get(self.url + '?template=classic', HTTP_AUTHORIZATION='Bearer x')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(b'%PDF-1.4 async')))
+        self.assertEqual(response.content, b'%PDF-1.4 async')
+        self.assertIn('html;dur=', response['Server-Timing'])
+        self.assertIn('Ada', self.renders[0])
+        self.find.assert_called_once_with(self.resume_id, 5)
+
+    def test_requires_authentication_and_get(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.post(self.url, HTTP_AUTHORIZATION='Bearer x').status_code, 405)
+
+    def test_unknown_template_is_rejected(self):
+        response = self.client.get(self.url + '?template=nope', HTTP_AUTHORIZATION='Bearer x')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('modern', response.json()['templates'])
+
+
+class PdfMetricsTestCase(SimpleTestCase):
+    """Tests for api.pdf_metrics"""
+
+    def setUp(self):
+        pdf_metrics.reset()
+        self.addCleanup(pdf_metrics.reset)
+        self.documents = {}
+        collection = MagicMock()
+        collection.update_one.side_effect = self._update_one
+        collection.find.return_value.sort.side_effect = lambda *args: [
+            self.documents[key] for key in sorted(self.documents)
+        ]
+        for name, value in (('metrics_collection', MagicMock(return_value=collection)), ('_ensure_flusher', MagicMock())):
+            patcher = patch.object(pdf_metrics, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _update_one(self, query, update, upsert=False):
+        """Apply a dotted-path $inc like Mongo would."""
+        document = self.documents.setdefault(query['_id'], {'_id': query['_id']})
+        for path, value in update['$inc'].items():
+            *parents, key = path.split('.')
+            node = document
+            for parent in parents:
+                node = node.setdefault(parent, {})
+            node[key] = node.get(key, 0) + value
+
+    def test_server_timing_lists_stages_in_pipeline_order(self):
+        timings = pdf_metrics.RenderTimings()
+        timings.add('pdf', 0.2)
+        timings.add('html', 0.0125)
+        response = timings.apply(HttpResponse())
+        header = response['Server-Timing']
+        self.assertTrue(header.startswith('html;dur=12.5, pdf;dur=200.0, total;dur='))
+
+    def test_finished_timings_feed_histograms_once(self):
+        timings = pdf_metrics.RenderTimings()
+        timings.add('set_content', 0.3)
+        timings.finish()
+        timings.finish()
+        pdf_metrics.count('timeouts')
+        summary = pdf_metrics.summary()
+        self.assertEqual(summary['stages']['set_content'], {'count': 1, 'avg_ms': 300.0})
+        self.assertEqual(summary['events']['timeouts'], 1)
+
+        text = pdf_metrics.prometheus_text()
+        self.assertIn('pdf_stage_seconds_bucket{source="api",stage="set_content",le="0.25"} 0', text)
+        self.assertIn('stage="set_content",le="0.5"} 1', text)
+        self.assertIn('stage="set_content",le="+Inf"} 1', text)
+        self.assertIn('pdf_events_total{source="api",event="timeouts"} 1', text)
+        self.assertNotIn('process=', text)
+
+    def test_totals_of_all_processes_are_exported(self):
+        pdf_metrics.observe('pdf', 0.2)
+        pdf_metrics.count('renders')
+        self.assertTrue(pdf_metrics.flush())
+        # Another worker process flushed into the same totals
+        pdf_metrics.observe('pdf', 0.2)
+        pdf_metrics.count('renders')
+        self.assertTrue(pdf_metrics.flush())
+        # The render worker reports under its own source
+        pdf_metrics.set_source('worker')
+        self.addCleanup(pdf_metrics.set_source, 'api')
+        pdf_metrics.count('renders', 5)
+        text = pdf_metrics.prometheus_text()
+        self.assertIn('pdf_stage_seconds_count{source="api",stage="pdf"} 2', text)
+        self.assertIn('pdf_events_total{source="api",event="renders"} 2', text)
+        self.assertIn('pdf_events_total{source="worker",event="renders"} 5', text)
+        self.assertTrue(pdf_metrics.flush())
+
+    def test_failed_flush_keeps_metrics_for_the_next_one(self):
+        from pymongo.errors import PyMongoError
+
+        pdf_metrics.count('busy')
+        with patch.object(pdf_metrics, 'metrics_collection', side_effect=PyMongoError('down')):
+            self.assertFalse(pdf_metrics.flush())
+        pdf_metrics.flush()
+        self.assertEqual(self.documents['api']['events'], {'busy': 1})
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_endpoint_needs_token(self):
+        self.assertEqual(self.client.get('/api/metrics/pdf/').status_code, 403)
+        response = self.client.get('/api/metrics/pdf/', HTTP_X_METRICS_TOKEN='s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'pdf_events_total', response.content)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_health_check_shows_internals_only_with_token(self):
+        with patch('api.views.health_views.pool_stats', return_value={}):
+            public = self.client.get('/api/health/').json()
+            internal = self.client.get('/api/health/', HTTP_X_METRICS_TOKEN='s3cret').json()
+        self.assertEqual(public['status'], 'healthy')
+        for key in ('mongo_pool', 'pdf_cache', 'pdf_metrics', 'embedding_models'):
+            self.assertNotIn(key, public)
+            self.assertIn(key, internal)
+
+
+class PdfJobQueueTestCase(SimpleTestCase):
+    """Tests for api.pdf_jobs against a mocked pdf_jobs collection"""
+
+    def setUp(self):
+        self.collection = MagicMock()
+        patcher = patch.object(pdf_jobs, 'jobs_collection', return_value=self.collection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_claim_takes_oldest_queued_job_atomically(self):
+        pdf_jobs.claim_next('host:1')
+        args, kwargs = self.collection.find_one_and_update.call_args
+        self.assertEqual(args[0], {'status': pdf_jobs.QUEUED})
+        self.assertEqual(args[1]['$set']['status'], pdf_jobs.RUNNING)
+        self.assertEqual(args[1]['$inc'], {'attempts': 1})
+        self.assertEqual(kwargs['sort'], [('created_at', 1)])
+        self.assertEqual(kwargs['return_document'], ReturnDocument.AFTER)
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        job = {'_id': ObjectId(), 'attempts': 1}
+        pdf_jobs.fail(job, RuntimeError('boom'))
+        self.assertEqual(self.collection.update_one.call_args[0][1]['$set']['status'], pdf_jobs.QUEUED)
+        job['attempts'] = pdf_jobs.MAX_ATTEMPTS
+        pdf_jobs.fail(job, RuntimeError('boom'))
+        update = self.collection.update_one.call_args[0][1]
+        self.assertEqual(update['$set']['status'], pdf_jobs.FAILED)
+        self.assertIn('html', update['$unset'])
+
+    def test_job_without_retry_fails_at_once(self):
+        pdf_jobs.fail({'_id': ObjectId(), 'attempts': 1}, PdfLimitExceeded('too long'), retry=False)
+        self.assertEqual(self.collection.update_one.call_args[0][1]['$set']['status'], pdf_jobs.FAILED)
+
+    def test_submitted_job_does_not_echo_html(self):
+        job = pdf_jobs.submit(7, 'abc', '<html></html>')
+        self.assertNotIn('html', job)
+        self.assertEqual(job['status'], pdf_jobs.QUEUED)
+        self.assertGreater(job['expires_at'], job['created_at'])
+
+    def test_thumbnail_jobs_coalesce_per_resume(self):
+        pdf_jobs.submit_thumbnails(7, 'abc')
+        args, kwargs = self.collection.update_one.call_args
+        self.assertEqual(args[0], {'kind': pdf_jobs.THUMBNAILS, 'resume_id': 'abc', 'status': pdf_jobs.QUEUED})
+        self.assertIn('$setOnInsert', args[1])
+        self.assertTrue(kwargs['upsert'])
+
+    def test_results_are_not_readable_by_other_users(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(PDF_JOB_RESULTS_DIR=os.path.join(directory, 'pdf-jobs')):
+            job_id = ObjectId()
+            pdf_jobs.complete(job_id, b'%PDF-1.7')
+            self.assertEqual(os.stat(pdf_jobs.results_dir()).st_mode & 0o777, 0o700)
+            self.assertEqual(pdf_jobs.result_path(job_id).read_bytes(), b'%PDF-1.7')
+
+
+@override_settings(PDF_CACHE_ENABLED=False)
+class PdfBulkExportTestCase(SimpleTestCase):
+    """Tests for api.pdf_bulk_export with a mocked cursor and browser pool"""
+
+    def setUp(self):
+        self.docs = [
+            {'_id': ObjectId(), 'user_id': 7, 'name': 'Backend / CV', 'personal_info': {'first_name': 'Ada'}},
+            {'_id': ObjectId(), 'user_id': 7, 'name': 'Broken', 'personal_info': {}},
+            {'_id': ObjectId(), 'user_id': 8, 'personal_info': {'first_name': 'Bob'}},
+        ]
+        self.collection = MagicMock()
+        self.collection.count_documents.return_value = len(self.docs)
+        self.collection.find.return_value.sort.return_value.batch_size.return_value = iter(self.docs)
+        patcher = patch.object(resume_repository, 'resumes_collection', return_value=self.collection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.pool = MagicMock(size=2)
+
+        def render(html_content, acquire_timeout=None):
+            if 'Broken' in html_content:
+                raise RuntimeError('render failed')
+            return b'%PDF-1.4 ' + html_content[:20].encode()
+
+        self.pool.render.side_effect = render
+
+    def test_export_query_combines_users_and_resumes(self):
+        resume_id = ObjectId()
+        self.assertEqual(resume_repository.export_query([7], []), {'user_id': {'$in': [7]}})
+        self.assertEqual(
+            resume_repository.export_query([7], [resume_id]),
+            {'$or': [{'user_id': {'$in': [7]}}, {'_id': {'$in': [resume_id]}}]},
+        )
+        with self.assertRaises(ValueError):
+            resume_repository.export_query([], [])
+
+    def test_zip_contains_rendered_pdfs_and_errors(self):
+        self.docs[1]['personal_info'] = {'first_name': 'Broken'}
+        buffer = io.BytesIO()
+        reports = []
+        stats = pdf_bulk_export.export_zip(buffer, self.pool, user_ids=[7, 8], progress=reports.append)
+
+        self.assertEqual((stats['total'], stats['exported'], stats['failed']), (3, 2, 1))
+        self.assertEqual(reports[-1], stats)
+        with zipfile.ZipFile(buffer) as archive:
+            names = archive.namelist()
+            self.assertIn(f"7/{self.docs[0]['_id']}-Backend-CV.pdf", names)
+            self.assertIn(f"8/{self.docs[2]['_id']}-resume.pdf", names)
+            self.assertIn(str(self.docs[1]['_id']), archive.read('errors.txt').decode())
+        self.collection.find.return_value.sort.return_value.batch_size.assert_called_once_with(
+            pdf_bulk_export.BATCH_SIZE)
+
+    def test_invalid_resume_id_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, "Invalid resume ID 'nope'"):
+            pdf_bulk_export.parse_resume_ids(['nope'])
+
+
+class PdfCacheTestCase(SimpleTestCase):
+    """Tests for api.pdf_cache"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(PDF_CACHE_DIR=self.tmp.name, PDF_CACHE_ENABLED=True, PDF_CACHE_MAX_BYTES=250)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_key_depends_on_html_only(self):
+        self.assertEqual(pdf_cache.cache_key('<p>a</p>'), pdf_cache.cache_key('<p>a</p>'))
+        self.assertNotEqual(pdf_cache.cache_key('<p>a</p>'), pdf_cache.cache_key('<p>b</p>'))
+
+    def test_store_then_hit(self):
+        key = pdf_cache.cache_key('<p>a</p>')
+        self.assertIsNone(pdf_cache.open_cached(key))
+        pdf_cache.store(key, b'%PDF-1')
+        with pdf_cache.open_cached(key) as f:
+            self.assertEqual(f.read(), b'%PDF-1')
+
+    def test_least_recently_used_pdf_is_evicted(self):
+        keys = [pdf_cache.cache_key(str(n)) for n in range(3)]
+        for age, key in enumerate(keys):
+            pdf_cache.store(key, b'x' * 100)
+            path = pdf_cache._path(key)
+            os.utime(path, (1000 + age, 1000 + age))
+        pdf_cache.evict()
+        self.assertIsNone(pdf_cache.open_cached(keys[0]))
+        for key in keys[1:]:
+            with pdf_cache.open_cached(key) as f:
+                self.assertEqual(len(f.read()), 100)
+
+
+class EmbeddingModelsTestCase(SimpleTestCase):
+    """Tests for api.embedding_models"""
+
+    def setUp(self):
+        import numpy as np
+
+        self.loads = []
+        self.model = MagicMock()
+        self.model.encode.side_effect = lambda texts, **kwargs: np.array([[1.0, 0.0]] * len(texts))
+
+        def sentence_transformer(name):
+            self.loads.append(name)
+            return self.model
+
+        self.torch = MagicMock()
+        modules = patch.dict(sys.modules, {
+            'sentence_transformers': MagicMock(SentenceTransformer=sentence_transformer),
+            'torch': self.torch,
+        })
+        modules.start()
+        self.addCleanup(modules.stop)
+        for name, value in (('_models', {}), ('_load_seconds', {}), ('_warm', set()), ('_configured_pid', None)):
+            patcher = patch.object(embedding_models, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @override_settings(MATCH_EMBEDDING_MODEL='test-model', EMBEDDING_TORCH_THREADS=2)
+    def test_model_is_loaded_and_warmed_once_per_process(self):
+        embedding_models.encode(['a', 'b'])
+        embeddings = embedding_models.encode(['c'])
+        self.assertEqual(embeddings.shape, (1, 2))
+        self.assertEqual(self.loads, ['test-model'])
+        self.torch.set_num_threads.assert_called_once_with(2)
+        # One warm-up plus the two real calls
+        self.assertEqual(self.model.encode.call_count, 3)
+        self.assertTrue(embedding_models.stats()['models']['test-model']['warm'])
+
+    @override_settings(MATCH_EMBEDDING_MODEL='test-model', EMBEDDING_TORCH_THREADS=2)
+    def test_preload_loads_without_inference(self):
+        embedding_models.preload()
+        self.model.encode.assert_not_called()
+        self.torch.set_num_threads.assert_called_once_with(1)
+        embedding_models.warm_up()
+        self.assertEqual(self.loads, ['test-model'])
+        self.model.encode.assert_called_once()
+        self.torch.set_num_threads.assert_called_with(2)
+
+    def test_match_uses_shared_model(self):
+        from .views.match_views import _match_with_embeddings
+        with patch.object(resume_embeddings, 'get_or_compute', return_value=[1.0, 0.0]) as stored:
+            response = _match_with_embeddings({'_id': ObjectId()}, 'Python developer', 'Engineer', 'Python', 'abc')
+        self.assertEqual(response.data['similarity'], 1.0)
+        self.assertEqual(len(self.loads), 1)
+        stored.assert_called_once()
+        # Warm-up plus the job description only
+        self.assertEqual(self.model.encode.call_count, 2)
+
+
+class ResumeEmbeddingsTestCase(SimpleTestCase):
+    """Tests for api.resume_embeddings against a mocked collection"""
+
+    def setUp(self):
+        import numpy as np
+
+        self.collection = MagicMock()
+        self.collection.find.return_value = []
+        self.encode = MagicMock(side_effect=lambda texts: np.ones((len(texts), 4)))
+        for target, name, value in (
+            (resume_embeddings, 'embeddings_collection', MagicMock(return_value=self.collection)),
+            (embedding_models, 'encode', self.encode),
+            (embedding_models, 'default_model', MagicMock(return_value='test-model')),
+        ):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.doc = {'_id': ObjectId(), 'updated_at': datetime(2024, 1, 1)}
+
+    def _stored(self, **fields):
+        document = {
+            '_id': self.doc['_id'], 'updated_at': self.doc['updated_at'], 'model': 'test-model',
+            'text_hash': resume_embeddings.text_hash('Python'), 'vector': resume_embeddings.to_binary([0.5] * 4),
+        }
+        document.update(fields)
+        return document
+
+    def test_missing_embedding_is_encoded_and_stored_as_float32(self):
+        vector = resume_embeddings.get_or_compute(self.doc, 'Python')
+        self.assertEqual(vector.dtype, resume_embeddings.DTYPE)
+        self.encode.assert_called_once_with(['Python'])
+        query, document = self.collection.replace_one.call_args[0]
+        self.assertEqual(query['_id'], self.doc['_id'])
+        self.assertEqual(len(document['vector']), 16)
+        self.assertEqual(document['dim'], 4)
+
+    def test_current_revision_is_not_encoded(self):
+        self.collection.find.return_value = [self._stored()]
+        vector = resume_embeddings.get_or_compute(self.doc, 'Python')
+        self.assertEqual(list(vector), [0.5] * 4)
+        self.encode.assert_not_called()
+
+    def test_new_revision_with_same_text_is_rekeyed(self):
+        self.collection.find.return_value = [self._stored(updated_at=datetime(2023, 1, 1))]
+        resume_embeddings.get_or_compute(self.doc, 'Python')
+        self.encode.assert_not_called()
+        query, update = self.collection.update_one.call_args[0]
+        self.assertEqual(update, {'$set': {'updated_at': self.doc['updated_at']}})
+        # Only moves forward: a stale reader cannot re-key a newer revision back
+        self.assertEqual(query['$or'][0], {'updated_at': {'$lte': self.doc['updated_at']}})
+
+    def test_changed_text_or_model_is_reencoded(self):
+        self.collection.find.return_value = [self._stored(updated_at=datetime(2023, 1, 1))]
+        resume_embeddings.get_or_compute(self.doc, 'Python and Go')
+        self.collection.find.return_value = [self._stored(model='old-model')]
+        resume_embeddings.get_or_compute(self.doc, 'Python')
+        self.assertEqual(self.encode.call_count, 2)
+
+    def test_many_reads_once_and_encodes_stale_rows_in_one_batch(self):
+        other = {'_id': ObjectId(), 'updated_at': datetime(2024, 1, 1)}
+        self.collection.find.return_value = [self._stored()]
+        matrix = resume_embeddings.get_or_compute_many([self.doc, other], ['Python', 'Go'])
+        self.assertEqual(matrix.shape, (2, 4))
+        self.assertEqual(list(matrix[0]), [0.5] * 4)
+        self.collection.find.assert_called_once()
+        self.encode.assert_called_once_with(['Go'])
+
+
+class MatchBatchTestCase(SimpleTestCase):
+    """Tests for POST /resumes/<id>/match/batch/ (api.views.match_views.match_resume_to_jobs)"""
+
+    def setUp(self):
+        import numpy as np
+
+        self.resume_id = str(ObjectId())
+        self.encode = MagicMock(side_effect=lambda texts: np.array(
+            [[1.0, 0.0] if 'python' in text.lower() else [0.0, 1.0] for text in texts]
+        ))
+        for target, name, value in (
+            (resume_repository, 'find_one_for_user', MagicMock(return_value={
+                '_id': ObjectId(self.resume_id), 'skills': [{'skill': 'Python'}],
+            })),
+            (resume_embeddings, 'get_or_compute', MagicMock(return_value=np.array([1.0, 0.0], dtype=np.float32))),
+            (embedding_models, 'encode', self.encode),
+        ):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _post(self, body):
+        from .views.match_views import match_resume_to_jobs
+        request = APIRequestFactory().post(f'/api/resumes/{self.resume_id}/match/batch/', body, format='json')
+        force_authenticate(request, user=MagicMock(id=5, is_authenticated=True))
+        return match_resume_to_jobs(request, self.resume_id)
+
+    def test_jobs_are_encoded_in_one_batch_and_ranked(self):
+        response = self._post({'jobs': [
+            {'title': 'Designer', 'description': 'Figma'},
+            {'title': 'Backend', 'description': 'Python services'},
+            'Sales',
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.encode.assert_called_once_with(['Figma', 'Python services', 'Sales'])
+        results = response.data['results']
+        self.assertEqual(results[0], {'index': 1, 'job_title': 'Backend', 'similarity': 1.0, 'match_percentage': 100.0})
+        self.assertEqual(results[1]['similarity'], 0.0)
+
+    @override_settings(MATCH_BATCH_MAX_JOBS=2)
+    def test_invalid_batches_are_rejected(self):
+        for body in ({}, {'jobs': []}, {'jobs': ['a', 'b', 'c']}, {'jobs': [{'title': 'No description'}]}):
+            self.assertEqual(self._post(body).status_code, 400)
+        self.encode.assert_not_called()
+
+
+class RankResumesTestCase(SimpleTestCase):
+    """Tests for POST /resumes/match/ (api.views.match_views.rank_resumes_for_job)"""
+
+    def setUp(self):
+        import numpy as np
+
+        self.docs = [
+            {'_id': ObjectId(), 'name': 'Design', 'skills': [{'skill': 'Figma'}]},
+            {'_id': ObjectId(), 'name': 'Backend', 'skills': [{'skill': 'Python'}]},
+            {'_id': ObjectId(), 'name': 'Mixed', 'skills': [{'skill': 'Python, Figma'}]},
+            {'_id': ObjectId(), 'name': 'Empty'},
+        ]
+        vectors = {'Design': [0.0, 1.0], 'Backend': [1.0, 0.0], 'Mixed': [1.0, 1.0]}
+        self.stored = MagicMock(side_effect=lambda docs, texts: np.array([vectors[doc['name']] for doc in docs]))
+        for target, name, value in (
+            (resume_repository, 'find_for_user', MagicMock(return_value=self.docs)),
+            (resume_embeddings, 'get_or_compute_many', self.stored),
+            (embedding_models, 'encode', MagicMock(return_value=np.array([[1.0, 0.0]]))),
+        ):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _post(self, body):
+        from .views.match_views import rank_resumes_for_job
+        request = APIRequestFactory().post('/api/resumes/match/', body, format='json')
+        force_authenticate(request, user=MagicMock(id=5, is_authenticated=True))
+        return rank_resumes_for_job(request)
+
+    def test_resumes_are_ranked_by_similarity(self):
+        response = self._post({'description': 'Python developer'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['name'] for r in response.data['results']], ['Backend', 'Mixed', 'Design'])
+        self.assertEqual(response.data['results'][1]['similarity'], 0.707)
+        # Empty resumes are not embedded
+        self.assertEqual(len(self.stored.call_args[0][0]), 3)
+
+    @override_settings(DEEPSEEK_API_KEY='key')
+    def test_rerank_only_rescores_top_k(self):
+        scores = {'Python': 60.0, 'Python, Figma': 90.0}
+
+        def deepseek(resume_text, job_title, job_description):
+            skill = resume_text.split('Skills: ')[1]
+            return {'match_percentage': scores[skill], 'similarity': scores[skill] / 100, 'resume_summary': skill}
+
+        with patch('api.resume_ai_job_match.match_job_with_deepseek', side_effect=deepseek) as ai:
+            response = self._post({'description': 'Python developer', 'rerank': True, 'top_k': 2})
+        self.assertEqual(ai.call_count, 2)
+        results = response.data['results']
+        self.assertEqual([r['name'] for r in results], ['Mixed', 'Backend', 'Design'])
+        self.assertEqual(results[0]['ai_match_percentage'], 90.0)
+        self.assertNotIn('ai_match_percentage', results[2])
+
+    def test_rerank_needs_deepseek(self):
+        with override_settings(DEEPSEEK_API_KEY=''):
+            self.assertEqual(self._post({'description': 'x', 'rerank': True}).status_code, 503)
+        self.assertEqual(self._post({}).status_code, 400)
+
+
+class ResumeVectorIndexTestCase(SimpleTestCase):
+    """Tests for api.resume_vector_index in a temporary directory"""
+
+    def setUp(self):
+        import numpy as np
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        overrides = override_settings(RESUME_VECTOR_INDEX_DIR=directory.name, RESUME_VECTOR_INDEX_NPROBE=2)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.rng = np.random.default_rng(0)
+
+    def _ids(self, hits):
+        return [resume_id for resume_id, _ in hits]
+
+    def _build(self, count, dim=8, nlist=None):
+        self.rows = [(f'{row:024x}', self.rng.standard_normal(dim)) for row in range(count)]
+        return resume_vector_index.build(iter(self.rows), 'test-model', dim, count, nlist=nlist)
+
+    def test_search_before_build_raises_and_writes_are_skipped(self):
+        with self.assertRaises(resume_vector_index.IndexNotBuilt):
+            resume_vector_index.search([1.0, 0.0], 1)
+        self.assertFalse(resume_vector_index.upsert('a' * 24, [1.0, 0.0], 'test-model'))
+
+    def test_exact_search_ranks_by_cosine_similarity(self):
+        import numpy as np
+
+        stats = self._build(50)
+        self.assertEqual((stats['rows'], stats['clustered']), (50, 0))
+        resume_id, vector = self.rows[7]
+        hits = resume_vector_index.search(vector * 3, 5)
+        self.assertEqual(hits[0][0], resume_id)
+        self.assertAlmostEqual(hits[0][1], 1.0, places=5)
+        scores = [score for _, score in hits]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertTrue(np.isclose(scores[1], max(
+            float(resume_vector_index.normalize(other) @ resume_vector_index.normalize(vector))
+            for other_id, other in self.rows if other_id != resume_id
+        )))
+
+    def test_upsert_replaces_and_delete_tombstones(self):
+        import numpy as np
+
+        self._build(20)
+        resume_id = self.rows[3][0]
+        target = np.zeros(8)
+        target[0] = 1.0
+        self.assertTrue(resume_vector_index.upsert(resume_id, target, 'test-model'))
+        self.assertEqual(self._ids(resume_vector_index.search(target, 20)).count(resume_id), 1)
+        self.assertEqual(resume_vector_index.search(target, 1)[0][0], resume_id)
+        # Another model's vectors do not belong in this index
+        self.assertFalse(resume_vector_index.upsert('f' * 24, target, 'other-model'))
+
+        self.assertTrue(resume_vector_index.delete(resume_id))
+        self.assertNotIn(resume_id, self._ids(resume_vector_index.search(target, 50)))
+        self.assertEqual(resume_vector_index.stats()['live'], 19)
+        self.assertFalse(resume_vector_index.delete(resume_id))
+
+    def test_upserts_past_capacity_grow_the_files(self):
+        self._build(4)
+        for row in range(resume_vector_index.INITIAL_CAPACITY + 5):
+            resume_vector_index.upsert(f'{row + 100:024x}', self.rng.standard_normal(8), 'test-model')
+        self.assertEqual(resume_vector_index.stats()['live'], resume_vector_index.INITIAL_CAPACITY + 9)
+        self.assertEqual(resume_vector_index.search(self.rows[0][1], 1)[0][0], self.rows[0][0])
+
+    @patch.object(resume_vector_index, 'MIN_CLUSTERED_ROWS', 100)
+    def test_approximate_search_probes_nearest_lists_and_new_rows(self):
+        stats = self._build(400, nlist=8)
+        self.assertEqual((stats['clustered'], stats['nlist']), (400, 8))
+        resume_id, vector = self.rows[42]
+        self.assertEqual(resume_vector_index.search(vector, 1)[0][0], resume_id)
+        self.assertEqual(
+            self._ids(resume_vector_index.search(vector, 400, nprobe=8)),
+            self._ids(resume_vector_index.search(vector, 400, exact=True)),
+        )
+        # Rows added after the rebuild are outside the lists but still searched
+        resume_vector_index.upsert('e' * 24, -vector, 'test-model')
+        self.assertEqual(resume_vector_index.search(-vector, 1)[0][0], 'e' * 24)
+
+    def test_query_keeps_its_maps_while_another_thread_grows_the_index(self):
+        self._build(4)
+        with resume_vector_index._lock:
+            snapshot = resume_vector_index._open().snapshot()
+        for row in range(resume_vector_index.INITIAL_CAPACITY):
+            resume_vector_index.upsert(f'{row + 100:024x}', self.rng.standard_normal(8), 'test-model')
+        self.assertEqual(snapshot.meta['count'], 4)
+        self.assertEqual(len(snapshot.vectors), resume_vector_index.INITIAL_CAPACITY)
+        self.assertEqual(snapshot.search(resume_vector_index.normalize(self.rows[1][1]), 1, 2, True)[0][0], self.rows[1][0])
+
+    def test_generation_removed_by_a_rebuild_is_reopened(self):
+        import shutil
+
+        self._build(4)
+        resume_vector_index.search(self.rows[0][1], 1)
+        # Another process rebuilt: generation 1 is gone, 2 is current
+        resume_vector_index._index = None
+        self._build(4)
+        old = resume_vector_index._Index.__new__(resume_vector_index._Index)
+        old.path = resume_vector_index.index_dir() / '1'
+        resume_vector_index._index = old
+        with patch.object(resume_vector_index, '_current_generation', side_effect=[1, 2]):
+            index = resume_vector_index._open()
+        self.assertEqual(index.generation, 2)
+        shutil.rmtree(resume_vector_index.index_dir() / '2')
+        with patch.object(resume_vector_index, '_current_generation', return_value=2):
+            self.assertIsNone(resume_vector_index._open())
+
+    @patch.object(resume_vector_index, 'MIN_CLUSTERED_ROWS', 10)
+    def test_nlist_and_nprobe_are_clamped(self):
+        with patch.object(resume_vector_index, 'KMEANS_SAMPLE', 5):
+            stats = self._build(20, nlist=50)
+        self.assertEqual(stats['nlist'], 5)
+        resume_id, vector = self.rows[3]
+        self.assertEqual(resume_vector_index.search(vector, 1, nprobe=-3)[0][0], resume_id)
+
+    def test_rebuild_reads_current_model_embeddings_and_replaces_generation(self):
+        vectors = {ObjectId(): [1.0, 0.0, 0.0], ObjectId(): [0.0, 1.0, 0.0]}
+        collection = MagicMock()
+        collection.find_one.return_value = {'dim': 3}
+        collection.count_documents.return_value = 2
+        collection.find.return_value = [
+            {'_id': resume_id, 'vector': resume_embeddings.to_binary(vector)} for resume_id, vector in vectors.items()
+        ]
+        with patch.object(resume_embeddings, 'embeddings_collection', return_value=collection), \
+                patch.object(embedding_models, 'default_model', return_value='test-model'):
+            resume_vector_index.rebuild()
+            stats = resume_vector_index.rebuild()
+        self.assertEqual(collection.find.call_args[0][0], {'model': 'test-model'})
+        self.assertEqual((stats['generation'], stats['rows']), (2, 2))
+        self.assertEqual(sorted(os.listdir(resume_vector_index.index_dir())), ['2', 'CURRENT', 'index.lock'])
+        self.assertEqual(resume_vector_index.search([0.1, 1.0, 0.0], 1)[0][0], str(list(vectors)[1]))
+
+    def test_search_view_drops_deleted_resumes(self):
+        from .views.match_views import search_resumes
+
+        self._build(3)
+        resumes = MagicMock()
+        resumes.find.return_value = [{
+            '_id': ObjectId(self.rows[0][0]), 'name': 'Kept', 'user_id': 7,
+            'personal_info': {'first_name': 'Ada', 'last_name': 'Lovelace'},
+        }]
+        request = APIRequestFactory().post(
+            '/api/admin/resume-search/', {'description': 'Python', 'k': 3, 'exact': True}, format='json',
+        )
+        force_authenticate(request, user=MagicMock(id=1, is_staff=True, is_authenticated=True))
+        with patch.object(embedding_models, 'encode', return_value=[self.rows[0][1]]), \
+                patch.object(resume_repository, 'resumes_collection', return_value=resumes):
+            response = search_resumes(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(r['resume_id'], r['name']) for r in response.data['results']], [(self.rows[0][0], 'Kept')])
+        self.assertEqual(response.data['results'][0]['full_name'], 'Ada Lovelace')
+        projection = resumes.find.call_args[0][1]
+        self.assertEqual(projection['personal_info.first_name'], 1)
+        self.assertEqual(projection['personal_info.last_name'], 1)
+
+
+class PdfThumbnailsTestCase(SimpleTestCase):
+    """Tests for api.pdf_thumbnails and the thumbnail views"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(
+            PDF_THUMBNAIL_DIR=self.tmp.name, PDF_CACHE_ENABLED=False,
+            PDF_THUMBNAIL_FORMAT='webp', PDF_THUMBNAIL_WIDTHS=[240, 480],
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = patch.object(pdf_thumbnails, 'rasterize', return_value=[b'page-1', b'page-2'])
+        self.rasterize = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.doc = {'_id': ObjectId(), 'user_id': 5, 'personal_info': {'first_name': 'Ada'},
+                    'updated_at': datetime(2024, 1, 1)}
+        self.render = MagicMock(return_value=b'%PDF-1.4')
+
+    def test_options_are_validated(self):
+        self.assertEqual(pdf_thumbnails.options({}), ('webp', 240))
+        self.assertEqual(pdf_thumbnails.options({'format': 'png', 'width': '480'}), ('png', 480))
+        for params in ({'format': 'gif'}, {'width': '1000'}, {'width': 'wide'}):
+            with self.assertRaises(pdf_thumbnails.InvalidThumbnailOptions):
+                pdf_thumbnails.options(params)
+
+    def test_thumbnails_are_generated_once_per_content(self):
+        key, pages = pdf_thumbnails.ensure(self.doc, 'modern', 'en', 'webp', 240, self.render)
+        self.assertEqual(pages, 2)
+        self.assertEqual(pdf_thumbnails.page_path(key, 2, 'webp').read_bytes(), b'page-2')
+        self.assertEqual(pdf_thumbnails.ensure(self.doc, 'modern', 'en', 'webp', 240, self.render), (key, 2))
+        self.render.assert_called_once()
+        self.rasterize.assert_called_once_with(b'%PDF-1.4', 'webp', 240)
+
+        self.doc['updated_at'] = datetime(2024, 1, 2)
+        new_key, _ = pdf_thumbnails.ensure(self.doc, 'modern', 'en', 'webp', 240, self.render)
+        self.assertNotEqual(new_key, key)
+
+    def test_unused_sets_are_removed(self):
+        key, _ = pdf_thumbnails.ensure(self.doc, 'modern', 'en', 'webp', 240, self.render)
+        self.assertEqual(pdf_thumbnails.remove_unused(max_age=3600), 0)
+        os.utime(pdf_thumbnails.page_path(key, 1, 'webp').parent, (1000, 1000))
+        self.assertEqual(pdf_thumbnails.remove_unused(max_age=3600), 1)
+        self.assertIsNone(pdf_thumbnails.page_count(key))
+
+    def test_views_list_pages_and_serve_immutable_images(self):
+        from .views import pdf_views
+        factory = APIRequestFactory()
+        user = MagicMock(id=5, is_authenticated=True)
+        resume_id = str(self.doc['_id'])
+        with patch.object(resume_repository, 'find_one_for_user', return_value=self.doc), \
+                patch.object(pdf_views, 'generate_pdf_from_html', return_value=b'%PDF-1.4'):
+            request = factory.get(f'/api/resumes/{resume_id}/thumbnails/')
+            force_authenticate(request, user=user)
+            response = pdf_views.resume_thumbnails(request, resume_id)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['pages']), 2)
+            self.assertIn('rasterize;dur=', response['Server-Timing'])
+
+            request = factory.get(f'/api/resumes/{resume_id}/thumbnails/', HTTP_IF_NONE_MATCH=response['ETag'])
+            force_authenticate(request, user=user)
+            self.assertEqual(pdf_views.resume_thumbnails(request, resume_id).status_code, 304)
+            # As sent back after CompressionMiddleware tagged the response
+            compressed_etag = response['ETag'][:-1] + '-gzip"'
+            request = factory.get(
+                f'/api/resumes/{resume_id}/thumbnails/', HTTP_IF_NONE_MATCH=f'"other", W/{compressed_etag}',
+            )
+            force_authenticate(request, user=user)
+            self.assertEqual(pdf_views.resume_thumbnails(request, resume_id).status_code, 304)
+
+        key = response.data['pages'][0].rstrip('/').split('/')[-2]
+        with patch.object(resume_repository, 'exists_for_user', return_value=True):
+            request = factory.get('/')
+            force_authenticate(request, user=user)
+            response = pdf_views.resume_thumbnail_page(request, resume_id, key, 1)
+            self.assertEqual(response['Content-Type'], 'image/webp')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertEqual(b''.join(response.streaming_content), b'page-1')
+            response.close()
+            request = factory.get('/')
+            force_authenticate(request, user=user)
+            self.assertEqual(pdf_views.resume_thumbnail_page(request, resume_id, '../x', 1).status_code, 404)
+
+    def test_page_of_another_resume_is_not_served(self):
+        from .views import pdf_views
+        key, _ = pdf_thumbnails.ensure(self.doc, 'modern', 'en', 'webp', 240, self.render)
+        self.assertEqual(pdf_thumbnails.set_owner(key), str(self.doc['_id']))
+        # The caller owns a different resume and knows (or guessed) the victim's key
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=MagicMock(id=6, is_authenticated=True))
+        with patch.object(resume_repository, 'exists_for_user', return_value=True):
+            response = pdf_views.resume_thumbnail_page(request, str(ObjectId()), key, 1)
+        self.assertEqual(response.status_code, 404)
+
+
+class PdfAssetsTestCase(SimpleTestCase):
+    """Tests for api.pdf_assets"""
+
+    CSS_URL = 'https://fonts.example.com/css2?family=Inter&display=swap'
+    FONT_URL = 'https://fonts.example.com/s/inter/v1/inter.woff2'
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.font_dir = os.path.join(self.tmp.name, 'fonts')
+        os.makedirs(self.font_dir)
+        override = override_settings(
+            PDF_ASSET_CACHE_DIR=os.path.join(self.tmp.name, 'cache'), PDF_FONT_DIR=self.font_dir,
+            PDF_ASSET_FETCH=False,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_stylesheet_is_inlined_from_the_cache(self):
+        css = b"@font-face { font-family: Inter; src: url(/s/inter/v1/inter.woff2) format('woff2'); }"
+        pdf_assets._write_cached(self.CSS_URL, css, 'text/css')
+        html = pdf_assets.inline_assets(
+            '<link rel="stylesheet" href="https://fonts.example.com/css2?family=Inter&amp;display=swap">'
+        )
+        self.assertNotIn('<link', html)
+        self.assertIn('<style>@font-face', html)
+        self.assertIn(f'url("{self.FONT_URL}")', html)
+
+    def test_image_becomes_data_uri(self):
+        pdf_assets._write_cached('https://cdn.example.com/me.png', b'\x89PNG', 'image/png')
+        html = pdf_assets.inline_assets('<img alt="me" src="https://cdn.example.com/me.png">')
+        self.assertEqual(html, '<img alt="me" src="data:image/png;base64,iVBORw==">')
+
+    def test_unavailable_stylesheet_is_dropped_without_fetching(self):
+        with patch('api.pdf_assets._download') as download:
+            html = pdf_assets.inline_assets('<link rel="stylesheet" href="https://example.com/a.css"><p>x</p>')
+        download.assert_not_called()
+        self.assertEqual(html, '<p>x</p>')
+
+    def test_local_response_prefers_bundled_fonts(self):
+        with open(os.path.join(self.font_dir, 'inter.woff2'), 'wb') as f:
+            f.write(b'wOF2')
+        self.assertEqual(pdf_assets.local_response(self.FONT_URL)[0], b'wOF2')
+        self.assertIsNone(pdf_assets.local_response('https://example.com/missing.js'))
+        self.assertIsNone(pdf_assets.local_response('file:///etc/passwd'))
+
+    def test_private_hosts_are_not_fetched(self):
+        with self.assertRaises(ValueError):
+            pdf_assets._public_address('127.0.0.1')
+        with self.assertRaises(ValueError):
+            pdf_assets._public_address('10.0.0.5')
+        with self.assertRaises(ValueError):
+            pdf_assets._download('http://169.254.169.254/latest/meta-data')
+
+    @override_settings(PDF_ASSET_FETCH=True)
+    def test_fetches_per_render_are_capped(self):
+        body = b'\x89PNG' + b'x' * 100
+        with patch('api.pdf_assets._download', return_value=(body, 'image/png')) as download:
+            html = pdf_assets.inline_assets(
+                ''.join(f'<img src="https://cdn.example.com/{n}.png">' for n in range(5)),
+                budget=pdf_assets.FetchBudget(fetches=3),
+            )
+            self.assertEqual(download.call_count, 3)
+            self.assertEqual(html.count('data:image/png'), 3)
+            # Cached assets cost nothing; the byte budget stops fetching too
+            budget = pdf_assets.FetchBudget(max_bytes=100)
+            pdf_assets.inline_assets('<img src="https://cdn.example.com/0.png">', budget=budget)
+            self.assertEqual(download.call_count, 3)
+            for n in range(3, 5):
+                pdf_assets.fetch(f'https://cdn.example.com/{n}.png', budget)
+            self.assertEqual(download.call_count, 4)
+            self.assertEqual(download.call_args[0][1], 100)
+
+    @override_settings(PDF_ASSET_FETCH=True)
+    def test_connection_goes_to_the_checked_address(self):
+        response = MagicMock(is_redirect=False, headers={'Content-Type': 'text/css'})
+        response.iter_content.return_value = [b'body{}']
+        session = MagicMock()
+        session.__enter__.return_value = session
+        session.get.return_value.__enter__.return_value = response
+        with patch('api.pdf_assets._public_address', return_value='93.184.215.14'), \
+                patch('api.pdf_assets._pinned_session', return_value=session) as pinned:
+            self.assertEqual(pdf_assets.fetch('https://cdn.example.com:8443/a.css'), (b'body{}', 'text/css'))
+        pinned.assert_called_once_with('cdn.example.com')
+        args, kwargs = session.get.call_args
+        self.assertEqual(args[0], 'https://93.184.215.14:8443/a.css')
+        self.assertEqual(kwargs['headers']['Host'], 'cdn.example.com:8443')
+        adapter = pdf_assets._pinned_session('cdn.example.com').get_adapter('https://93.184.215.14/')
+        self.assertEqual(adapter.poolmanager.connection_pool_kw['assert_hostname'], 'cdn.example.com')
+
+    def test_failed_urls_are_pruned(self):
+        self.addCleanup(pdf_assets._failures.clear)
+        with patch.object(pdf_assets, 'MAX_FAILURES', 3):
+            for n in range(5):
+                pdf_assets._record_failure(f'https://example.com/{n}')
+        self.assertEqual(list(pdf_assets._failures), [f'https://example.com/{n}' for n in range(2, 5)])
+        pdf_assets._failures['https://example.com/2'] -= pdf_assets.FAILURE_TTL
+        pdf_assets._record_failure('https://example.com/5')
+        self.assertNotIn('https://example.com/2', pdf_assets._failures)
+
+    @override_settings(PDF_ASSET_CACHE_MAX_BYTES=250)
+    def test_cache_evicts_least_recently_used(self):
+        for n in range(3):
+            pdf_assets._write_cached(f'https://cdn.example.com/{n}.png', b'x' * 100, 'image/png')
+            path = pdf_assets._cache_paths(f'https://cdn.example.com/{n}.png')[0]
+            os.utime(path, (1000 + n, 1000 + n))
+        pdf_assets.evict()
+        self.assertIsNone(pdf_assets._read_cached('https://cdn.example.com/0.png'))
+        self.assertFalse(pdf_assets._cache_paths('https://cdn.example.com/0.png')[1].exists())
+        self.assertIsNotNone(pdf_assets._read_cached('https://cdn.example.com/2.png'))
+
+
+class ResumeHtmlTestCase(SimpleTestCase):
+    """Tests for the server-side PDF templates in api.resume_html"""
+
+    def setUp(self):
+        self.doc = {
+            '_id': ObjectId(),
+            'personal_info': {
+                'first_name': 'Ada', 'last_name': '<Lovelace>', 'email': 'ada@example.com',
+                'website': 'javascript:alert(1)', 'summary': 'Analyst',
+            },
+            'work_experience': [{'position': 'Engineer', 'company': 'ACME', 'start_date': '2020-03',
+                                 'responsibilities': [{'responsibility': 'Built engines'}]}],
+            'skills': [{'skill': 'Python'}],
+            'section_order': ['skills', 'work_experience', 'summary'],
+            'styling': {'heading_color': 'red;background:url(http://evil)', 'section_styling': {
+                'skills': {'title_color': '#ff0000'},
+            }},
+            'template': 'starRover',
+        }
+
+    def test_every_template_renders(self):
+        for template in resume_html.TEMPLATES:
+            html = resume_html.render_resume_html(self.doc, template)
+            self.assertIn('Built engines', html)
+            self.assertIn('Mar 2020 - Present', html)
+
+    def test_values_are_escaped_and_unsafe_styling_dropped(self):
+        html = resume_html.render_resume_html(self.doc, 'modern')
+        self.assertIn('&lt;Lovelace&gt;', html)
+        self.assertNotIn('evil', html)
+        self.assertNotIn('href="javascript:', html)
+        self.assertIn('.section-skills .section-title { color: #ff0000;', html)
+
+    def test_section_order_and_template_resolution(self):
+        context = resume_html.build_context(self.doc, 'modern', 'de')
+        self.assertEqual([s['key'] for s in context['sections']], ['skills', 'workExperience', 'summary'])
+        self.assertEqual(context['sections'][1]['title'], 'Erfahrung')
+        self.assertEqual(resume_html.resolve_template(self.doc), 'starRover')
+        with self.assertRaises(resume_html.UnknownTemplate):
+            resume_html.resolve_template(self.doc, 'fancy')
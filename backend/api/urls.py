@@ -10,6 +10,7 @@ app_name = 'api'
 urlpatterns = [
     # Public endpoints
     path('health/', views.health_check, name='health-check'),
+    path('metrics/pdf/', views.pdf_metrics_export, name='pdf-metrics'),
     
     # Authentication endpoints
     path('auth/register/', auth_views.register, name='register'),
@@ -32,11 +33,26 @@ urlpatterns = [
     # Resume endpoints (protected)
     path('resumes/', views.resume_list, name='resume-list'),
     path('resumes/parse/', views.parse_resume, name='resume-parse'),  # Must come before <str:pk> pattern
+    path('resumes/match/', views.rank_resumes_for_job, name='resume-rank'),  # Must come before <str:pk> pattern
     path('resumes/<str:resume_id>/pdf/', views.generate_resume_pdf, name='resume-pdf'),
+    path('resumes/<str:resume_id>/pdf/async/', views.generate_resume_pdf_async, name='resume-pdf-async'),
+    path('resumes/<str:resume_id>/thumbnails/', views.resume_thumbnails, name='resume-thumbnails'),
+    path('resumes/<str:resume_id>/thumbnails/<str:key>/<int:page>/', views.resume_thumbnail_page,
+         name='resume-thumbnail'),
+    path('resumes/<str:resume_id>/pdf/jobs/', views.pdf_job_submit, name='resume-pdf-jobs'),
+    path('resumes/<str:resume_id>/pdf/jobs/<str:job_id>/', views.pdf_job_detail, name='resume-pdf-job'),
+    path('resumes/<str:resume_id>/pdf/jobs/<str:job_id>/result/', views.pdf_job_result, name='resume-pdf-job-result'),
     path('resumes/<str:resume_id>/match/', views.match_resume_to_job, name='resume-match'),
+    path('resumes/<str:resume_id>/match/batch/', views.match_resume_to_jobs, name='resume-match-batch'),
     path('resumes/<str:pk>/public-profile/', views.resume_public_profile_toggle, name='resume-public-profile-toggle'),
     path('resumes/<str:pk>/', views.resume_detail, name='resume-detail'),
     
+    # Bulk PDF export (staff only)
+    path('admin/pdf-exports/', views.pdf_export_submit, name='pdf-exports'),
+    path('admin/pdf-exports/<str:job_id>/', views.pdf_export_detail, name='pdf-export'),
+    path('admin/pdf-exports/<str:job_id>/result/', views.pdf_export_result, name='pdf-export-result'),
+    path('admin/resume-search/', views.search_resumes, name='resume-search'),
+    
     # Blog post endpoints
     path('blog-posts/', views.blog_post_list, name='blog-post-list'),
     path('blog-posts/<str:post_id>/', views.blog_post_detail, name='blog-post-detail'),
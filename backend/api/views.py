@@ -11,9 +11,9 @@ from .serializers import ResumeSerializer, BlogPostSerializer
 # Backend scorer removed - scores are now calculated on frontend
 from bson import ObjectId
 from datetime import datetime
-import os
 import sys
-from pymongo import MongoClient
+from .mongo import get_db
+from . import pagination
 
 
 def format_mongo_date(date_value):
@@ -81,48 +81,7 @@ def resume_list(request):
     
     if request.method == 'GET':
         try:
-            # Get raw data from MongoDB without instantiating abstract models
-            from pymongo import MongoClient
-            from bson import ObjectId as BsonObjectId
-            import os
-            
-            # Connect to MongoDB directly
-            # First try to use connection string if available
-            connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-            if connection_string:
-                # Try using connection string, but if it fails, fall back to individual vars
-                try:
-                    client = MongoClient(connection_string)
-                    # Test the connection
-                    client.admin.command('ping')
-                except Exception:
-                    # Connection string might have encoding issues, use individual vars
-                    connection_string = None
-            
-            if not connection_string:
-                # Use individual env vars (more reliable for special characters)
-                mongo_host = os.getenv('MONGODB_HOST', 'localhost')
-                mongo_port = int(os.getenv('MONGODB_PORT', 27017))
-                mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-                mongo_username = os.getenv('MONGODB_USERNAME', '')
-                mongo_password = os.getenv('MONGODB_PASSWORD', '')
-                
-                # Create authenticated connection
-                if mongo_username and mongo_password:
-                    client = MongoClient(
-                        mongo_host,
-                        mongo_port,
-                        username=mongo_username,
-                        password=mongo_password,
-                        authSource='admin',
-                        authMechanism='SCRAM-SHA-1'
-                    )
-                else:
-                    client = MongoClient(mongo_host, mongo_port)
-            
-            mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-            
-            db = client[mongo_db]
+            db = get_db()
             
             # Get resumes for this user
             user_id = request.user.id
@@ -195,42 +154,7 @@ def resume_list(request):
         serializer = ResumeSerializer(data=request.data)
         if serializer.is_valid():
             try:
-                # Setup MongoDB connection
-                from pymongo import MongoClient
-                from bson import ObjectId as BsonObjectId
-                import os
-                
-                # First try to use connection string if available
-                connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-                if connection_string:
-                    try:
-                        client = MongoClient(connection_string)
-                        client.admin.command('ping')
-                    except Exception:
-                        connection_string = None
-                
-                if not connection_string:
-                    # In Docker, use service name 'mongodb', otherwise 'localhost'
-                    mongo_host = os.getenv('MONGODB_HOST', 'mongodb')
-                    mongo_port = int(os.getenv('MONGODB_PORT', 27017))
-                    mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-                    mongo_username = os.getenv('MONGODB_USERNAME', '')
-                    mongo_password = os.getenv('MONGODB_PASSWORD', '')
-                    
-                    if mongo_username and mongo_password:
-                        client = MongoClient(
-                            mongo_host,
-                            mongo_port,
-                            username=mongo_username,
-                            password=mongo_password,
-                            authSource='admin',
-                            authMechanism='SCRAM-SHA-1'
-                        )
-                    else:
-                        client = MongoClient(mongo_host, mongo_port)
-                
-                mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-                db = client[mongo_db]
+                db = get_db()
                 
                 # Save data from validated_data
                 data = serializer.validated_data
@@ -379,46 +303,8 @@ def resume_detail(request, pk):
     """
     Retrieve, update or delete a resume (only if it belongs to the authenticated user)
     """
-    # Setup MongoDB connection for all methods
-    from pymongo import MongoClient
     from bson import ObjectId as BsonObjectId
-    import os
-    
-    # First try to use connection string if available
-    connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-    if connection_string:
-        # Try using connection string, but if it fails, fall back to individual vars
-        try:
-            client = MongoClient(connection_string)
-            # Test the connection
-            client.admin.command('ping')
-        except Exception:
-            # Connection string might have encoding issues, use individual vars
-            connection_string = None
-    
-    if not connection_string:
-        # Use individual env vars (more reliable for special characters)
-        mongo_host = os.getenv('MONGODB_HOST', 'localhost')
-        mongo_port = int(os.getenv('MONGODB_PORT', 27017))
-        mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-        mongo_username = os.getenv('MONGODB_USERNAME', '')
-        mongo_password = os.getenv('MONGODB_PASSWORD', '')
-        
-        # Create authenticated connection
-        if mongo_username and mongo_password:
-            client = MongoClient(
-                mongo_host,
-                mongo_port,
-                username=mongo_username,
-                password=mongo_password,
-                authSource='admin',
-                authMechanism='SCRAM-SHA-1'
-            )
-        else:
-            client = MongoClient(mongo_host, mongo_port)
-    
-    mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-    db = client[mongo_db]
+    db = get_db()
     
     # Validate ObjectId format
     try:
@@ -700,17 +586,11 @@ def blog_post_list(request):
     """
     List all published blog posts or create a new one
     GET: Public - returns all published posts for a language
+         (optional `limit` / `cursor` keyset paging, see api/pagination.py)
     POST: Requires authentication - creates a new blog post
     """
-    # Get MongoDB connection
-    connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-    if not connection_string:
-        connection_string = f"mongodb://{os.getenv('MONGODB_HOST', 'localhost')}:{os.getenv('MONGODB_PORT', '27017')}"
-    
     try:
-        client = MongoClient(connection_string)
-        db = client[os.getenv('MONGODB_NAME', 'resume_db')]
-        collection = db['blog_posts']
+        collection = get_db()['blog_posts']
     except Exception as e:
         return Response({'error': f'Database connection failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -719,6 +599,11 @@ def blog_post_list(request):
         language = request.query_params.get('language', 'en')
         include_drafts = request.query_params.get('include_drafts', 'false').lower() == 'true'
         
+        try:
+            page_params = pagination.get_page_params(request)
+        except pagination.InvalidPageParams as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
         try:
             now = datetime.utcnow()
             
@@ -740,7 +625,12 @@ def blog_post_list(request):
                 # Filter by current user's posts
                 query['author_id'] = str(request.user.id)
             
-            posts = list(collection.find(query).sort('created_at', -1))
+            next_cursor = None
+            if page_params:
+                limit, after = page_params
+                posts, next_cursor = pagination.fetch_page(collection, query, limit, after=after)
+            else:
+                posts = list(collection.find(query).sort('created_at', -1))
             
             # Auto-publish scheduled posts that are due
             for post in posts:
@@ -772,6 +662,8 @@ def blog_post_list(request):
             if not include_drafts or not request.user.is_authenticated:
                 posts = [p for p in posts if p.get('published', False) or (p.get('scheduled_publish_at') and datetime.fromisoformat(p['scheduled_publish_at'].replace('Z', '+00:00')) <= now)]
             
+            if page_params:
+                return Response(pagination.paginated_payload(request, posts, next_cursor))
             return Response(posts)
         except Exception as e:
             return Response({'error': f'Failed to fetch blog posts: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -840,15 +732,8 @@ def blog_post_detail(request, post_id):
     GET: Public - returns the post if published
     PUT/DELETE: Requires authentication
     """
-    # Get MongoDB connection
-    connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-    if not connection_string:
-        connection_string = f"mongodb://{os.getenv('MONGODB_HOST', 'localhost')}:{os.getenv('MONGODB_PORT', '27017')}"
-    
     try:
-        client = MongoClient(connection_string)
-        db = client[os.getenv('MONGODB_NAME', 'resume_db')]
-        collection = db['blog_posts']
+        collection = get_db()['blog_posts']
     except Exception as e:
         return Response({'error': f'Database connection failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
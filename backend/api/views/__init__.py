@@ -8,11 +8,22 @@ from .resume_views import (
     resume_public_profile_toggle,
 )
 from .parse_views import parse_resume
-from .health_views import health_check
-from .pdf_views import generate_resume_pdf
+from .health_views import health_check, pdf_metrics_export
+from .pdf_views import (
+    generate_resume_pdf,
+    generate_resume_pdf_async,
+    resume_thumbnails,
+    resume_thumbnail_page,
+    pdf_job_submit,
+    pdf_job_detail,
+    pdf_job_result,
+    pdf_export_submit,
+    pdf_export_detail,
+    pdf_export_result,
+)
 from .blog_views import blog_post_list, blog_post_detail
 from .sitemap_views import generate_sitemap
-from .match_views import match_resume_to_job
+from .match_views import match_resume_to_job, match_resume_to_jobs, rank_resumes_for_job, search_resumes
 from .feedback_views import send_feedback
 from .ai_views import resume_assistant_chat, resume_score
 
@@ -23,11 +34,24 @@ __all__ = [
     'resume_public_profile_toggle',
     'parse_resume',
     'health_check',
+    'pdf_metrics_export',
     'generate_resume_pdf',
+    'generate_resume_pdf_async',
+    'resume_thumbnails',
+    'resume_thumbnail_page',
+    'pdf_job_submit',
+    'pdf_job_detail',
+    'pdf_job_result',
+    'pdf_export_submit',
+    'pdf_export_detail',
+    'pdf_export_result',
     'blog_post_list',
     'blog_post_detail',
     'generate_sitemap',
     'match_resume_to_job',
+    'match_resume_to_jobs',
+    'rank_resumes_for_job',
+    'search_resumes',
     'send_feedback',
     'resume_assistant_chat',
     'resume_score',
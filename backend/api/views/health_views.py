@@ -1,9 +1,25 @@
 """
 Health check views
 """
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from pymongo.errors import PyMongoError
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework import status
+from .. import embedding_models, pdf_cache, pdf_metrics, public_profile_cache
+from ..mongo import pool_stats
+from ..pdf_browser_pool import pool_stats as pdf_pool_stats
+
+
+def _internals_allowed(request):
+    """X-Metrics-Token matches METRICS_TOKEN, or the caller is staff."""
+    token = request.META.get('HTTP_X_METRICS_TOKEN', '')
+    token_ok = bool(settings.METRICS_TOKEN) and hmac.compare_digest(token, settings.METRICS_TOKEN)
+    return token_ok or request.user.is_staff
 
 
 @api_view(['GET'])
@@ -11,6 +27,9 @@ from rest_framework.response import Response
 def health_check(request):
     """
     Simple health check endpoint (public)
+
+    Pool, cache, metric and model internals are only added for staff users
+    or with the X-Metrics-Token header.
     """
     try:
         # Check if parser is available
@@ -32,9 +51,36 @@ def health_check(request):
     except Exception as e:
         parser_status = f"not_available: {str(e)}"
     
-    return Response({
+    payload = {
         'status': 'healthy',
         'message': 'Resume API is running',
-        'resume_parser': parser_status
-    })
+        'resume_parser': parser_status,
+    }
+    if _internals_allowed(request):
+        payload.update({
+            'mongo_pool': pool_stats(),
+            'public_profile_cache': public_profile_cache.stats(),
+            'pdf_browser_pool': pdf_pool_stats(),
+            'pdf_cache': pdf_cache.stats(),
+            'pdf_metrics': pdf_metrics.summary(),
+            'embedding_models': embedding_models.stats(),
+        })
+    return Response(payload)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def pdf_metrics_export(request):
+    """
+    PDF pipeline metrics of all API and render-worker processes in
+    Prometheus text format (api/pdf_metrics.py). Requires the
+    X-Metrics-Token header to match METRICS_TOKEN, or a staff user.
+    """
+    if not _internals_allowed(request):
+        return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        text = pdf_metrics.prometheus_text()
+    except PyMongoError as e:
+        return Response({'error': f'Metrics store unavailable: {e}'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return HttpResponse(text, content_type='text/plain; version=0.0.4; charset=utf-8')
 
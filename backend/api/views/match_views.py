@@ -2,17 +2,17 @@
 Resume-Job Matching: DeepSeek (default when configured) with embedding fallback.
 """
 import logging
-import os
 import traceback
 
 from bson import ObjectId
 from django.conf import settings
-from pymongo import MongoClient
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from .. import embedding_models, resume_embeddings, resume_repository, resume_vector_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -68,22 +68,35 @@ def get_resume_text(resume_doc):
     return " ".join(text_parts)
 
 
-def _match_with_embeddings(resume_text, job_title, job_description, resume_id):
-    """Legacy sentence-transformers cosine similarity."""
-    from sentence_transformers import SentenceTransformer
+def _resume_summary(resume_text):
+    return resume_text[:200] + "..." if len(resume_text) > 200 else resume_text
+
+
+def _full_name(resume_doc):
+    personal_info = resume_doc.get("personal_info") or {}
+    return f"{personal_info.get('first_name', '')} {personal_info.get('last_name', '')}".strip() or None
+
+
+def _cosine_similarities(vector, matrix):
+    """Cosine similarity of `vector` with every row of `matrix`, as one matrix product."""
     import numpy as np
 
-    model = SentenceTransformer("anass1209/resume-job-matcher-all-MiniLM-L6-v2")
-    texts = [resume_text, job_description]
-    embeddings = model.encode(texts, show_progress_bar=False)
-    resume_embedding = embeddings[0]
-    job_embedding = embeddings[1]
-    similarity = float(
-        np.dot(resume_embedding, job_embedding)
-        / (np.linalg.norm(resume_embedding) * np.linalg.norm(job_embedding))
-    )
+    vector = np.asarray(vector, dtype=np.float32)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+    return (matrix @ vector) / np.maximum(norms, 1e-12)
+
+
+def _match_with_embeddings(resume_doc, resume_text, job_title, job_description, resume_id):
+    """
+    Sentence-transformers cosine similarity. The resume's embedding is stored
+    per revision (api/resume_embeddings.py), so only the job is encoded.
+    """
+    resume_embedding = resume_embeddings.get_or_compute(resume_doc, resume_text)
+    job_embeddings = embedding_models.encode([job_description])
+    similarity = float(_cosine_similarities(resume_embedding, job_embeddings)[0])
     match_percentage = round(similarity * 100, 1)
-    summary = resume_text[:200] + "..." if len(resume_text) > 200 else resume_text
+    summary = _resume_summary(resume_text)
 
     return Response(
         {
@@ -97,6 +110,34 @@ def _match_with_embeddings(resume_text, job_title, job_description, resume_id):
     )
 
 
+def _load_resume(request, resume_id):
+    """(resume_doc, None) for the user's resume (matching fields), or (None, error Response)."""
+    try:
+        resume_object_id = ObjectId(resume_id)
+    except Exception:
+        return None, Response(
+            {"error": "Invalid resume ID format"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    resume_doc = resume_repository.find_one_for_user(
+        resume_object_id, request.user.id, fields="matching"
+    )
+    if not resume_doc:
+        return None, Response(
+            {"error": "Resume not found"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    return resume_doc, None
+
+
+def _empty_resume():
+    return Response(
+        {"error": "Resume is empty or has no content"},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def match_resume_to_job(request, resume_id):
@@ -115,52 +156,9 @@ def match_resume_to_job(request, resume_id):
     match_percentage (0–100), resume_summary
     """
     try:
-        # MongoDB
-        connection_string = os.getenv("MONGODB_CONNECTION_STRING")
-        if connection_string:
-            try:
-                client = MongoClient(connection_string)
-                client.admin.command("ping")
-            except Exception:
-                connection_string = None
-
-        if not connection_string:
-            mongo_host = os.getenv("MONGODB_HOST", "mongodb")
-            mongo_port = int(os.getenv("MONGODB_PORT", 27017))
-            mongo_username = os.getenv("MONGODB_USERNAME", "")
-            mongo_password = os.getenv("MONGODB_PASSWORD", "")
-
-            if mongo_username and mongo_password:
-                client = MongoClient(
-                    mongo_host,
-                    mongo_port,
-                    username=mongo_username,
-                    password=mongo_password,
-                    authSource="admin",
-                    authMechanism="SCRAM-SHA-1",
-                )
-            else:
-                client = MongoClient(mongo_host, mongo_port)
-
-        mongo_db_name = os.getenv("MONGODB_NAME", "resume_db")
-        db = client[mongo_db_name]
-
-        try:
-            resume_object_id = ObjectId(resume_id)
-        except Exception:
-            return Response(
-                {"error": "Invalid resume ID format"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        resume_doc = db.resumes.find_one(
-            {"_id": resume_object_id, "user_id": request.user.id}
-        )
-        if not resume_doc:
-            return Response(
-                {"error": "Resume not found"},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+        resume_doc, error_response = _load_resume(request, resume_id)
+        if error_response is not None:
+            return error_response
 
         job_title = request.data.get("title", "Job Description")
         job_description = request.data.get("description", "")
@@ -173,10 +171,7 @@ def match_resume_to_job(request, resume_id):
 
         resume_text = get_resume_text(resume_doc)
         if not resume_text.strip():
-            return Response(
-                {"error": "Resume is empty or has no content"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+            return _empty_resume()
 
         matcher = (request.query_params.get("matcher") or "auto").lower()
         if matcher == "ai" and not settings.DEEPSEEK_API_KEY:
@@ -221,22 +216,287 @@ def match_resume_to_job(request, resume_id):
 
         try:
             return _match_with_embeddings(
-                resume_text, job_title, job_description, resume_id
+                resume_doc, resume_text, job_title, job_description, resume_id
             )
         except ImportError:
+            return _sentence_transformers_missing()
+
+    except Exception as e:
+        return Response(
+            {
+                "error": f"Failed to match resume: {str(e)}",
+                "detail": str(traceback.format_exc()),
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+def _sentence_transformers_missing():
+    return Response(
+        {
+            "error": "sentence-transformers not installed. "
+            "Install with: pip install sentence-transformers",
+        },
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+    )
+
+
+def _parse_jobs(raw_jobs):
+    """[(title, description)] from the batch body; raises ValueError with a user-facing message."""
+    if not isinstance(raw_jobs, list) or not raw_jobs:
+        raise ValueError("Please provide a non-empty list of jobs")
+    if len(raw_jobs) > settings.MATCH_BATCH_MAX_JOBS:
+        raise ValueError(f"At most {settings.MATCH_BATCH_MAX_JOBS} jobs per request")
+    jobs = []
+    for index, job in enumerate(raw_jobs):
+        if isinstance(job, str):
+            job = {"description": job}
+        if not isinstance(job, dict) or not str(job.get("description") or "").strip():
+            raise ValueError(f"Job {index} needs a description")
+        jobs.append((str(job.get("title") or "Job Description"), str(job["description"])))
+    return jobs
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def match_resume_to_jobs(request, resume_id):
+    """
+    Match a saved resume to several job descriptions at once (embeddings).
+
+    POST body: { "jobs": [{"title": optional, "description": required}, ...] }
+    (or plain description strings), at most MATCH_BATCH_MAX_JOBS.
+
+    The resume embedding is stored per revision and all descriptions are
+    encoded in one batch, so ten postings cost about as much as one.
+
+    Returns: resume_id, resume_summary and results ranked by similarity:
+    [{index (position in jobs), job_title, similarity, match_percentage}]
+    """
+    try:
+        resume_doc, error_response = _load_resume(request, resume_id)
+        if error_response is not None:
+            return error_response
+
+        try:
+            jobs = _parse_jobs(request.data.get("jobs"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        resume_text = get_resume_text(resume_doc)
+        if not resume_text.strip():
+            return _empty_resume()
+
+        try:
+            resume_embedding = resume_embeddings.get_or_compute(resume_doc, resume_text)
+            job_embeddings = embedding_models.encode([description for _, description in jobs])
+        except ImportError:
+            return _sentence_transformers_missing()
+
+        similarities = _cosine_similarities(resume_embedding, job_embeddings)
+        ranking = sorted(range(len(jobs)), key=lambda index: similarities[index], reverse=True)
+        return Response(
+            {
+                "resume_id": resume_id,
+                "resume_summary": _resume_summary(resume_text),
+                "results": [
+                    {
+                        "index": index,
+                        "job_title": jobs[index][0],
+                        "similarity": round(float(similarities[index]), 3),
+                        "match_percentage": round(float(similarities[index]) * 100, 1),
+                    }
+                    for index in ranking
+                ],
+            }
+        )
+
+    except Exception as e:
+        return Response(
+            {
+                "error": f"Failed to match resume: {str(e)}",
+                "detail": str(traceback.format_exc()),
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+def _rerank_with_deepseek(candidates, job_title, job_description):
+    """
+    DeepSeek scores for `candidates` [(resume_doc, resume_text)],
+    requested concurrently; None for a candidate whose call failed.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from ..resume_ai_job_match import match_job_with_deepseek
+
+    def score(candidate):
+        try:
+            return match_job_with_deepseek(candidate[1], job_title, job_description)
+        except Exception as e:
+            logger.warning("DeepSeek re-rank failed for resume %s: %s", candidate[0]["_id"], e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        return list(executor.map(score, candidates))
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def rank_resumes_for_job(request):
+    """
+    Rank all of the user's resumes against one job description.
+
+    POST body: { "title": optional, "description": required,
+                 "rerank": false, "top_k": MATCH_RERANK_TOP_K }
+
+    Scores every resume by embedding similarity: stored per-resume
+    embeddings (api/resume_embeddings.py) stacked into one matrix against the
+    encoded job. With "rerank": true, DeepSeek re-scores only the top_k
+    (at most MATCH_RERANK_MAX_TOP_K) and those are ordered by its score.
+
+    Returns: job_title, reranked, and results best first:
+    [{resume_id, name, similarity, match_percentage,
+      ai_match_percentage and ai_summary (re-ranked resumes only)}]
+    """
+    try:
+        job_title = request.data.get("title", "Job Description")
+        job_description = request.data.get("description", "")
+        if not str(job_description).strip():
             return Response(
-                {
-                    "error": "sentence-transformers not installed. "
-                    "Install with: pip install sentence-transformers",
-                },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                {"error": "Please provide a job description"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rerank = bool(request.data.get("rerank"))
+        if rerank and not settings.DEEPSEEK_API_KEY:
+            return Response(
+                {"error": "AI re-ranking requires DEEPSEEK_API_KEY on the server."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        try:
+            top_k = int(request.data.get("top_k") or settings.MATCH_RERANK_TOP_K)
+        except (TypeError, ValueError):
+            return Response({"error": "top_k must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        top_k = max(1, min(top_k, settings.MATCH_RERANK_MAX_TOP_K))
+
+        resume_docs = []
+        resume_texts = []
+        for resume_doc in resume_repository.find_for_user(request.user.id, fields="ranking"):
+            resume_text = get_resume_text(resume_doc)
+            if resume_text.strip():
+                resume_docs.append(resume_doc)
+                resume_texts.append(resume_text)
+        if not resume_docs:
+            return Response({"job_title": job_title, "reranked": False, "results": []})
+
+        try:
+            resume_matrix = resume_embeddings.get_or_compute_many(resume_docs, resume_texts)
+            job_embedding = embedding_models.encode([job_description])[0]
+        except ImportError:
+            return _sentence_transformers_missing()
+
+        similarities = _cosine_similarities(job_embedding, resume_matrix)
+        ranking = sorted(range(len(resume_docs)), key=lambda index: similarities[index], reverse=True)
+        results = [
+            {
+                "resume_id": str(resume_docs[index]["_id"]),
+                "name": resume_docs[index].get("name"),
+                "similarity": round(float(similarities[index]), 3),
+                "match_percentage": round(float(similarities[index]) * 100, 1),
+            }
+            for index in ranking
+        ]
+
+        if rerank:
+            head = ranking[:top_k]
+            scores = _rerank_with_deepseek(
+                [(resume_docs[index], resume_texts[index]) for index in head],
+                job_title,
+                job_description,
             )
+            for result, ai in zip(results, scores):
+                if ai is not None:
+                    result["ai_match_percentage"] = ai["match_percentage"]
+                    result["ai_summary"] = ai["resume_summary"]
+            # Re-ranked by DeepSeek; a failed call keeps its embedding position after them
+            results[:len(head)] = sorted(
+                results[:len(head)],
+                key=lambda result: (
+                    "ai_match_percentage" in result,
+                    result.get("ai_match_percentage", result["match_percentage"]),
+                ),
+                reverse=True,
+            )
+
+        return Response({"job_title": job_title, "reranked": rerank, "results": results})
 
     except Exception as e:
         return Response(
             {
-                "error": f"Failed to match resume: {str(e)}",
+                "error": f"Failed to rank resumes: {str(e)}",
                 "detail": str(traceback.format_exc()),
             },
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def search_resumes(request):
+    """
+    Find the resumes closest to a job description across all users (staff only).
+
+    POST body: { "description": required, "k": 10, "exact": false,
+                 "nprobe": RESUME_VECTOR_INDEX_NPROBE }
+
+    Searches the on-disk vector index (api/resume_vector_index.py): by
+    default only its nprobe nearest lists, with "exact": true every resume.
+
+    Returns: exact, index (stats), results best first:
+    [{resume_id, user_id, name, full_name, similarity, match_percentage}]
+    """
+    job_description = request.data.get("description", "")
+    if not str(job_description).strip():
+        return Response({"error": "Please provide a job description"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        k = int(request.data.get("k") or 10)
+        nprobe = max(1, int(request.data.get("nprobe"))) if request.data.get("nprobe") else None
+    except (TypeError, ValueError):
+        return Response({"error": "k and nprobe must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+    k = max(1, min(k, settings.RESUME_SEARCH_MAX_K))
+    exact = bool(request.data.get("exact"))
+
+    try:
+        job_embedding = embedding_models.encode([job_description])[0]
+    except ImportError:
+        return _sentence_transformers_missing()
+    try:
+        hits = resume_vector_index.search(job_embedding, k, nprobe=nprobe, exact=exact)
+    except resume_vector_index.IndexNotBuilt:
+        return Response(
+            {"error": "The resume index has not been built. Run manage.py rebuild_resume_index."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    resume_docs = {
+        str(resume_doc["_id"]): resume_doc
+        for resume_doc in resume_repository.resumes_collection().find(
+            {"_id": {"$in": [ObjectId(resume_id) for resume_id, _ in hits]}},
+            resume_repository.get_projection("search"),
+        )
+    }
+    results = []
+    for resume_id, similarity in hits:
+        resume_doc = resume_docs.get(resume_id)
+        if resume_doc is None:
+            # Deleted after its last index write; gone after the next rebuild
+            continue
+        results.append({
+            "resume_id": resume_id,
+            "user_id": resume_doc.get("user_id"),
+            "name": resume_doc.get("name"),
+            "full_name": _full_name(resume_doc),
+            "similarity": round(similarity, 3),
+            "match_percentage": round(similarity * 100, 1),
+        })
+    return Response({"exact": exact, "index": resume_vector_index.stats(), "results": results})
@@ -2,95 +2,154 @@
 PDF Generation Views using Playwright
 """
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.http import HttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed, JsonResponse
+from django.urls import reverse
 from bson import ObjectId
-from playwright.sync_api import sync_playwright
 import base64
-import json
+import re
+from .. import etags, pdf_bulk_export, pdf_cache, pdf_jobs, pdf_metrics, pdf_thumbnails, resume_html, resume_repository
+from ..pdf_browser_pool import BrowserPoolBusy, PdfLimitExceeded, render_async_pdf, render_pdf
 
 
-def generate_pdf_from_html(html_content: str) -> bytes:
+def generate_pdf_from_html(html_content: str, acquire_timeout=None, timings=None) -> bytes:
     """
-    Generate PDF from HTML content using Playwright (synchronous)
+    Generate PDF from HTML content on this worker's persistent browser
+    (see api/pdf_browser_pool.py). Raises BrowserPoolBusy when every render
+    slot stays busy and PdfLimitExceeded when the PDF is too long. Stage
+    durations are added to `timings` (api/pdf_metrics.RenderTimings).
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-        # Match browser PDF output: layout uses print CSS (same as page.pdf default)
-        page.emulate_media(media='print')
-        
-        # Set content and wait for it to load
-        page.set_content(html_content, wait_until='networkidle')
-        
-        # Generate PDF with A4 format and zero margins (padding is handled in CSS)
-        # prefer_css_page_size ensures @page rules and margin boxes are respected
-        pdf_bytes = page.pdf(
-            format='A4',
-            margin={
-                'top': '0mm',
-                'right': '0mm',
-                'bottom': '0mm',  # Keep 0 - CSS @page handles it
-                'left': '0mm'
-            },
-            print_background=True,
-            prefer_css_page_size=True,  # Important for @page rules and margin boxes
+    return render_pdf(html_content, acquire_timeout=acquire_timeout, timings=timings)
+
+
+def _owned_resume_or_error(request, resume_id):
+    """Return an error Response unless resume_id is a resume of request.user."""
+    try:
+        resume_object_id = ObjectId(resume_id)
+    except Exception:
+        return Response(
+            {'error': 'Invalid resume ID format'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not resume_repository.exists_for_user(resume_object_id, request.user.id):
+        return Response(
+            {'error': 'Resume not found'},
+            status=status.HTTP_404_NOT_FOUND
         )
+    return None
 
-        browser.close()
-        return pdf_bytes
 
+def _html_from_request(request):
+    """HTML from the request body (plain or base64 encoded), or None."""
+    html_content = request.data.get('html') or request.POST.get('html')
+    if not html_content:
+        return None
+    # Decode base64 HTML if needed, or use directly
+    try:
+        # Try to decode as base64 first
+        return base64.b64decode(html_content).decode('utf-8')
+    except Exception:
+        # If decoding fails, use as-is (might be plain HTML)
+        return html_content
 
-@api_view(['POST'])
+
+def _html_required():
+    return Response(
+        {'error': 'HTML content is required. Please provide rendered HTML in request body.'},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def _pdf_busy():
+    response = Response(
+        {'error': 'PDF export is busy. Please try again in a few seconds.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = '5'
+    return response
+
+
+def _pdf_too_large(error):
+    return Response(
+        {'error': f'{error}. Please shorten the resume and try again.'},
+        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+
+
+def _pdf_file_response(pdf_file, resume_id):
+    return FileResponse(
+        pdf_file,
+        as_attachment=True,
+        filename=f'resume_{resume_id}.pdf',
+        content_type='application/pdf',
+    )
+
+
+def _pdf_bytes_response(pdf_bytes, resume_id):
+    """
+    Response for freshly rendered bytes. Playwright hands the whole PDF over
+    as one bytes object, so the response holds that object as-is (no second
+    copy); PDF_MAX_BYTES bounds its size.
+    """
+    response = HttpResponse(pdf_bytes, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="resume_{resume_id}.pdf"'
+    return response
+
+
+def _export_options(resume_doc, params):
+    """(template, language) for a server-side export; raises UnknownTemplate."""
+    template = resume_html.resolve_template(resume_doc, params.get('template'))
+    language = params.get('lang', 'en')
+    if language not in resume_html.LABELS:
+        language = 'en'
+    return template, language
+
+
+def _job_accepted(request, job):
+    response = Response(pdf_jobs.job_payload(job, request), status=status.HTTP_202_ACCEPTED)
+    response['Location'] = response.data['status_url']
+    return response
+
+
+@api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def generate_resume_pdf(request, resume_id):
     """
     Generate PDF for a resume
     
-    Expects POST request with HTML content in the request body as JSON:
+    GET renders the stored resume server-side (api/resume_html.py):
+    ?template=modern|classic|minimal|creative|latex|starRover (default: the
+    resume's own template) and ?lang=en|de for section headings.
+    
+    POST expects HTML content in the request body as JSON:
     {
         "html": "<html>...</html>" or base64 encoded string
     }
+
+    Returns the PDF. With PDF_JOBS_ENABLED and a busy render worker it
+    returns 202 with a job instead (see pdf_job_detail).
     """
+    timings = pdf_metrics.RenderTimings()
     try:
-        # Validate resume exists and belongs to user
-        from pymongo import MongoClient
-        import os
-        
-        # Connect to MongoDB
-        connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-        if connection_string:
-            try:
-                client = MongoClient(connection_string)
-                client.admin.command('ping')
-            except Exception:
-                connection_string = None
-        
-        if not connection_string:
-            mongo_host = os.getenv('MONGODB_HOST', 'mongodb')
-            mongo_port = int(os.getenv('MONGODB_PORT', 27017))
-            mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-            mongo_username = os.getenv('MONGODB_USERNAME', '')
-            mongo_password = os.getenv('MONGODB_PASSWORD', '')
-            
-            if mongo_username and mongo_password:
-                client = MongoClient(
-                    mongo_host,
-                    mongo_port,
-                    username=mongo_username,
-                    password=mongo_password,
-                    authSource='admin',
-                    authMechanism='SCRAM-SHA-1'
-                )
-            else:
-                client = MongoClient(mongo_host, mongo_port)
-        
-        mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-        db = client[mongo_db]
-        
-        # Validate ObjectId
+        response = _export_pdf(request, resume_id, timings)
+    except Exception as e:
+        import traceback
+        response = Response(
+            {'error': f'Failed to generate PDF: {str(e)}', 'detail': str(traceback.format_exc())},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    # Stage durations, visible in the browser's network panel
+    return timings.apply(response)
+
+
+def _export_pdf(request, resume_id, timings):
+    if request.method == 'GET':
         try:
             resume_object_id = ObjectId(resume_id)
         except Exception:
@@ -98,44 +157,385 @@ def generate_resume_pdf(request, resume_id):
                 {'error': 'Invalid resume ID format'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Check if resume exists and belongs to user
-        resume_doc = db.resumes.find_one({'_id': resume_object_id, 'user_id': request.user.id})
+        resume_doc = resume_repository.find_one_for_user(resume_object_id, request.user.id)
         if not resume_doc:
             return Response(
                 {'error': 'Resume not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        
-        # Get HTML from request body
-        html_content = request.data.get('html') or request.POST.get('html')
-        
-        if not html_content:
+        try:
+            template, language = _export_options(resume_doc, request.query_params)
+        except resume_html.UnknownTemplate as e:
             return Response(
-                {'error': 'HTML content is required. Please provide rendered HTML in request body.'},
+                {'error': f"Unknown template '{e}'", 'templates': list(resume_html.TEMPLATES)},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Decode base64 HTML if needed, or use directly
-        try:
-            # Try to decode as base64 first
-            html_content = base64.b64decode(html_content).decode('utf-8')
-        except:
-            # If decoding fails, use as-is (might be plain HTML)
-            pass
+        # Keyed by updated_at: an unchanged resume skips even the HTML rendering
+        cache_key = pdf_cache.resume_cache_key(resume_doc, template, language)
+        with timings.stage('cache_lookup'):
+            cached_file = pdf_cache.open_cached(cache_key)
+        if cached_file is not None:
+            return _pdf_file_response(cached_file, resume_id)
+        with timings.stage('html'):
+            html_content = resume_html.render_resume_html(resume_doc, template, language)
+    else:
+        error_response = _owned_resume_or_error(request, resume_id)
+        if error_response is not None:
+            return error_response
         
-        # Generate PDF
-        pdf_bytes = generate_pdf_from_html(html_content)
+        with timings.stage('decode'):
+            html_content = _html_from_request(request)
+        if not html_content:
+            return _html_required()
         
-        # Return PDF as response
-        response = HttpResponse(pdf_bytes, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="resume_{resume_id}.pdf"'
+        # Unchanged export: same HTML, same PDF
+        with timings.stage('cache_lookup'):
+            cache_key = pdf_cache.cache_key(html_content)
+            cached_file = pdf_cache.open_cached(cache_key)
+        if cached_file is not None:
+            return _pdf_file_response(cached_file, resume_id)
+    
+    if settings.PDF_JOBS_ENABLED:
+        # Fast path only while the render worker is idle and a local slot is free;
+        # otherwise hand the job to the worker (202 + status URL)
+        if pdf_jobs.queue_depth() > 0:
+            return _job_accepted(request, pdf_jobs.submit(request.user.id, resume_id, html_content, cache_key))
+        try:
+            pdf_bytes = generate_pdf_from_html(html_content, acquire_timeout=0, timings=timings)
+        except BrowserPoolBusy:
+            return _job_accepted(request, pdf_jobs.submit(request.user.id, resume_id, html_content, cache_key))
+        except PdfLimitExceeded as e:
+            return _pdf_too_large(e)
+    else:
+        try:
+            pdf_bytes = generate_pdf_from_html(html_content, timings=timings)
+        except BrowserPoolBusy:
+            return _pdf_busy()
+        except PdfLimitExceeded as e:
+            return _pdf_too_large(e)
+    with timings.stage('cache_store'):
+        pdf_cache.store(cache_key, pdf_bytes)
+    
+    return _pdf_bytes_response(pdf_bytes, resume_id)
+
+
+async def _authenticated_user(request):
+    """The JWT user of a plain Django (non-DRF) view, or None."""
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+async def generate_resume_pdf_async(request, resume_id):
+    """
+    GET /resumes/<id>/pdf/async/?template=&lang= - same export as GET
+    generate_resume_pdf, as a native async view.
+
+    Under an ASGI server (config/asgi.py) waiting for a render slot and for
+    Chromium only suspends this coroutine, so many exports share one event
+    loop and the worker's single browser instead of holding a thread each.
+    Under WSGI it still works, on a per-request event loop. Never queues a
+    job: a saturated pool answers 503 after PDF_POOL_ACQUIRE_TIMEOUT.
+    """
+    # Django 3.2's method decorators are sync-only and would hide the coroutine
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    user = await _authenticated_user(request)
+    if user is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided or are invalid.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    try:
+        resume_object_id = ObjectId(resume_id)
+    except Exception:
+        return JsonResponse({'error': 'Invalid resume ID format'}, status=status.HTTP_400_BAD_REQUEST)
+    resume_doc = await sync_to_async(resume_repository.find_one_for_user)(resume_object_id, user.id)
+    if not resume_doc:
+        return JsonResponse({'error': 'Resume not found'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        template, language = _export_options(resume_doc, request.GET)
+    except resume_html.UnknownTemplate as e:
+        return JsonResponse(
+            {'error': f"Unknown template '{e}'", 'templates': list(resume_html.TEMPLATES)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    timings = pdf_metrics.RenderTimings()
+    try:
+        response = await _export_pdf_async(resume_doc, resume_id, template, language, timings)
+    finally:
+        # Timeouts and failures count in the histograms too
+        timings.finish()
+    return timings.apply(response)
+
+
+async def _export_pdf_async(resume_doc, resume_id, template, language, timings):
+    cache_key = pdf_cache.resume_cache_key(resume_doc, template, language)
+    with timings.stage('cache_lookup'):
+        cached_file = pdf_cache.open_cached(cache_key)
+    if cached_file is not None:
+        return _pdf_file_response(cached_file, resume_id)
+    with timings.stage('html'):
+        html_content = resume_html.render_resume_html(resume_doc, template, language)
+    try:
+        pdf_bytes = await render_async_pdf(html_content, timings=timings)
+    except BrowserPoolBusy:
+        response = JsonResponse(
+            {'error': 'PDF export is busy. Please try again in a few seconds.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        response['Retry-After'] = '5'
         return response
-        
-    except Exception as e:
-        import traceback
+    except PdfLimitExceeded as e:
+        return JsonResponse(
+            {'error': f'{e}. Please shorten the resume and try again.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    with timings.stage('cache_store'):
+        await sync_to_async(pdf_cache.store)(cache_key, pdf_bytes)
+    return _pdf_bytes_response(pdf_bytes, resume_id)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def resume_thumbnails(request, resume_id):
+    """
+    Page thumbnails of a resume (api/pdf_thumbnails.py)
+
+    Query: ?template=&lang= as for the PDF export, ?format=webp|png and
+    ?width= (one of PDF_THUMBNAIL_WIDTHS). Returns one URL per page; the
+    URLs change whenever the resume does, so the images are cacheable
+    forever. The response carries an ETag for cheap revalidation.
+    Generates the thumbnails on a miss (503 while the renderer is busy).
+    """
+    try:
+        resume_object_id = ObjectId(resume_id)
+    except Exception:
         return Response(
-            {'error': f'Failed to generate PDF: {str(e)}', 'detail': str(traceback.format_exc())},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {'error': 'Invalid resume ID format'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    resume_doc = resume_repository.find_one_for_user(resume_object_id, request.user.id)
+    if not resume_doc:
+        return Response(
+            {'error': 'Resume not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    try:
+        template, language = _export_options(resume_doc, request.query_params)
+        image_format, width = pdf_thumbnails.options(request.query_params)
+    except resume_html.UnknownTemplate as e:
+        return Response(
+            {'error': f"Unknown template '{e}'", 'templates': list(resume_html.TEMPLATES)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except pdf_thumbnails.InvalidThumbnailOptions as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    etag = '"{}"'.format(pdf_thumbnails.thumbnail_key(resume_doc, template, language, image_format, width))
+    if etags.none_match(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+
+    timings = pdf_metrics.RenderTimings()
+    try:
+        key, pages = pdf_thumbnails.ensure(
+            resume_doc, template, language, image_format, width,
+            lambda html_content: generate_pdf_from_html(html_content, timings=timings),
+            timings=timings,
         )
+    except BrowserPoolBusy:
+        response = _pdf_busy()
+    except PdfLimitExceeded as e:
+        response = _pdf_too_large(e)
+    else:
+        response = Response({
+            'resume_id': resume_id,
+            'template': template,
+            'format': image_format,
+            'width': width,
+            'pages': [
+                request.build_absolute_uri(reverse(
+                    'api:resume-thumbnail',
+                    kwargs={'resume_id': resume_id, 'key': key, 'page': page},
+                ))
+                for page in range(1, pages + 1)
+            ],
+        })
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+    return timings.apply(response)
+
+
+_THUMBNAIL_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def resume_thumbnail_page(request, resume_id, key, page):
+    """
+    One page image from resume_thumbnails; immutable, cached by the browser.
+    Only served if the set was generated from this (owned) resume.
+    """
+    error_response = _owned_resume_or_error(request, resume_id)
+    if error_response is not None:
+        return error_response
+    if _THUMBNAIL_KEY_RE.match(key) and pdf_thumbnails.set_owner(key) == str(ObjectId(resume_id)):
+        for image_format, (_, content_type) in pdf_thumbnails.FORMATS.items():
+            try:
+                image_file = open(pdf_thumbnails.page_path(key, page, image_format), 'rb')
+            except FileNotFoundError:
+                continue
+            response = FileResponse(image_file, content_type=content_type)
+            response['Cache-Control'] = 'private, max-age=31536000, immutable'
+            return response
+    return Response({'error': 'Thumbnail not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def pdf_job_submit(request, resume_id):
+    """
+    Queue a PDF render for the render worker.
+
+    Body as for generate_resume_pdf. Returns 202 with job_id and status_url.
+    """
+    if not settings.PDF_JOBS_ENABLED:
+        return Response(
+            {'error': 'Background PDF rendering is not enabled. Use POST /resumes/<id>/pdf/.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    error_response = _owned_resume_or_error(request, resume_id)
+    if error_response is not None:
+        return error_response
+    html_content = _html_from_request(request)
+    if not html_content:
+        return _html_required()
+    return _job_accepted(request, pdf_jobs.submit(request.user.id, resume_id, html_content))
+
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def pdf_job_detail(request, resume_id, job_id):
+    """
+    Status of a PDF job: queued, running, done (result_url is set) or failed.
+    """
+    job = pdf_jobs.find_for_user(job_id, request.user.id, resume_id)
+    if job is None:
+        return Response({'error': 'PDF job not found'}, status=status.HTTP_404_NOT_FOUND)
+    response = Response(pdf_jobs.job_payload(job, request))
+    if job['status'] in (pdf_jobs.QUEUED, pdf_jobs.RUNNING):
+        response['Retry-After'] = '1'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def pdf_job_result(request, resume_id, job_id):
+    """
+    Download the PDF of a finished job.
+    """
+    job = pdf_jobs.find_for_user(job_id, request.user.id, resume_id)
+    if job is None:
+        return Response({'error': 'PDF job not found'}, status=status.HTTP_404_NOT_FOUND)
+    if job['status'] != pdf_jobs.DONE:
+        return Response(
+            {'error': f"PDF job is {job['status']}", 'status': job['status']},
+            status=status.HTTP_409_CONFLICT
+        )
+    try:
+        pdf_file = open(pdf_jobs.result_path(job['_id']), 'rb')
+    except FileNotFoundError:
+        return Response({'error': 'PDF result has expired'}, status=status.HTTP_410_GONE)
+    return _pdf_file_response(pdf_file, resume_id)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def pdf_export_submit(request):
+    """
+    Queue a bulk PDF export (staff only), run by the render worker.
+
+    Body: {"user_ids": [33, 41], "resume_ids": ["<id>", ...],
+           "template": "modern" (optional, default: each resume's own), "lang": "en"}
+    Returns 202 with job_id and status_url; the status reports progress and
+    throughput, result_url serves the zip once done.
+    """
+    if not settings.PDF_JOBS_ENABLED:
+        return Response(
+            {'error': 'Bulk export needs the render worker. Use manage.py export_resume_pdfs.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    user_ids = request.data.get('user_ids') or []
+    resume_ids = request.data.get('resume_ids') or []
+    if not isinstance(user_ids, list) or not isinstance(resume_ids, list) or not (user_ids or resume_ids):
+        return Response(
+            {'error': 'Provide user_ids and/or resume_ids as lists'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        user_ids = [int(user_id) for user_id in user_ids]
+        resume_ids = pdf_bulk_export.parse_resume_ids(resume_ids)
+    except (TypeError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    template = request.data.get('template')
+    if template and template not in resume_html.TEMPLATES:
+        return Response(
+            {'error': f"Unknown template '{template}'", 'templates': list(resume_html.TEMPLATES)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    language = request.data.get('lang', 'en')
+    if language not in resume_html.LABELS:
+        language = 'en'
+
+    job = pdf_jobs.submit_export(request.user.id, user_ids, resume_ids, template, language)
+    response = Response(pdf_jobs.export_payload(job, request), status=status.HTTP_202_ACCEPTED)
+    response['Location'] = response.data['status_url']
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def pdf_export_detail(request, job_id):
+    """
+    Status of a bulk export: progress ({total, exported, failed, bytes,
+    elapsed, per_second}) while running, result_url once done.
+    """
+    job = pdf_jobs.find_export(job_id)
+    if job is None:
+        return Response({'error': 'Export not found'}, status=status.HTTP_404_NOT_FOUND)
+    response = Response(pdf_jobs.export_payload(job, request))
+    if job['status'] in (pdf_jobs.QUEUED, pdf_jobs.RUNNING):
+        response['Retry-After'] = '5'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def pdf_export_result(request, job_id):
+    """
+    Download the zip of a finished bulk export.
+    """
+    job = pdf_jobs.find_export(job_id)
+    if job is None:
+        return Response({'error': 'Export not found'}, status=status.HTTP_404_NOT_FOUND)
+    if job['status'] != pdf_jobs.DONE:
+        return Response(
+            {'error': f"Export is {job['status']}", 'status': job['status']},
+            status=status.HTTP_409_CONFLICT
+        )
+    try:
+        zip_file = open(pdf_jobs.export_path(job['_id']), 'rb')
+    except FileNotFoundError:
+        return Response({'error': 'Export has expired'}, status=status.HTTP_410_GONE)
+    return FileResponse(
+        zip_file,
+        as_attachment=True,
+        filename=f"resume_export_{job['_id']}.zip",
+        content_type='application/zip',
+    )
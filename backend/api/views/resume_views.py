@@ -1,22 +1,38 @@
 """
 Resume CRUD views (list, create, retrieve, update, delete)
 """
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from bson import ObjectId as BsonObjectId
 from datetime import datetime
-from .utils import get_date_or_now
+from .utils import get_date_or_now, utcnow_ms
+from .. import (
+    etags, pagination, pdf_thumbnails, public_profile_cache, public_profile_snapshots, resume_embeddings,
+    resume_repository,
+)
+from ..resume_patch import parse_patch_operations
 from ..serializers import ResumeSerializer
 # Backend scorer removed - scores are now calculated on frontend
 
 
+_RESUME_LIST_FIELD_SETS = ('detail', 'summary')
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def resume_list(request):
     """
     List all resumes for the authenticated user
+
+    GET query:
+    - fields=detail (default): full resume documents
+    - fields=summary: only what the "My Resumes" screen shows (id, name,
+      template, scores, public profile flags, timestamps)
+    - limit / cursor: keyset pages, newest first; the response becomes
+      {"results": [...], "next": url or null}. Without either parameter
+      the full list is returned as before.
     """
     import logging
     import sys
@@ -26,51 +42,34 @@ def resume_list(request):
     
     if request.method == 'GET':
         try:
-            # Get raw data from MongoDB without instantiating abstract models
-            from pymongo import MongoClient
-            import os
-            
-            # Connect to MongoDB directly
-            # First try to use connection string if available
-            connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-            if connection_string:
-                # Try using connection string, but if it fails, fall back to individual vars
-                try:
-                    client = MongoClient(connection_string)
-                    # Test the connection
-                    client.admin.command('ping')
-                except Exception:
-                    # Connection string might have encoding issues, use individual vars
-                    connection_string = None
-            
-            if not connection_string:
-                # Use individual env vars (more reliable for special characters)
-                mongo_host = os.getenv('MONGODB_HOST', 'localhost')
-                mongo_port = int(os.getenv('MONGODB_PORT', 27017))
-                mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-                mongo_username = os.getenv('MONGODB_USERNAME', '')
-                mongo_password = os.getenv('MONGODB_PASSWORD', '')
-                
-                # Create authenticated connection
-                if mongo_username and mongo_password:
-                    client = MongoClient(
-                        mongo_host,
-                        mongo_port,
-                        username=mongo_username,
-                        password=mongo_password,
-                        authSource='admin',
-                        authMechanism='SCRAM-SHA-1'
-                    )
-                else:
-                    client = MongoClient(mongo_host, mongo_port)
-            
-            mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
+            fields = request.query_params.get('fields', 'detail')
+            if fields not in _RESUME_LIST_FIELD_SETS:
+                return Response(
+                    {'error': f"fields must be one of: {', '.join(_RESUME_LIST_FIELD_SETS)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            db = client[mongo_db]
+            try:
+                page_params = pagination.get_page_params(request)
+            except pagination.InvalidPageParams as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Get resumes for this user
+            # Get resumes for this user (projection keeps summary reads small)
             user_id = request.user.id
-            resumes_cursor = db.resumes.find({'user_id': user_id})
+            next_cursor = None
+            if page_params:
+                limit, after = page_params
+                resumes_cursor, next_cursor = resume_repository.find_page_for_user(
+                    user_id, limit, after=after, fields=fields,
+                )
+            else:
+                resumes_cursor = resume_repository.find_for_user(user_id, fields=fields)
+            
+            if fields == 'summary':
+                resumes_data = [_resume_summary_dict_from_doc(doc) for doc in resumes_cursor]
+                if page_params:
+                    return Response(pagination.paginated_payload(request, resumes_data, next_cursor))
+                return Response(resumes_data)
             
             resumes_data = []
             for resume_doc in resumes_cursor:
@@ -116,6 +115,8 @@ def resume_list(request):
                 }
                 resumes_data.append(resume_dict)
             
+            if page_params:
+                return Response(pagination.paginated_payload(request, resumes_data, next_cursor))
             return Response(resumes_data)
         except Exception as e:
             logger.error(f"Error listing resumes: {str(e)}")
@@ -139,42 +140,6 @@ def resume_list(request):
         serializer = ResumeSerializer(data=request.data)
         if serializer.is_valid():
             try:
-                # Setup MongoDB connection
-                from pymongo import MongoClient
-                import os
-                
-                # First try to use connection string if available
-                connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-                if connection_string:
-                    try:
-                        client = MongoClient(connection_string)
-                        client.admin.command('ping')
-                    except Exception:
-                        connection_string = None
-                
-                if not connection_string:
-                    # In Docker, use service name 'mongodb', otherwise 'localhost'
-                    mongo_host = os.getenv('MONGODB_HOST', 'mongodb')
-                    mongo_port = int(os.getenv('MONGODB_PORT', 27017))
-                    mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-                    mongo_username = os.getenv('MONGODB_USERNAME', '')
-                    mongo_password = os.getenv('MONGODB_PASSWORD', '')
-                    
-                    if mongo_username and mongo_password:
-                        client = MongoClient(
-                            mongo_host,
-                            mongo_port,
-                            username=mongo_username,
-                            password=mongo_password,
-                            authSource='admin',
-                            authMechanism='SCRAM-SHA-1'
-                        )
-                    else:
-                        client = MongoClient(mongo_host, mongo_port)
-                
-                mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-                db = client[mongo_db]
-                
                 # Save data from validated_data
                 data = serializer.validated_data
                 
@@ -193,6 +158,7 @@ def resume_list(request):
                 print(f"[STYLING LOG] resume_list POST (create): has_styling_in_request={'styling' in request.data}, has_styling_in_validated={'styling' in data}, styling_keys={list(styling_from_request.keys()) if isinstance(styling_from_request, dict) else None}, font_size={styling_from_request.get('font_size') if isinstance(styling_from_request, dict) else None}", file=sys.stderr)
                 
                 # Prepare document for MongoDB
+                now = utcnow_ms()
                 resume_doc = {
                     'user_id': request.user.id,
                     'name': data.get('name'),
@@ -221,16 +187,17 @@ def resume_list(request):
                     'impact_score': quality_scores.get('impact_score', 0.0),
                     'overall_score': quality_scores.get('overall_score', 0.0),
                     'public_profile_enabled': False,
-                    'created_at': datetime.utcnow(),
-                    'updated_at': datetime.utcnow(),
+                    'created_at': now,
+                    'updated_at': now,
                 }
                 
-                # Insert into MongoDB
-                result = db.resumes.insert_one(resume_doc)
-                resume_id = result.inserted_id
-                
-                # Retrieve the created resume
-                created_doc = db.resumes.find_one({'_id': resume_id})
+                # Insert into MongoDB; insert_one fills in resume_doc['_id'], so the
+                # response is built from the document we just wrote (no re-read)
+                resume_repository.insert(resume_doc)
+                resume_id = resume_doc['_id']
+                created_doc = resume_doc
+                pdf_thumbnails.resume_changed(request.user.id, resume_id)
+                resume_embeddings.resume_changed(resume_id)
                 
                 # Minimal logging of styling after creation
                 created_styling = created_doc.get('styling')
@@ -292,52 +259,19 @@ def resume_list(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(['GET', 'PUT', 'DELETE'])
+@api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def resume_detail(request, pk):
     """
     Retrieve, update or delete a resume (only if it belongs to the authenticated user)
+
+    PATCH: field-level autosave, body is a list of {"path", "value"} changes
+    such as {"path": "work_experience.2.description", "value": "..."}
+    (see api/resume_patch.py). Responds with id and updated_at only.
+
+    GET honours If-None-Match (304); PUT and PATCH honour If-Match (412 when
+    the resume changed since the client's ETag was issued).
     """
-    # Setup MongoDB connection for all methods
-    from pymongo import MongoClient
-    import os
-    
-    # First try to use connection string if available
-    connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-    if connection_string:
-        # Try using connection string, but if it fails, fall back to individual vars
-        try:
-            client = MongoClient(connection_string)
-            # Test the connection
-            client.admin.command('ping')
-        except Exception:
-            # Connection string might have encoding issues, use individual vars
-            connection_string = None
-    
-    if not connection_string:
-        # Use individual env vars (more reliable for special characters)
-        mongo_host = os.getenv('MONGODB_HOST', 'localhost')
-        mongo_port = int(os.getenv('MONGODB_PORT', 27017))
-        mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-        mongo_username = os.getenv('MONGODB_USERNAME', '')
-        mongo_password = os.getenv('MONGODB_PASSWORD', '')
-        
-        # Create authenticated connection
-        if mongo_username and mongo_password:
-            client = MongoClient(
-                mongo_host,
-                mongo_port,
-                username=mongo_username,
-                password=mongo_password,
-                authSource='admin',
-                authMechanism='SCRAM-SHA-1'
-            )
-        else:
-            client = MongoClient(mongo_host, mongo_port)
-    
-    mongo_db = os.getenv('MONGODB_NAME', 'resume_db')
-    db = client[mongo_db]
-    
     # Validate ObjectId format
     try:
         resume_id = BsonObjectId(pk)
@@ -353,8 +287,14 @@ def resume_detail(request, pk):
         logger = logging.getLogger(__name__)
         
         try:
+            # Conditional GET: compare ETags on a tiny projection before loading the resume
+            if request.META.get('HTTP_IF_NONE_MATCH'):
+                head = resume_repository.find_one_for_user(resume_id, request.user.id, fields='etag')
+                if head is not None and etags.none_match(request, etags.resume_etag(head)):
+                    return _not_modified(etags.resume_etag(head))
+            
             # Get the specific resume
-            resume_doc = db.resumes.find_one({'_id': resume_id, 'user_id': request.user.id})
+            resume_doc = resume_repository.find_one_for_user(resume_id, request.user.id)
             
             if not resume_doc:
                 return Response(
@@ -366,7 +306,7 @@ def resume_detail(request, pk):
             styling_from_db = resume_doc.get('styling')
             print(f"[STYLING LOG] resume_detail GET: resume_id={resume_doc.get('_id')}, has_styling={styling_from_db is not None}, styling_keys={list(styling_from_db.keys()) if isinstance(styling_from_db, dict) else None}, font_size={(styling_from_db or {}).get('font_size') if isinstance(styling_from_db, dict) else None}", file=sys.stderr)
             
-            return Response(_resume_dict_from_doc(resume_doc))
+            return _with_etag(Response(_resume_dict_from_doc(resume_doc)), etags.resume_etag(resume_doc))
         except Exception as e:
             logger.error(f"Error serializing resume: {str(e)}")
             import traceback
@@ -392,53 +332,43 @@ def resume_detail(request, pk):
                     'overall_score': data.get('overall_score', 0.0),
                 }
                 
-                # Update the resume in MongoDB
-                # Get existing resume to preserve created_at
-                existing_doc = db.resumes.find_one({'_id': resume_id, 'user_id': request.user.id})
-                if not existing_doc:
-                    return Response(
-                        {'error': 'Resume not found'},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-                
                 # Minimal logging of styling coming from frontend / serializer (no PII)
                 print(f"[STYLING LOG] resume_detail PUT (before update): resume_id={resume_id}, has_styling_in_request={'styling' in request.data}, has_styling_in_validated={'styling' in data}, validated_styling_keys={list((data.get('styling') or {}).keys()) if isinstance(data.get('styling'), dict) else None}", file=sys.stderr)
                 
-                # Prepare update data - preserve created_at, update everything else
+                # Prepare update data - update everything the form owns. created_at and
+                # the public_profile_* fields are not in the serializer, so they are left
+                # untouched (full-form saves must not clear public profile visibility,
+                # which is managed on My Resumes).
                 update_data = serializer.validated_data.copy()
                 update_data.update(quality_scores)  # Add scores to update
-                # Do not let full-form saves clear public profile visibility (managed on My Resumes)
-                update_data['public_profile_enabled'] = existing_doc.get('public_profile_enabled', False)
-                update_data['public_profile_sections'] = _normalize_public_profile_sections(
-                    existing_doc.get('public_profile_sections'),
-                )
-                update_data['public_profile_theme'] = _normalize_public_profile_theme(
-                    existing_doc.get('public_profile_theme'),
-                )
                 update_data['updated_at'] = datetime.utcnow()  # Set updated_at timestamp
-                # Preserve created_at from existing document
-                if 'created_at' in existing_doc:
-                    update_data['created_at'] = existing_doc['created_at']
                 
-                result = db.resumes.update_one(
-                    {'_id': resume_id, 'user_id': request.user.id},
-                    {'$set': update_data}
+                # Optimistic concurrency: If-Match becomes part of the update filter
+                try:
+                    precondition = etags.if_match_filter(request, resume_id)
+                except etags.PreconditionFailed:
+                    return _precondition_failed()
+                
+                # Single round trip: update and return the new document atomically
+                updated_doc = resume_repository.update_for_user(
+                    resume_id, request.user.id, update_data, extra_filter=precondition,
                 )
                 
-                if result.matched_count == 0:
+                if updated_doc is None:
+                    if precondition:
+                        return _precondition_failed()
                     return Response(
                         {'error': 'Resume not found'},
                         status=status.HTTP_404_NOT_FOUND
                     )
                 
-                # Return updated resume
-                updated_doc = db.resumes.find_one({'_id': resume_id})
+                _resume_changed(resume_id, request.user.id)
                 
                 # Minimal logging of styling after update (to compare with request)
                 updated_styling = updated_doc.get('styling')
                 print(f"[STYLING LOG] resume_detail PUT (after update): resume_id={updated_doc.get('_id')}, has_styling={updated_styling is not None}, styling_keys={list(updated_styling.keys()) if isinstance(updated_styling, dict) else None}, font_size={(updated_styling or {}).get('font_size') if isinstance(updated_styling, dict) else None}", file=sys.stderr)
                 
-                return Response(_resume_dict_from_doc(updated_doc))
+                return _with_etag(Response(_resume_dict_from_doc(updated_doc)), etags.resume_etag(updated_doc))
             except Exception as e:
                 return Response(
                     {'error': str(e)},
@@ -446,14 +376,48 @@ def resume_detail(request, pk):
                 )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    elif request.method == 'DELETE':
-        result = db.resumes.delete_one({'_id': resume_id, 'user_id': request.user.id})
+    elif request.method == 'PATCH':
+        try:
+            set_fields, array_paths = parse_patch_operations(request.data)
+        except serializers.ValidationError as e:
+            return Response({'error': e.detail}, status=status.HTTP_400_BAD_REQUEST)
         
-        if result.deleted_count == 0:
+        try:
+            precondition = etags.if_match_filter(request, resume_id)
+        except etags.PreconditionFailed:
+            return _precondition_failed()
+        
+        set_fields['updated_at'] = datetime.utcnow()
+        updated_doc = resume_repository.patch_for_user(
+            resume_id, request.user.id, set_fields, array_paths, extra_filter=precondition,
+        )
+        
+        if updated_doc is None:
+            if precondition:
+                return _precondition_failed()
+            if array_paths and resume_repository.exists_for_user(resume_id, request.user.id):
+                return Response(
+                    {'error': f"List index out of range in: {', '.join(array_paths)}"},
+                    status=status.HTTP_409_CONFLICT
+                )
             return Response(
                 {'error': 'Resume not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        _resume_changed(resume_id, request.user.id)
+        return _with_etag(Response({
+            'id': str(updated_doc['_id']),
+            'updated_at': get_date_or_now(updated_doc.get('updated_at')),
+        }), etags.resume_etag(updated_doc))
+    
+    elif request.method == 'DELETE':
+        if not resume_repository.delete_for_user(resume_id, request.user.id):
+            return Response(
+                {'error': 'Resume not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        _resume_changed(resume_id)
 
         return Response(
             {'message': 'Resume deleted successfully'},
@@ -461,39 +425,6 @@ def resume_detail(request, pk):
         )
 
 
-def _mongo_db():
-    """Return pymongo Database handle (same connection logic as resume_detail)."""
-    from pymongo import MongoClient
-    import os
-
-    connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-    if connection_string:
-        try:
-            client = MongoClient(connection_string)
-            client.admin.command('ping')
-        except Exception:
-            connection_string = None
-
-    if not connection_string:
-        mongo_host = os.getenv('MONGODB_HOST', 'localhost')
-        mongo_port = int(os.getenv('MONGODB_PORT', 27017))
-        mongo_username = os.getenv('MONGODB_USERNAME', '')
-        mongo_password = os.getenv('MONGODB_PASSWORD', '')
-        if mongo_username and mongo_password:
-            client = MongoClient(
-                mongo_host,
-                mongo_port,
-                username=mongo_username,
-                password=mongo_password,
-                authSource='admin',
-                authMechanism='SCRAM-SHA-1',
-            )
-        else:
-            client = MongoClient(mongo_host, mongo_port)
-
-    return client[os.getenv('MONGODB_NAME', 'resume_db')]
-
-
 # Hosted profile (/p/:id): which sections visitors see (all default True).
 _PUBLIC_PROFILE_SECTION_KEYS = (
     'photo',
@@ -608,6 +539,70 @@ def _resume_dict_from_doc(resume_doc):
     }
 
 
+def _resume_summary_dict_from_doc(resume_doc):
+    """Shape a summary-projected resume document (resume_repository.SUMMARY_PROJECTION)."""
+    return {
+        'id': str(resume_doc['_id']),
+        'name': resume_doc.get('name'),
+        'template': resume_doc.get('template', 'modern'),
+        'completeness_score': resume_doc.get('completeness_score', 0.0),
+        'clarity_score': resume_doc.get('clarity_score', 0.0),
+        'formatting_score': resume_doc.get('formatting_score', 0.0),
+        'impact_score': resume_doc.get('impact_score', 0.0),
+        'overall_score': resume_doc.get('overall_score', 0.0),
+        'public_profile_enabled': resume_doc.get('public_profile_enabled', False),
+        'public_profile_sections': _normalize_public_profile_sections(
+            resume_doc.get('public_profile_sections'),
+        ),
+        'public_profile_theme': _normalize_public_profile_theme(
+            resume_doc.get('public_profile_theme'),
+        ),
+        'created_at': get_date_or_now(resume_doc.get('created_at')),
+        'updated_at': get_date_or_now(resume_doc.get('updated_at')),
+    }
+
+
+def _resume_changed(resume_id, user_id=None):
+    """
+    Drop derived copies of a resume after any successful write; with the
+    owner's user_id (create/update, not delete) also queue its thumbnails
+    and match embedding, without it (delete) remove the embedding.
+    """
+    public_profile_cache.invalidate(resume_id)
+    public_profile_snapshots.resume_changed(resume_id)
+    if user_id is None:
+        resume_embeddings.remove(resume_id)
+    else:
+        pdf_thumbnails.resume_changed(user_id, resume_id)
+        resume_embeddings.resume_changed(resume_id)
+
+
+def _with_etag(response, etag):
+    """Attach the resume's ETag; clients must revalidate before reusing it."""
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _not_modified(etag):
+    return _with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+
+def _load_public_profile(resume_id):
+    """Cache loader: (etag, payload) for a public resume, or None."""
+    resume_doc = resume_repository.find_public(BsonObjectId(resume_id))
+    if not resume_doc:
+        return None
+    return etags.resume_etag(resume_doc), _resume_dict_from_doc(resume_doc)
+
+
+def _precondition_failed():
+    return Response(
+        {'error': 'Resume was modified by another request. Reload and try again.'},
+        status=status.HTTP_412_PRECONDITION_FAILED
+    )
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_resume_detail(request, pk):
@@ -615,7 +610,6 @@ def public_resume_detail(request, pk):
     Public read-only resume payload when the owner enabled hosted profile.
     No authentication required.
     """
-    db = _mongo_db()
     try:
         resume_id = BsonObjectId(pk)
     except Exception:
@@ -624,14 +618,18 @@ def public_resume_detail(request, pk):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    resume_doc = db.resumes.find_one({'_id': resume_id})
-    if not resume_doc or not resume_doc.get('public_profile_enabled', False):
+    # Read-through cache: hits skip Mongo and the normalisation work entirely
+    cached = public_profile_cache.get_or_load(resume_id, _load_public_profile)
+    if cached is None:
         return Response(
             {'error': 'Not found'},
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    return Response(_resume_dict_from_doc(resume_doc))
+    etag, payload = cached
+    if etags.none_match(request, etag):
+        return _not_modified(etag)
+    return _with_etag(Response(payload), etag)
 
 
 @api_view(['POST'])
@@ -641,7 +639,6 @@ def resume_public_profile_toggle(request, pk):
     Enable or disable public hosted profile for a resume (owner only).
     Body: {"enabled": true, "sections": {...} optional, "theme": "orange"|"blue"|"green"|"violet" optional}
     """
-    db = _mongo_db()
     try:
         resume_id = BsonObjectId(pk)
     except Exception:
@@ -671,18 +668,17 @@ def resume_public_profile_toggle(request, pk):
     if theme_payload is not None:
         set_fields['public_profile_theme'] = _normalize_public_profile_theme(theme_payload)
 
-    result = db.resumes.update_one(
-        {'_id': resume_id, 'user_id': request.user.id},
-        {'$set': set_fields},
+    updated = resume_repository.update_for_user(
+        resume_id, request.user.id, set_fields, fields='public_profile',
     )
 
-    if result.matched_count == 0:
+    if updated is None:
         return Response(
             {'error': 'Resume not found'},
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    updated = db.resumes.find_one({'_id': resume_id})
+    _resume_changed(resume_id, request.user.id)
     return Response(
         {
             'id': str(updated['_id']),
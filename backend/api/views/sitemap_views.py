@@ -6,8 +6,7 @@ from django.http import HttpResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from datetime import datetime
-import os
-from pymongo import MongoClient
+from ..mongo import get_db
 
 
 @api_view(['GET'])
@@ -18,40 +17,8 @@ def generate_sitemap(request):
     - Static pages
     - All published blog posts (both languages)
     """
-    # Get MongoDB connection (same logic as resume_views.py)
-    connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-    if connection_string:
-        try:
-            client = MongoClient(connection_string)
-            client.admin.command('ping')
-        except Exception:
-            connection_string = None
-    
-    if not connection_string:
-        mongo_host = os.getenv('MONGODB_HOST', 'mongodb')
-        mongo_port = int(os.getenv('MONGODB_PORT', 27017))
-        mongo_username = os.getenv('MONGODB_USERNAME', '')
-        mongo_password = os.getenv('MONGODB_PASSWORD', '')
-        
-        try:
-            if mongo_username and mongo_password:
-                client = MongoClient(
-                    mongo_host,
-                    mongo_port,
-                    username=mongo_username,
-                    password=mongo_password,
-                    authSource='admin',
-                    authMechanism='SCRAM-SHA-1'
-                )
-            else:
-                client = MongoClient(mongo_host, mongo_port)
-        except Exception as e:
-            # If database connection fails, return static sitemap
-            return generate_static_sitemap()
-    
     try:
-        db = client[os.getenv('MONGODB_NAME', 'resume_db')]
-        blog_collection = db['blog_posts']
+        blog_collection = get_db()['blog_posts']
     except Exception as e:
         # If database connection fails, return static sitemap
         return generate_static_sitemap()
@@ -57,3 +57,12 @@ def get_date_or_now(date_value):
     # Return current date as fallback
     return datetime.utcnow().isoformat()
 
+
+
+def utcnow_ms():
+    """
+    Current UTC time truncated to milliseconds (BSON datetime precision), so a
+    document built in memory serializes exactly like the stored copy.
+    """
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond - now.microsecond % 1000)
@@ -1,5 +1,11 @@
 """
 ASGI config for resume backend project.
+
+Production runs WSGI (config/wsgi.py). Serving this application instead, e.g.
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker --workers 4
+lets async views such as GET /api/resumes/<id>/pdf/async/ share one event
+loop per worker; the sync DRF views keep working in Django's thread pool.
+Compare the two render paths with `manage.py benchmark_pdf_render`.
 """
 import os
 
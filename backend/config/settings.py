@@ -45,6 +45,10 @@ for internal_host in ('localhost', '127.0.0.1'):
     if internal_host not in ALLOWED_HOSTS:
         ALLOWED_HOSTS.append(internal_host)
 
+# nginx terminates TLS and always sets X-Forwarded-Proto, so absolute URLs
+# built by the API (pagination links, PDF job URLs) keep the https scheme
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
 # Domain for email links
 DOMAIN = os.getenv('DOMAIN', 'localhost:5173')
 
@@ -69,6 +73,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -103,6 +108,22 @@ DEEPSEEK_RESUME_PARSE_MAX_TOKENS = int(os.getenv('DEEPSEEK_RESUME_PARSE_MAX_TOKE
 # Resume ↔ job match (JSON score + short rationale)
 DEEPSEEK_JOB_MATCH_MAX_TOKENS = int(os.getenv('DEEPSEEK_JOB_MATCH_MAX_TOKENS', '1024'))
 
+# Sentence-transformers job matching (api/embedding_models.py): loaded once per process
+MATCH_EMBEDDING_MODEL = os.getenv('MATCH_EMBEDDING_MODEL', 'anass1209/resume-job-matcher-all-MiniLM-L6-v2')
+# Torch intra-op threads per worker process (0 = torch default, one per core)
+EMBEDDING_TORCH_THREADS = int(os.getenv('EMBEDDING_TORCH_THREADS', '2'))
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))
+# Job descriptions per POST /resumes/<id>/match/batch/
+MATCH_BATCH_MAX_JOBS = int(os.getenv('MATCH_BATCH_MAX_JOBS', '25'))
+# POST /resumes/match/: resumes DeepSeek re-ranks after the embedding ranking
+MATCH_RERANK_TOP_K = int(os.getenv('MATCH_RERANK_TOP_K', '3'))
+MATCH_RERANK_MAX_TOP_K = int(os.getenv('MATCH_RERANK_MAX_TOP_K', '5'))
+# Load the model in the gunicorn master so workers share its memory (gunicorn.conf.py)
+EMBEDDING_PRELOAD = os.getenv('EMBEDDING_PRELOAD', 'False') == 'True'
+# Recompute a resume's stored embedding in the background after each save
+# (api/resume_embeddings.py); otherwise the first match computes it
+RESUME_EMBEDDINGS_ON_SAVE = os.getenv('RESUME_EMBEDDINGS_ON_SAVE', 'True') == 'True'
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -150,6 +171,20 @@ DATABASES = {
     }
 }
 
+# Shared pymongo client for raw-collection views (api/mongo.py).
+# One pool per gunicorn worker; sized for the worker's thread count plus headroom.
+MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '20'))
+MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', '0'))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '300000'))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '5000'))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '30000'))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', '5000'))
+# primary, primaryPreferred, secondary, secondaryPreferred or nearest
+MONGODB_READ_PREFERENCE = os.getenv('MONGODB_READ_PREFERENCE', 'primary').strip()
+# Create missing indexes (api/mongo_indexes.py) in the background when the app loads
+MONGODB_ENSURE_INDEXES_ON_STARTUP = os.getenv('MONGODB_ENSURE_INDEXES_ON_STARTUP', 'False') == 'True'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -191,10 +226,119 @@ CORS_ALLOWED_ORIGINS = os.getenv(
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Conditional requests on resume endpoints (api/etags.py)
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = list(default_headers) + ['if-match', 'if-none-match']
+CORS_EXPOSE_HEADERS = ['ETag']
+
+# Caches
+# 'default' is per-process. Set SHARED_CACHE_BACKEND / SHARED_CACHE_LOCATION to add a
+# cache all gunicorn workers share, e.g. django.core.cache.backends.filebased.FileBasedCache
+# with /app/media/.cache, or django.core.cache.backends.memcached.PyMemcacheCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+if os.getenv('SHARED_CACHE_BACKEND'):
+    CACHES['shared'] = {
+        'BACKEND': os.getenv('SHARED_CACHE_BACKEND').strip(),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', '').strip(),
+    }
+
+# Hosted profile cache (api/public_profile_cache.py)
+PUBLIC_PROFILE_CACHE_SIZE = int(os.getenv('PUBLIC_PROFILE_CACHE_SIZE', '512'))
+# Short: other workers only see invalidations once their local entry expires
+PUBLIC_PROFILE_CACHE_LOCAL_TTL = int(os.getenv('PUBLIC_PROFILE_CACHE_LOCAL_TTL', '30'))
+PUBLIC_PROFILE_CACHE_SHARED_TTL = int(os.getenv('PUBLIC_PROFILE_CACHE_SHARED_TTL', '600'))
+
+# Static JSON snapshots of hosted profiles, served by nginx (api/public_profile_snapshots.py)
+PUBLIC_PROFILE_SNAPSHOTS_ENABLED = os.getenv('PUBLIC_PROFILE_SNAPSHOTS_ENABLED', 'True') == 'True'
+PUBLIC_PROFILE_SNAPSHOT_DIR = os.getenv('PUBLIC_PROFILE_SNAPSHOT_DIR', str(MEDIA_ROOT / 'public-profiles'))
+
+# PDF rendering: persistent Chromium per worker (api/pdf_browser_pool.py)
+PDF_POOL_SIZE = int(os.getenv('PDF_POOL_SIZE', '2'))
+PDF_POOL_ACQUIRE_TIMEOUT = float(os.getenv('PDF_POOL_ACQUIRE_TIMEOUT', '10'))
+# Below gunicorn's --timeout 60 so a stuck render fails instead of killing the worker
+PDF_RENDER_TIMEOUT = float(os.getenv('PDF_RENDER_TIMEOUT', '30'))
+PDF_BROWSER_MAX_RENDERS = int(os.getenv('PDF_BROWSER_MAX_RENDERS', '200'))
+# Larger PDFs are refused (0 = no limit); this also bounds the memory a download response holds
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '20'))
+PDF_MAX_BYTES = int(os.getenv('PDF_MAX_BYTES', str(20 * 1024 * 1024)))
+# Self-contained PDF HTML (api/pdf_assets.py): inline external CSS/images from the
+# asset cache, serve fonts locally, abort all other page requests, wait for 'load'
+PDF_OFFLINE_RENDER = os.getenv('PDF_OFFLINE_RENDER', 'True') == 'True'
+PDF_WAIT_UNTIL = os.getenv('PDF_WAIT_UNTIL', 'load' if PDF_OFFLINE_RENDER else 'networkidle')
+PDF_ASSET_CACHE_DIR = os.getenv('PDF_ASSET_CACHE_DIR', str(MEDIA_ROOT / 'pdf-assets'))
+# False = never fetch; only assets already in the cache (or PDF_FONT_DIR) are used
+PDF_ASSET_FETCH = os.getenv('PDF_ASSET_FETCH', 'True') == 'True'
+# Per render: URLs fetched on cache misses, their total bytes and seconds (the HTML comes from clients)
+PDF_ASSET_MAX_FETCHES = int(os.getenv('PDF_ASSET_MAX_FETCHES', '10'))
+PDF_ASSET_MAX_BYTES_PER_RENDER = int(os.getenv('PDF_ASSET_MAX_BYTES_PER_RENDER', str(8 * 1024 * 1024)))
+PDF_ASSET_FETCH_SECONDS = float(os.getenv('PDF_ASSET_FETCH_SECONDS', '10'))
+# Asset cache size; least recently used assets are evicted beyond it
+PDF_ASSET_CACHE_MAX_BYTES = int(os.getenv('PDF_ASSET_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+# Bundled font files, served to pages by file name (e.g. Inter-Regular.woff2)
+PDF_FONT_DIR = os.getenv('PDF_FONT_DIR', str(BASE_DIR / 'pdf-fonts'))
+# Stylesheets fetched by `manage.py preload_pdf_assets` (the frontend's Google Fonts)
+PDF_PRELOAD_ASSETS = [url for url in os.getenv('PDF_PRELOAD_ASSETS', ','.join([
+    'https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=Merriweather:wght@300;400;700'
+    '&family=Roboto:wght@300;400;500;700&family=IBM+Plex+Sans:wght@300;400;500;600;700&display=swap',
+    'https://fonts.googleapis.com/css2?family=Poppins:ital,wght@0,300;0,400;0,600;0,700;0,800;1,600&display=swap',
+])).split(',') if url]
+
+# Shared secret for scraping GET /api/metrics/pdf/ (X-Metrics-Token header); empty = staff only
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Seconds between flushes of each process's PDF metrics into the shared Mongo totals
+PDF_METRICS_FLUSH_SECONDS = float(os.getenv('PDF_METRICS_FLUSH_SECONDS', '10'))
+
+# Content-addressed cache of rendered PDFs (api/pdf_cache.py), LRU-evicted
+PDF_CACHE_ENABLED = os.getenv('PDF_CACHE_ENABLED', 'True') == 'True'
+PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR', str(MEDIA_ROOT / 'pdf-cache'))
+PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+
+# Page thumbnails for previews (api/pdf_thumbnails.py); the first width is the default
+PDF_THUMBNAIL_DIR = os.getenv('PDF_THUMBNAIL_DIR', str(MEDIA_ROOT / 'pdf-thumbnails'))
+PDF_THUMBNAIL_FORMAT = os.getenv('PDF_THUMBNAIL_FORMAT', 'webp')
+PDF_THUMBNAIL_WIDTHS = [int(width) for width in os.getenv('PDF_THUMBNAIL_WIDTHS', '240,480').split(',') if width]
+PDF_THUMBNAIL_QUALITY = int(os.getenv('PDF_THUMBNAIL_QUALITY', '75'))
+# Queue thumbnails for the render worker on every save (needs PDF_JOBS_ENABLED)
+PDF_THUMBNAILS_ON_SAVE = os.getenv('PDF_THUMBNAILS_ON_SAVE', 'True') == 'True'
+# Sets not viewed for this long are deleted by the render worker
+PDF_THUMBNAIL_TTL = int(os.getenv('PDF_THUMBNAIL_TTL', str(30 * 24 * 3600)))
+
+# Recruiter search over all resume embeddings (api/resume_vector_index.py),
+# built by `manage.py rebuild_resume_index` and updated on every embedding save
+RESUME_VECTOR_INDEX_ENABLED = os.getenv('RESUME_VECTOR_INDEX_ENABLED', 'True') == 'True'
+RESUME_VECTOR_INDEX_DIR = os.getenv('RESUME_VECTOR_INDEX_DIR', str(MEDIA_ROOT / 'resume-index'))
+# k-means lists of a rebuild (0 = square root of the resume count)
+RESUME_VECTOR_INDEX_NLIST = int(os.getenv('RESUME_VECTOR_INDEX_NLIST', '0'))
+# Lists an approximate query scans; more = better recall, slower
+RESUME_VECTOR_INDEX_NPROBE = int(os.getenv('RESUME_VECTOR_INDEX_NPROBE', '8'))
+# Seconds a save waits for the index lock before leaving the resume to the next rebuild
+RESUME_VECTOR_INDEX_LOCK_TIMEOUT = float(os.getenv('RESUME_VECTOR_INDEX_LOCK_TIMEOUT', '1'))
+# Results per POST /api/admin/resume-search/
+RESUME_SEARCH_MAX_K = int(os.getenv('RESUME_SEARCH_MAX_K', '100'))
+
+# Background PDF jobs (api/pdf_jobs.py), rendered by `manage.py pdf_worker`.
+# Only enable when that worker runs; otherwise queued jobs never finish.
+PDF_JOBS_ENABLED = os.getenv('PDF_JOBS_ENABLED', 'False') == 'True'
+PDF_JOB_RESULTS_DIR = os.getenv('PDF_JOB_RESULTS_DIR', str(MEDIA_ROOT / 'pdf-jobs'))
+PDF_JOB_RESULT_TTL = int(os.getenv('PDF_JOB_RESULT_TTL', '3600'))
+PDF_JOB_STALE_SECONDS = int(os.getenv('PDF_JOB_STALE_SECONDS', '120'))
+
+# JSON renderer for all API responses: api.renderers.FastJSONRenderer (orjson
+# when installed) or rest_framework.renderers.JSONRenderer
+API_JSON_RENDERER = os.getenv('API_JSON_RENDERER', 'api.renderers.FastJSONRenderer')
+
+# Response compression (api/middleware.py); brotli is used when installed
+API_COMPRESSION_MIN_BYTES = int(os.getenv('API_COMPRESSION_MIN_BYTES', '1024'))
+API_BROTLI_QUALITY = int(os.getenv('API_BROTLI_QUALITY', '5'))
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        API_JSON_RENDERER,
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
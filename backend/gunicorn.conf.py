@@ -0,0 +1,26 @@
+"""
+Gunicorn settings, read automatically from the working directory (/app).
+Command-line flags (workers, bind, timeout) still take precedence.
+
+EMBEDDING_PRELOAD=True imports the app in the master and loads the job
+matching model there (api/embedding_models.py), so forked workers share its
+weights instead of each loading a copy; every worker then warms it up once
+before serving requests.
+"""
+import os
+
+preload_app = os.getenv('EMBEDDING_PRELOAD', 'False') == 'True'
+
+
+def when_ready(server):
+    if preload_app:
+        from api import embedding_models
+
+        embedding_models.preload()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from api import embedding_models
+
+        embedding_models.warm_up()
@@ -2,6 +2,7 @@
 """
 Export a user's resume from MongoDB to PDF. Run on server inside backend container.
 Usage: python export_resume_pdf.py <user_id> [output_path]
+For many resumes at once use `python manage.py export_resume_pdfs`.
 Example: python export_resume_pdf.py 33 /tmp/sina_resume.pdf
 """
 import os
@@ -82,7 +82,14 @@ echo ""
 echo "⏳ Waiting for services to start..."
 sleep 10
 
-# Step 6: Check status
+# Step 6: Warm caches now that the app is serving
+echo ""
+echo "🔥 Step 6: Rebuilding public profile snapshots..."
+docker compose -f docker-compose.prod.yml exec -T backend python manage.py rebuild_public_profiles
+echo "🔥 Preloading PDF assets..."
+docker compose -f docker-compose.prod.yml exec -T backend python manage.py preload_pdf_assets
+
+# Step 7: Check status
 echo ""
 echo "📊 Service Status:"
 docker compose -f docker-compose.prod.yml ps
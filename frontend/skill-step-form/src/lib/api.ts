@@ -435,6 +435,43 @@ export interface Resume extends ResumeData {
   publicProfileTheme?: PublicProfileThemeId;
 }
 
+/**
+ * PDF blob from a /resumes/<id>/pdf/ response. A 202 means the server queued
+ * the render; the job is polled until the PDF is ready.
+ */
+const pdfFromResponse = async (response: Response): Promise<Blob> => {
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({}));
+    throw new Error(error.error || 'Failed to generate PDF');
+  }
+
+  if (response.status === 202) {
+    let job = await response.json();
+    const deadline = Date.now() + 120000;
+    while (job.status === 'queued' || job.status === 'running') {
+      if (Date.now() > deadline) {
+        throw new Error('PDF generation timed out');
+      }
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const statusResponse = await fetch(job.status_url, { headers: createHeaders(true) });
+      job = await statusResponse.json();
+      if (!statusResponse.ok) {
+        throw new Error(job.error || 'Failed to generate PDF');
+      }
+    }
+    if (job.status !== 'done' || !job.result_url) {
+      throw new Error(job.error || 'Failed to generate PDF');
+    }
+    const resultResponse = await fetch(job.result_url, { headers: createHeaders(true) });
+    if (!resultResponse.ok) {
+      throw new Error('Failed to download PDF');
+    }
+    return await resultResponse.blob();
+  }
+
+  return await response.blob();
+};
+
 export const resumeAPI = {
   /**
    * Get all resumes for the authenticated user
@@ -546,6 +583,26 @@ export const resumeAPI = {
     return handleResponse(response, makeRequest);
   },
 
+  /**
+   * Field-level autosave: only the changed paths are sent and validated.
+   * Paths use backend snake_case names, e.g. "work_experience.2.description";
+   * object and array values are converted to snake_case like update() does.
+   */
+  patch: async (
+    id: string,
+    changes: { path: string; value: unknown }[],
+  ): Promise<{ id: string; updatedAt: string }> => {
+    const snakeCaseChanges = changes.map(({ path, value }) => ({ path, value: camelToSnakeObject(value) }));
+
+    const makeRequest = () => fetch(`${API_BASE_URL}/resumes/${id}/`, {
+      method: 'PATCH',
+      headers: createHeaders(true),
+      body: JSON.stringify(snakeCaseChanges),
+    });
+    const response = await makeRequest();
+    return handleResponse(response, makeRequest);
+  },
+
   /**
    * Delete a resume
    */
@@ -610,12 +667,48 @@ export const resumeAPI = {
       body: JSON.stringify({ html: htmlContent }),
     });
 
-    if (!response.ok) {
-      const error = await response.json().catch(() => ({}));
-      throw new Error(error.error || 'Failed to generate PDF');
-    }
+    return pdfFromResponse(response);
+  },
+
+  /**
+   * Export PDF rendered on the server from the stored resume (no HTML upload)
+   */
+  exportPDF: async (id: string, template?: string, lang?: string): Promise<Blob> => {
+    const params = new URLSearchParams();
+    if (template) params.set('template', template);
+    if (lang) params.set('lang', lang);
+    const query = params.toString();
+    const response = await fetch(`${API_BASE_URL}/resumes/${id}/pdf/${query ? `?${query}` : ''}`, {
+      headers: createHeaders(true),
+    });
+    return pdfFromResponse(response);
+  },
 
-    return await response.blob();
+  /**
+   * Page thumbnails of a resume as object URLs (server-rendered, cached by content)
+   */
+  getThumbnails: async (
+    id: string,
+    options: { template?: string; lang?: string; format?: 'webp' | 'png'; width?: number } = {},
+  ): Promise<string[]> => {
+    const params = new URLSearchParams();
+    Object.entries(options).forEach(([key, value]) => {
+      if (value !== undefined) params.set(key, String(value));
+    });
+    const query = params.toString();
+    const makeRequest = () => fetch(`${API_BASE_URL}/resumes/${id}/thumbnails/${query ? `?${query}` : ''}`, {
+      headers: createHeaders(true),
+    });
+    const response = await makeRequest();
+    const data: { pages: string[] } = await handleResponse(response, makeRequest);
+    // Page URLs are immutable, so the browser cache answers repeat views
+    return Promise.all(data.pages.map(async (url) => {
+      const pageResponse = await fetch(url, { headers: createHeaders(true) });
+      if (!pageResponse.ok) {
+        throw new Error('Failed to load thumbnail');
+      }
+      return URL.createObjectURL(await pageResponse.blob());
+    }));
   },
 
   /**
@@ -650,6 +743,72 @@ export const resumeAPI = {
     };
   },
 
+  /**
+   * Match resume to several job descriptions in one request, ranked best first
+   */
+  matchToJobs: async (resumeId: string, jobs: { title?: string; description: string }[]): Promise<{
+    resume_id: string;
+    resume_summary: string;
+    results: { index: number; job_title: string; similarity: number; match_percentage: number }[];
+  }> => {
+    const makeRequest = () => fetch(`${API_BASE_URL}/resumes/${resumeId}/match/batch/`, {
+      method: 'POST',
+      headers: createHeaders(true),
+      body: JSON.stringify({ jobs }),
+    });
+    const response = await makeRequest();
+    const raw = (await handleResponse(response, makeRequest)) as Record<string, any>;
+    // handleResponse camelCases keys; normalize for callers that expect snake_case
+    return {
+      resume_id: String(raw.resumeId ?? ""),
+      resume_summary: String(raw.resumeSummary ?? ""),
+      results: (raw.results ?? []).map((result: Record<string, unknown>) => ({
+        index: Number(result.index ?? 0),
+        job_title: String(result.jobTitle ?? ""),
+        similarity: Number(result.similarity ?? 0),
+        match_percentage: Number(result.matchPercentage ?? 0),
+      })),
+    };
+  },
+
+  /**
+   * Rank all of the user's resumes against one job description (optionally re-ranked by AI)
+   */
+  rankForJob: async (
+    jobTitle: string,
+    jobDescription: string,
+    options: { rerank?: boolean; topK?: number } = {},
+  ): Promise<{
+    resume_id: string;
+    name: string;
+    similarity: number;
+    match_percentage: number;
+    ai_match_percentage?: number;
+    ai_summary?: string;
+  }[]> => {
+    const makeRequest = () => fetch(`${API_BASE_URL}/resumes/match/`, {
+      method: 'POST',
+      headers: createHeaders(true),
+      body: JSON.stringify({
+        title: jobTitle,
+        description: jobDescription,
+        rerank: options.rerank ?? false,
+        ...(options.topK ? { top_k: options.topK } : {}),
+      }),
+    });
+    const response = await makeRequest();
+    const raw = (await handleResponse(response, makeRequest)) as Record<string, any>;
+    // handleResponse camelCases keys; normalize for callers that expect snake_case
+    return (raw.results ?? []).map((result: Record<string, any>) => ({
+      resume_id: String(result.resumeId ?? ""),
+      name: String(result.name ?? ""),
+      similarity: Number(result.similarity ?? 0),
+      match_percentage: Number(result.matchPercentage ?? 0),
+      ai_match_percentage: result.aiMatchPercentage,
+      ai_summary: result.aiSummary,
+    }));
+  },
+
   /**
    * Parse resume text (extracted from PDF on frontend) and return structured data
    * This uses better PDF extraction (react-pdftotext) on the frontend